@@ -5,241 +5,409 @@
 #
 
 import argparse
+import dataclasses
+import logging
 import sys
-import time
-from typing import List, Optional
-
-from .display import print_language_percentages, print_item_language_table
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+from .cache import configure_cache
+from .endpoint import create_endpoint_config, get_known_endpoint
+from .properties import configure_property_tables
+from .ratelimit import configure_rate_limit
+from .constants import (
+    CACHE_BACKENDS,
+    DEFAULT_CACHE_BACKEND,
+    DEFAULT_CACHE_TTL_SECONDS,
+    DEFAULT_MEMORY_CACHE_BYTES,
+    DEFAULT_MEMORY_CACHE_ENTRIES,
+    DEFAULT_ITEMS_PER_BATCH,
+    DEFAULT_LABEL_BACKEND,
+    DEFAULT_LABEL_WINDOW_MS,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_PROPERTY_TABLE_TTL_SECONDS,
+    DEFAULT_REQUESTS_PER_SECOND,
+    DEFAULT_RESULT_FORMAT,
+    LABEL_BACKENDS,
+)
 from .query import (
+    STATEMENT_SOURCES,
+    configure_endpoint,
+    get_property_label_counts,
+    get_value_label_counts,
     get_value_labels,
-    get_properties_and_values,
     get_property_labels,
-    get_qualifier_properties_and_values,
-    get_reference_properties_and_values,
-)
-from .scores import (
-    calculate_language_percentages,
-    calculate_language_percentage_for_languages,
-    get_properties_without_translations,
-    get_properties_without_translations_in_languages,
-)
-from .formatters import (
-    MultilingualityResult,
-    get_formatter,
-    convert_sets_to_lists,
+    get_statements,
+    get_statements_for_items,
+    set_result_format,
 )
+from .scores import PropertyTuple, calculate_language_percentages_from_counts
+from .formatters import MultilingualityResult
+from .scoring import build_result, output_results
 
+T = TypeVar("T")
+U = TypeVar("U")
 
-def calculate_multilinguality_scores(
-    identifiers: List[str],
+# (property, value) pairs of an item grouped by statement source
+StatementPairs = Dict[str, List[Tuple[str, str]]]
+
+
+def _empty_result(
+    item_id: str, language_codes: Optional[List[str]]
+) -> MultilingualityResult:
+    """Create a result with zero scores for an item that could not be scored."""
+    empty_percentages = (
+        {lang: 0.0 for lang in language_codes} if language_codes else {}
+    )
+    return MultilingualityResult(
+        item_id=item_id,
+        property_label_percentages=empty_percentages,
+        value_label_percentages=empty_percentages,
+        combined_percentages=empty_percentages,
+    )
+
+
+def _get_property_value_pairs(item_id: str) -> Optional[List[Tuple[str, str]]]:
+    """
+    Retrieve the (property, value) pairs of an item, including qualifiers and references.
+
+    Args:
+        item_id: A Wikidata/Wikibase item identifier.
+
+    Returns:
+        A list of (property URI, value) pairs, or None if no properties were found.
+    """
+    # Direct, qualifier and reference statements come from a single query
+    statements = get_statements(item_id)
+    if statements is None:
+        return None
+
+    return [pair for source in STATEMENT_SOURCES for pair in statements[source]]
+
+
+def _split_property_value_uris(
+    property_value_pairs: List[Tuple[str, str]]
+) -> Tuple[List[str], List[str]]:
+    """Split property-value pairs into unique property URIs and unique value IRIs."""
+    property_uris = list(set(pv[0] for pv in property_value_pairs))
+    value_uris = list(
+        set(pv[1] for pv in property_value_pairs if pv[1].startswith("http"))
+    )
+    return property_uris, value_uris
+
+
+def _calculate_item_scores(
+    item_id: str,
     language_codes: Optional[List[str]] = None,
     missing: bool = False,
-) -> List[MultilingualityResult]:
+) -> MultilingualityResult:
     """
-    Calculate multilinguality scores based on identifiers and language codes.
+    Calculate multilinguality scores for a single item.
 
     Args:
-        identifiers: A list of Wikidata/Wikibase item identifiers.
+        item_id: A Wikidata/Wikibase item identifier.
         language_codes: A list of language codes to filter results. Defaults to None (all languages).
         missing: Whether to include missing translations in results.
 
     Returns:
-        A list of MultilingualityResult objects containing the calculated scores.
+        A MultilingualityResult for the item.
+    """
+    # Step 1: Get properties and values
+    property_value_pairs = _get_property_value_pairs(item_id)
+    if property_value_pairs is None:
+        print(f"No properties and values found for item {item_id}.")
+        return _empty_result(item_id, language_codes)
 
-    Notes:
-        This function calculates the multilinguality scores of the Wikidata (or Wikibase) items
-        and returns the values for the given language codes (by default: all available languages)
+    property_uris, value_uris = _split_property_value_uris(property_value_pairs)
+
+    # Step 2: Get property labels
+    property_labels_results = get_property_labels(property_uris, language_codes)
+
+    # Step 3: Get value labels
+    value_labels_results = get_value_labels(value_uris, language_codes)
+
+    # Step 4: Calculate the scores
+    return build_result(
+        item_id, property_labels_results, value_labels_results, language_codes, missing
+    )
+
+
+def _calculate_item_scores_aggregated(
+    item_id: str,
+    language_codes: Optional[List[str]] = None,
+) -> MultilingualityResult:
     """
-    results: List[MultilingualityResult] = []
+    Calculate multilinguality scores for a single item from server-side label counts.
 
-    for item_id in identifiers:
-        # Step 1: Get properties and values
-        properties_values_results = get_properties_and_values(item_id)
-        qualifier_properties_values_results = get_qualifier_properties_and_values(
-            item_id
-        )
-        reference_properties_values_results = get_reference_properties_and_values(
-            item_id
-        )
+    The endpoint counts, per language, the distinct properties and values with a label,
+    so no label text is downloaded. Missing translations cannot be reported this way.
 
-        if properties_values_results:
-            if qualifier_properties_values_results:
-                properties_values_results["results"]["bindings"] = (
-                    properties_values_results["results"]["bindings"]
-                    + qualifier_properties_values_results["results"]["bindings"]
-                )
-            if reference_properties_values_results:
-                properties_values_results["results"]["bindings"] = (
-                    properties_values_results["results"]["bindings"]
-                    + reference_properties_values_results["results"]["bindings"]
-                )
-            property_value_pairs = [
-                (result["property"]["value"], result["value"]["value"])
-                for result in properties_values_results["results"]["bindings"]
-            ]
-
-            # Split property-value pairs into separate lists
-            property_uris = list(
-                set(pv[0] for pv in property_value_pairs)
-            )  # Unique property URIs
-            value_uris = list(
-                set(pv[1] for pv in property_value_pairs if pv[1].startswith("http"))
-            )  # Unique value URIs (IRIs)
-
-            # Step 2: Get property labels
-            property_labels_results = get_property_labels(property_uris)
-            if language_codes is None:
-                property_percentages = calculate_language_percentages(
-                    property_labels_results
-                )
-            else:
-                property_percentages = calculate_language_percentage_for_languages(
-                    property_labels_results, language_codes
-                )
-
-            # Get missing property translations if requested
-            missing_property_trans = None
-            if missing:
-                if language_codes is None:
-                    missing_property_trans = convert_sets_to_lists(
-                        get_properties_without_translations(property_labels_results)
-                    )
-                else:
-                    missing_property_trans = convert_sets_to_lists(
-                        get_properties_without_translations_in_languages(
-                            property_labels_results, language_codes
-                        )
-                    )
-
-            # Add a delay to avoid hitting the rate limit
-            time.sleep(1)
-
-            # Step 3: Get value labels
-            value_labels_results = get_value_labels(value_uris)
-            if language_codes is None:
-                value_percentages = calculate_language_percentages(value_labels_results)
-            else:
-                value_percentages = calculate_language_percentage_for_languages(
-                    value_labels_results, language_codes
-                )
-
-            # Get missing value translations if requested
-            missing_value_trans = None
-            if missing:
-                if language_codes is None:
-                    missing_value_trans = convert_sets_to_lists(
-                        get_properties_without_translations(value_labels_results)
-                    )
-                else:
-                    missing_value_trans = convert_sets_to_lists(
-                        get_properties_without_translations_in_languages(
-                            value_labels_results, language_codes
-                        )
-                    )
-
-            # Step 4: Get combined results
-            combined_results_list = property_labels_results + value_labels_results
-            if language_codes is None:
-                combined_percentages = calculate_language_percentages(
-                    combined_results_list
-                )
-            else:
-                combined_percentages = calculate_language_percentage_for_languages(
-                    combined_results_list, language_codes
-                )
-
-            # Create result object
-            result = MultilingualityResult(
-                item_id=item_id,
-                property_label_percentages=property_percentages,
-                value_label_percentages=value_percentages,
-                combined_percentages=combined_percentages,
-                missing_property_translations=missing_property_trans,
-                missing_value_translations=missing_value_trans,
-            )
-            results.append(result)
+    Args:
+        item_id: A Wikidata/Wikibase item identifier.
+        language_codes: A list of language codes to filter results. Defaults to None (all languages).
+
+    Returns:
+        A MultilingualityResult for the item.
+    """
+    # Step 1: Get properties and values
+    property_value_pairs = _get_property_value_pairs(item_id)
+    if property_value_pairs is None:
+        print(f"No properties and values found for item {item_id}.")
+        return _empty_result(item_id, language_codes)
 
+    property_uris, value_uris = _split_property_value_uris(property_value_pairs)
+
+    # Step 2: Count labels per language
+    property_total, property_counts = get_property_label_counts(
+        property_uris, language_codes
+    )
+    value_total, value_counts = get_value_label_counts(value_uris, language_codes)
+
+    # Properties and values are distinct URIs, so their counts add up
+    combined_counts = dict(property_counts)
+    for lang, count in value_counts.items():
+        combined_counts[lang] = combined_counts.get(lang, 0) + count
+
+    return MultilingualityResult(
+        item_id=item_id,
+        property_label_percentages=calculate_language_percentages_from_counts(
+            property_total, property_counts, language_codes
+        ),
+        value_label_percentages=calculate_language_percentages_from_counts(
+            value_total, value_counts, language_codes
+        ),
+        combined_percentages=calculate_language_percentages_from_counts(
+            property_total + value_total, combined_counts, language_codes
+        ),
+    )
+
+
+def _calculate_item_scores_safely(
+    item_id: str,
+    language_codes: Optional[List[str]] = None,
+    missing: bool = False,
+    aggregate: bool = False,
+) -> MultilingualityResult:
+    """Calculate scores for an item, returning an empty result if it fails."""
+    try:
+        if aggregate and not missing:
+            return _calculate_item_scores_aggregated(item_id, language_codes)
+        return _calculate_item_scores(item_id, language_codes, missing)
+    except Exception as e:
+        print(f"Error processing {item_id}: {e}")
+        return _empty_result(item_id, language_codes)
+
+
+def _get_property_value_pairs_for_items(
+    identifiers: List[str], items_per_batch: int, max_workers: int
+) -> List[Optional[List[Tuple[str, str]]]]:
+    """
+    Retrieve the (property, value) pairs of many items with batched statement queries.
+
+    Returns:
+        The pairs of each item in the order of the identifiers (None if no properties
+        were found, an empty list if its batch failed unexpectedly).
+    """
+
+    def fetch_batch(batch: List[str]) -> Dict[str, Optional[StatementPairs]]:
+        try:
+            return get_statements_for_items(batch, items_per_batch)
+        except Exception as e:
+            print(f"Error processing {', '.join(batch)}: {e}")
+            return {
+                item_id: {source: [] for source in STATEMENT_SOURCES}
+                for item_id in batch
+            }
+
+    items_per_batch = max(items_per_batch, 1)
+    batches = [
+        identifiers[i : i + items_per_batch]
+        for i in range(0, len(identifiers), items_per_batch)
+    ]
+
+    statements_by_item: Dict[str, Optional[StatementPairs]] = {}
+    for batch_statements in _map_items(fetch_batch, batches, max_workers):
+        statements_by_item.update(batch_statements)
+
+    pairs_by_item: List[Optional[List[Tuple[str, str]]]] = []
+    for item_id in identifiers:
+        statements = statements_by_item.get(item_id)
+        if statements is None:
+            pairs_by_item.append(None)
         else:
-            # No properties found - create empty result
-            empty_percentages = (
-                {lang: 0.0 for lang in language_codes} if language_codes else {}
-            )
-            result = MultilingualityResult(
-                item_id=item_id,
-                property_label_percentages=empty_percentages,
-                value_label_percentages=empty_percentages,
-                combined_percentages=empty_percentages,
+            pairs_by_item.append(
+                [pair for source in STATEMENT_SOURCES for pair in statements[source]]
             )
-            results.append(result)
+    return pairs_by_item
+
+
+def _group_labels_by_uri(
+    labels: List[PropertyTuple],
+) -> Dict[str, List[PropertyTuple]]:
+    """Index (uri, label, language) tuples by URI."""
+    labels_by_uri: Dict[str, List[PropertyTuple]] = {}
+    for label in labels:
+        labels_by_uri.setdefault(label[0], []).append(label)
+    return labels_by_uri
+
+
+def _map_items(function: Callable[[U], T], items: List[U], max_workers: int) -> List[T]:
+    """Apply a function to every item, concurrently if max_workers > 1."""
+    if max_workers <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+
+    # Each worker thread uses its own SPARQL wrapper (see query.get_sparql)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(function, items))
+
+
+def _calculate_scores_with_shared_labels(
+    identifiers: List[str],
+    language_codes: Optional[List[str]],
+    missing: bool,
+    max_workers: int,
+    items_per_batch: int,
+) -> List[MultilingualityResult]:
+    """
+    Calculate scores for many items, resolving each distinct label URI only once.
+
+    Statements of all items are collected first (`items_per_batch` items per query),
+    the labels of the union of their property and value URIs are fetched in a single
+    pass, and the labels are then fanned back out to the items.
+    """
+    # Step 1: Get properties and values of all items
+    pairs_by_item = _get_property_value_pairs_for_items(
+        identifiers, items_per_batch, max_workers
+    )
+
+    uris_by_item: List[Optional[Tuple[List[str], List[str]]]] = []
+    all_property_uris: Set[str] = set()
+    all_value_uris: Set[str] = set()
+    for property_value_pairs in pairs_by_item:
+        if property_value_pairs is None:
+            uris_by_item.append(None)
+            continue
+        property_uris, value_uris = _split_property_value_uris(property_value_pairs)
+        uris_by_item.append((property_uris, value_uris))
+        all_property_uris.update(property_uris)
+        all_value_uris.update(value_uris)
+
+    # Step 2: Get the labels of every distinct URI once
+    property_labels_by_uri = _group_labels_by_uri(
+        get_property_labels(list(all_property_uris), language_codes)
+    )
+    value_labels_by_uri = _group_labels_by_uri(
+        get_value_labels(list(all_value_uris), language_codes)
+    )
+
+    # Step 3: Calculate the scores of each item from the shared labels
+    results: List[MultilingualityResult] = []
+    for item_id, item_uris in zip(identifiers, uris_by_item):
+        if item_uris is None:
             print(f"No properties and values found for item {item_id}.")
+            results.append(_empty_result(item_id, language_codes))
+            continue
+
+        property_uris, value_uris = item_uris
+        property_labels_results = [
+            label for uri in property_uris for label in property_labels_by_uri.get(uri, [])
+        ]
+        value_labels_results = [
+            label for uri in value_uris for label in value_labels_by_uri.get(uri, [])
+        ]
+        results.append(
+            build_result(
+                item_id,
+                property_labels_results,
+                value_labels_results,
+                language_codes,
+                missing,
+            )
+        )
 
     return results
 
 
-def output_results(
-    results: List[MultilingualityResult],
-    output_format: str = "table",
-    output_file: Optional[str] = None,
-    show_missing: bool = False,
-) -> None:
+def calculate_multilinguality_scores(
+    identifiers: List[str],
+    language_codes: Optional[List[str]] = None,
+    missing: bool = False,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    share_labels: bool = False,
+    aggregate: bool = False,
+    items_per_batch: int = DEFAULT_ITEMS_PER_BATCH,
+) -> List[MultilingualityResult]:
     """
-    Output results in the specified format.
+    Calculate multilinguality scores based on identifiers and language codes.
 
     Args:
-        results: List of MultilingualityResult objects.
-        output_format: Output format ('table', 'json', or 'csv').
-        output_file: Optional file path to write output to.
-        show_missing: Whether to show missing translations (for table format).
+        identifiers: A list of Wikidata/Wikibase item identifiers.
+        language_codes: A list of language codes to filter results. Defaults to None (all languages).
+        missing: Whether to include missing translations in results.
+        max_workers: Number of items processed concurrently. Defaults to 1 (sequential).
+        share_labels: Whether to collect the statements of all items first and fetch the
+            labels of each distinct property/value URI only once for the whole run.
+        aggregate: Whether to let the endpoint count labels per language instead of
+            downloading them. Takes precedence over share_labels, and is ignored when
+            missing translations are requested.
+        items_per_batch: Number of items whose statements are fetched per query when
+            share_labels is set.
+
+    Returns:
+        A list of MultilingualityResult objects containing the calculated scores,
+        in the same order as the identifiers.
+
+    Notes:
+        This function calculates the multilinguality scores of the Wikidata (or Wikibase) items
+        and returns the values for the given language codes (by default: all available languages).
+        Each item is scored independently: an item that fails yields an empty result
+        without affecting the others.
     """
-    formatter = get_formatter(output_format)
-
-    if output_format == "table":
-        # For table format, use direct console output
-        for result in results:
-            print(f"\nFor Wikidata (Wikibase) item: {result.item_id}")
-            print_language_percentages(
-                result.property_label_percentages,
-                "Language Percentages for property labels",
-            )
-            if show_missing and result.missing_property_translations:
-                # Convert lists back to sets for display
-                missing_as_sets = {
-                    k: set(v) for k, v in result.missing_property_translations.items()
-                }
-                print_item_language_table(
-                    missing_as_sets, "Properties missing translation"
-                )
-
-            print_language_percentages(
-                result.value_label_percentages,
-                "Language Percentages for property value labels",
-            )
-            if show_missing and result.missing_value_translations:
-                missing_as_sets = {
-                    k: set(v) for k, v in result.missing_value_translations.items()
-                }
-                print_item_language_table(
-                    missing_as_sets, "Property values missing translation"
-                )
-
-            print_language_percentages(
-                result.combined_percentages,
-                "Combined Language Percentages for property label and property value labels",
-            )
-    else:
-        # For JSON/CSV formats, use formatter
-        output = formatter.format(results)
-
-        if output_file:
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(output)
-            print(f"Results written to {output_file}")
-        else:
-            print(output)
+    if share_labels and not (aggregate and not missing):
+        return _calculate_scores_with_shared_labels(
+            identifiers, language_codes, missing, max_workers, items_per_batch
+        )
+
+    return _map_items(
+        lambda item_id: _calculate_item_scores_safely(
+            item_id, language_codes, missing, aggregate
+        ),
+        identifiers,
+        max_workers,
+    )
+
+
+def _positive_float(value: str) -> float:
+    """Parse a command line value that must be a positive number."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {value!r}")
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be positive, got {value}")
+    return number
 
 
 def main() -> None:
     """Main entry point for the CLI."""
+    if sys.argv[1:2] == ["dump"]:
+        from .dump import main as dump_main
+
+        dump_main(sys.argv[2:])
+        return
+
+    if sys.argv[1:2] == ["index"]:
+        from .index import main as index_main
+
+        index_main(sys.argv[2:])
+        return
+
+    if sys.argv[1:2] == ["warm-properties"]:
+        from .properties import main as warm_properties_main
+
+        warm_properties_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         description="Calculate multilinguality scores for Wikidata/Wikibase items.",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -249,6 +417,13 @@ Examples:
   python -m mlscores Q5 Q10 -l en fr -m
   python -m mlscores Q42 -f json -o results.json
   python -m mlscores Q42 -f csv -o results.csv
+  python -m mlscores Q1 Q2 Q3 Q4 -j 4
+  python -m mlscores Q1 Q2 Q3 Q4 -j 4 -s
+  python -m mlscores Q42 -l en fr -a
+  python -m mlscores dump latest-all.json.gz -l en fr -f csv -o scores.csv
+  python -m mlscores index latest-all.json.gz wikidata.sqlite
+  python -m mlscores Q42 -l en fr --endpoint local:wikidata.sqlite
+  python -m mlscores warm-properties
         """,
     )
     parser.add_argument(
@@ -285,6 +460,141 @@ Examples:
         type=str,
         help="Output file path (default: stdout)",
     )
+    parser.add_argument(
+        "-s",
+        "--share-labels",
+        action="store_true",
+        help="Collect statements of all items first and fetch each distinct label once",
+    )
+    parser.add_argument(
+        "--items-per-batch",
+        type=int,
+        default=DEFAULT_ITEMS_PER_BATCH,
+        help="Number of items whose statements are fetched per query with "
+        f"--share-labels (default: {DEFAULT_ITEMS_PER_BATCH})",
+    )
+    parser.add_argument(
+        "-a",
+        "--aggregate",
+        action="store_true",
+        help="Let the endpoint count labels per language instead of downloading them "
+        "(ignored with --missing)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Number of items to process concurrently (default: {DEFAULT_MAX_WORKERS})",
+    )
+    parser.add_argument(
+        "--result-format",
+        type=str,
+        choices=["tsv", "csv", "json"],
+        default=DEFAULT_RESULT_FORMAT,
+        help="Result format requested from the endpoint for statement and label "
+        f"queries; JSON is still accepted as a fallback (default: {DEFAULT_RESULT_FORMAT})",
+    )
+    parser.add_argument(
+        "--endpoint",
+        type=str,
+        help="SPARQL endpoint URL, known endpoint name (wikidata, commons), or "
+        "local:PATH of an index built with 'python -m mlscores index' "
+        "(default: wikidata)",
+    )
+    parser.add_argument(
+        "--label-backend",
+        type=str,
+        choices=LABEL_BACKENDS,
+        default=DEFAULT_LABEL_BACKEND,
+        help="Fetch property and value labels with SPARQL queries or with the "
+        f"Wikibase API's wbgetentities action (default: {DEFAULT_LABEL_BACKEND})",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=_positive_float,
+        default=DEFAULT_REQUESTS_PER_SECOND,
+        help="Maximum number of queries per second sent to the endpoint "
+        f"(default: {DEFAULT_REQUESTS_PER_SECOND})",
+    )
+
+    # Cache options
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help="Directory for cached query results (default: ~/.mlscores/cache)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=DEFAULT_CACHE_TTL_SECONDS,
+        help=f"Cache time-to-live in seconds (default: {DEFAULT_CACHE_TTL_SECONDS})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the query cache",
+    )
+    parser.add_argument(
+        "--cache-backend",
+        choices=CACHE_BACKENDS,
+        default=DEFAULT_CACHE_BACKEND,
+        help="Store cached results as one JSON file each or in one SQLite database "
+        f"(default: {DEFAULT_CACHE_BACKEND})",
+    )
+    parser.add_argument(
+        "--cache-compress",
+        action="store_true",
+        help="Compress new cache entries (entries in either encoding are read)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        help="Maximum size in MB of the cache on disk, beyond which the least "
+        "recently used entries are removed (default: no limit)",
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        help="Maximum number of entries in the cache on disk (default: no limit)",
+    )
+    parser.add_argument(
+        "--memory-cache-entries",
+        type=int,
+        default=DEFAULT_MEMORY_CACHE_ENTRIES,
+        help="Maximum number of cached results also kept in memory, 0 to keep none "
+        f"(default: {DEFAULT_MEMORY_CACHE_ENTRIES})",
+    )
+    parser.add_argument(
+        "--memory-cache-mb",
+        type=int,
+        default=DEFAULT_MEMORY_CACHE_BYTES // (1024 * 1024),
+        help="Maximum size in MB of the cached results kept in memory "
+        f"(default: {DEFAULT_MEMORY_CACHE_BYTES // (1024 * 1024)})",
+    )
+    parser.add_argument(
+        "--property-table-dir",
+        type=str,
+        help="Directory of property label tables saved by 'python -m mlscores "
+        "warm-properties' (default: ~/.mlscores/properties)",
+    )
+    parser.add_argument(
+        "--property-table-ttl",
+        type=int,
+        default=DEFAULT_PROPERTY_TABLE_TTL_SECONDS,
+        help="Query property labels again once the property label table is older "
+        f"than this many seconds (default: {DEFAULT_PROPERTY_TABLE_TTL_SECONDS})",
+    )
+    parser.add_argument(
+        "--no-property-table",
+        action="store_true",
+        help="Always query property labels, even with a property label table",
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Log query batch sizes, timings and throughput",
+    )
 
     # Web server options
     parser.add_argument(
@@ -292,6 +602,14 @@ Examples:
         action="store_true",
         help="Start the web server instead of CLI mode",
     )
+    parser.add_argument(
+        "--label-window",
+        type=float,
+        default=DEFAULT_LABEL_WINDOW_MS,
+        help="Milliseconds during which the web server collects the label lookups "
+        "of concurrent requests to query them together; 0 to disable "
+        f"(default: {DEFAULT_LABEL_WINDOW_MS:g})",
+    )
     parser.add_argument(
         "--host",
         type=str,
@@ -307,11 +625,58 @@ Examples:
 
     args = parser.parse_args()
 
+    if args.debug:
+        logging.basicConfig(
+            level=logging.DEBUG, format="%(asctime)s %(name)s: %(message)s"
+        )
+
+    configure_rate_limit(requests_per_second=args.rate_limit)
+    set_result_format(args.result_format)
+    endpoint = None
+    if args.endpoint:
+        endpoint = get_known_endpoint(args.endpoint)
+    if endpoint is None:
+        endpoint = create_endpoint_config(url=args.endpoint)
+    endpoint = dataclasses.replace(endpoint, label_backend=args.label_backend)
+    try:
+        configure_endpoint(endpoint)
+        if endpoint.is_local():
+            from .index import get_local_index
+
+            get_local_index(endpoint.url)
+    except (ValueError, FileNotFoundError) as e:
+        parser.error(str(e))
+    configure_cache(
+        cache_dir=args.cache_dir,
+        ttl_seconds=args.cache_ttl,
+        enabled=not args.no_cache,
+        memory_max_entries=args.memory_cache_entries,
+        memory_max_bytes=args.memory_cache_mb * 1024 * 1024,
+        backend=args.cache_backend,
+        compress=args.cache_compress,
+        max_bytes=(
+            args.cache_max_mb * 1024 * 1024 if args.cache_max_mb is not None else None
+        ),
+        max_entries=args.cache_max_entries,
+    )
+    configure_property_tables(
+        directory=args.property_table_dir,
+        ttl_seconds=args.property_table_ttl,
+        enabled=not args.no_property_table,
+    )
+
     # Handle web server mode
     if args.web:
         try:
+            from .aquery import configure_client
             from .web import run_server
 
+            configure_client(
+                result_format=args.result_format,
+                config=endpoint,
+                label_window_seconds=args.label_window / 1000,
+            )
+
             print(f"Starting web server at http://{args.host}:{args.port}")
             print(f"API documentation at http://{args.host}:{args.port}/api/docs")
             run_server(host=args.host, port=args.port)
@@ -328,7 +693,13 @@ Examples:
 
     # Calculate scores
     results = calculate_multilinguality_scores(
-        args.identifiers, args.language, args.missing
+        args.identifiers,
+        args.language,
+        args.missing,
+        max_workers=args.jobs,
+        share_labels=args.share_labels,
+        aggregate=args.aggregate,
+        items_per_batch=args.items_per_batch,
     )
 
     # Output results
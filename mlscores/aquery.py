@@ -0,0 +1,948 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+"""Asynchronous SPARQL query engine with pooled keep-alive connections."""
+
+import asyncio
+import dataclasses
+import functools
+import json
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+import httpx
+
+from .bindings import ACCEPT_HEADERS, CHUNK_SIZE, DecodeStats, ResultsDecoder, Row
+from .cache import get_cache
+from .endpoint import EndpointConfig, is_local_endpoint
+from .index import get_local_index
+from .labelcache import EntityLabelCache
+from .properties import get_property_table
+from .ratelimit import get_rate_limiter, parse_retry_after
+from .wikibase_api import build_wbgetentities_params, entity_id, entity_label_rows
+from .constants import (
+    DEFAULT_LABEL_BACKEND,
+    DEFAULT_SPARQL_ENDPOINT,
+    DEFAULT_WIKIBASE_API_URL,
+    LABEL_BACKENDS,
+    MAX_ENDPOINT_CLIENTS,
+    WBGETENTITIES_MAX_IDS,
+    MAX_RETRIES,
+    BACKOFF_MULTIPLIER,
+    DEFAULT_MAX_CONCURRENT_QUERIES,
+    DEFAULT_QUERY_TIMEOUT_SECONDS,
+    DEFAULT_RESULT_FORMAT,
+)
+from .query import (
+    AdaptiveBatcher,
+    label_batch_observer,
+    property_label_batcher,
+    value_label_batcher,
+    build_properties_and_values_query,
+    build_qualifier_properties_and_values_query,
+    build_reference_properties_and_values_query,
+    build_statements_query,
+    build_property_labels_query,
+    build_value_labels_query,
+    label_tuples,
+    statement_pairs_by_source,
+    PROPERTY_LABEL_VARIABLES,
+    STATEMENT_VARIABLES,
+    VALUE_LABEL_VARIABLES,
+    user_agent,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSparqlClient:
+    """Asynchronous SPARQL client sharing a pool of keep-alive connections."""
+
+    def __init__(
+        self,
+        endpoint: str = DEFAULT_SPARQL_ENDPOINT,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENT_QUERIES,
+        timeout: float = DEFAULT_QUERY_TIMEOUT_SECONDS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        result_format: str = DEFAULT_RESULT_FORMAT,
+        label_backend: str = DEFAULT_LABEL_BACKEND,
+        api_url: Optional[str] = DEFAULT_WIKIBASE_API_URL,
+        label_window_seconds: float = 0,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            endpoint: SPARQL endpoint URL
+            max_concurrency: Maximum number of queries in flight at once
+            timeout: Timeout for a single request in seconds
+            transport: Optional httpx transport (e.g. a mock transport for tests)
+            result_format: Format requested by `select` ("tsv", "csv" or "json")
+            label_backend: How labels are resolved ("sparql" or "wbgetentities")
+            api_url: Wikibase Action API URL used by the "wbgetentities" backend
+            label_window_seconds: Merge the SPARQL label lookups of concurrent callers
+                made within this window into shared queries (0 to disable)
+        """
+        if result_format not in ACCEPT_HEADERS:
+            raise ValueError(f"Unsupported result format: {result_format}")
+        if label_backend not in LABEL_BACKENDS:
+            raise ValueError(f"Unsupported label backend: {label_backend}")
+        if label_backend == "wbgetentities" and not api_url:
+            raise ValueError("The wbgetentities label backend requires an API URL")
+        self.endpoint = endpoint
+        self.result_format = result_format
+        self.label_backend = label_backend
+        self.api_url = api_url
+        # Endpoint settings; EndpointClient replaces them with a full configuration
+        self.config = EndpointConfig(
+            url=endpoint, timeout=timeout, label_backend=label_backend, api_url=api_url
+        )
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            headers={
+                "User-Agent": user_agent,
+                "Accept": "application/sparql-results+json",
+            },
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+            timeout=timeout,
+            transport=transport,
+        )
+        self.label_resolver = (
+            LabelResolver(self, label_window_seconds) if label_window_seconds > 0 else None
+        )
+        # Number of callers holding the client (see `in_use`)
+        self._users = 0
+        self._retired = False
+
+    @property
+    def cache_namespace(self) -> str:
+        """Namespace of the client's results in the query cache."""
+        # Other credentials may give access to other data
+        if self.config.username:
+            return f"{self.config.username}@{self.endpoint}"
+        return self.endpoint
+
+    async def query(
+        self,
+        query: str,
+        observer: Optional[Callable[[Optional[Dict[str, Any]], float], None]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Execute a SPARQL query through the query cache, with retry mechanism.
+
+        Args:
+            query: The SPARQL query string
+            observer: Optional callback receiving the result (None on failure) and
+                wall time of queries sent to the endpoint; not called for cache hits
+
+        Returns:
+            The decoded JSON result, or None if the query fails after the maximum
+            number of retries.
+        """
+        cache = get_cache()
+        cached = cache.get(query, self.cache_namespace)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        result = await self._execute(query, _read_json)
+        if observer is not None:
+            observer(result, time.perf_counter() - start)
+        if result is not None:
+            cache.set(query, self.cache_namespace, result)
+        return result
+
+    async def select(
+        self,
+        query: str,
+        variables: Sequence[str],
+        observer: Optional[
+            Callable[[Optional[List[Row]], float, Optional[DecodeStats]], None]
+        ] = None,
+        use_cache: bool = True,
+    ) -> Optional[List[Row]]:
+        """
+        Execute a SPARQL SELECT query through the query cache, decoding rows as tuples.
+
+        Results are requested in the client's result format (JSON remains accepted as
+        a fallback) and decoded while they are received, straight into one tuple per
+        result row, so the full response is never held in memory.
+
+        Args:
+            query: The SPARQL query string
+            variables: The projected variables, in tuple order
+            observer: Optional callback receiving the rows (None on failure), wall
+                time and decoding statistics (None on failure) of queries sent to the
+                endpoint; not called for cache hits
+            use_cache: Whether to look up and store the rows in the query cache
+
+        Returns:
+            One tuple per result row with the values of `variables` (None when
+            unbound), or None if the query fails.
+        """
+        cache = get_cache()
+        cache_endpoint = f"{self.cache_namespace}#tuples"
+        cached = cache.get(query, cache_endpoint) if use_cache else None
+        if cached is not None:
+            return [tuple(row) for row in cached]
+
+        async def read_rows(response: httpx.Response) -> Tuple[List[Row], DecodeStats]:
+            decoder = ResultsDecoder(variables)
+            rows: List[Row] = []
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                rows.extend(decoder.feed(chunk))
+            rows.extend(decoder.close())
+            return rows, decoder.stats
+
+        start = time.perf_counter()
+        result = await self._execute(
+            query, read_rows, headers={"Accept": ACCEPT_HEADERS[self.result_format]}
+        )
+        seconds = time.perf_counter() - start
+        rows, stats = result if result is not None else (None, None)
+        if observer is not None:
+            observer(rows, seconds, stats)
+        if rows is None:
+            return None
+
+        logger.debug(
+            "%s results: %d rows, %d bytes in %.2fs, decoded in %.3fs",
+            stats.format,
+            len(rows),
+            stats.num_bytes,
+            seconds,
+            stats.decode_seconds,
+        )
+        if use_cache:
+            cache.set(query, cache_endpoint, rows)
+        return rows
+
+    async def entity_labels(
+        self, uris: Sequence[str], languages: Optional[List[str]] = None
+    ) -> Optional[List[Row]]:
+        """
+        Fetch the labels of one batch of URIs from the Wikibase API.
+
+        The rows are not cached here: the label functions cache them per URI (see
+        `EntityLabelCache`).
+
+        Args:
+            uris: At most `WBGETENTITIES_MAX_IDS` entity or property URIs
+            languages: Only fetch labels in these languages (default: all languages)
+
+        Returns:
+            (URI, label, language) rows, with None for the label and language of URIs
+            without a label, or None if the request fails.
+        """
+        params = build_wbgetentities_params([entity_id(uri) for uri in uris], languages)
+
+        async def read_labels(response: httpx.Response) -> List[Row]:
+            return entity_label_rows(uris, json.loads(await response.aread()), languages)
+
+        return await self._request(
+            self.api_url,
+            lambda: self._client.stream(
+                "GET", self.api_url, params=params, headers={"Accept": "application/json"}
+            ),
+            read_labels,
+        )
+
+    async def _execute(
+        self,
+        query: str,
+        read: Callable[[httpx.Response], Awaitable[Any]],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Any:
+        """Send a query to the SPARQL endpoint."""
+        if self.config.auth_header:
+            headers = {**(headers or {}), "Authorization": self.config.auth_header}
+        return await self._request(
+            self.endpoint,
+            lambda: self._client.stream(
+                "POST", self.endpoint, data={"query": query}, headers=headers
+            ),
+            read,
+        )
+
+    async def _request(
+        self,
+        url: str,
+        stream: Callable[[], AsyncContextManager[httpx.Response]],
+        read: Callable[[httpx.Response], Awaitable[Any]],
+    ) -> Any:
+        """Send a request, waiting for the host's rate limiter and retrying on 429."""
+        limiter = get_rate_limiter(url)
+
+        async with self._semaphore:
+            for attempt in range(MAX_RETRIES):
+                # Wait for the host's share of the request rate
+                wait_time = limiter.reserve()
+                if wait_time > 0:
+                    await asyncio.sleep(wait_time)
+
+                try:
+                    async with stream() as response:
+                        if response.status_code == 429:
+                            # Pause all queries to this host, honoring Retry-After if sent
+                            wait_time = limiter.penalize(
+                                parse_retry_after(response.headers.get("Retry-After")),
+                                BACKOFF_MULTIPLIER**attempt,
+                            )
+                            print(f"Rate limit hit, retrying in {wait_time} seconds...")
+                            continue
+
+                        if response.is_error:
+                            print(
+                                f"HTTP error: {response.status_code} {response.reason_phrase}"
+                            )
+                            return None
+
+                        result = await read(response)
+                except httpx.HTTPError as e:
+                    print(f"HTTP error: {e}")
+                    return None
+                except ValueError as e:
+                    # Truncated or malformed response (e.g. a query timeout mid-stream)
+                    print(f"Invalid response: {e}")
+                    return None
+
+                limiter.reward()
+                return result
+
+        return None
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        await self._client.aclose()
+
+    @asynccontextmanager
+    async def in_use(self) -> AsyncIterator["AsyncSparqlClient"]:
+        """Hold the client open while the block runs, even if it is retired."""
+        self._users += 1
+        try:
+            yield self
+        finally:
+            self._users -= 1
+            if self._retired and not self._users:
+                await self.aclose()
+
+    async def retire(self) -> None:
+        """Close the client once no caller holds it (see `in_use`)."""
+        self._retired = True
+        if not self._users:
+            await self.aclose()
+
+    async def __aenter__(self) -> "AsyncSparqlClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+class EndpointClient(AsyncSparqlClient):
+    """
+    Asynchronous client of one endpoint, built from its EndpointConfig.
+
+    Besides its own connection pool, the client sends the endpoint's credentials,
+    caches results under its own namespace and only looks up labels of URIs with
+    the endpoint's property and item prefixes.
+    """
+
+    def __init__(
+        self,
+        config: EndpointConfig,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENT_QUERIES,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        result_format: str = DEFAULT_RESULT_FORMAT,
+        label_window_seconds: float = 0,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            config: Endpoint URL, credentials, URI prefixes and transport settings
+            max_concurrency: Maximum number of queries in flight at once
+            transport: Optional httpx transport (e.g. a mock transport for tests)
+            result_format: Format requested by `select` ("tsv", "csv" or "json")
+            label_window_seconds: Merge the SPARQL label lookups of concurrent callers
+                made within this window into shared queries (0 to disable)
+        """
+        super().__init__(
+            endpoint=config.url,
+            max_concurrency=max_concurrency,
+            timeout=config.timeout,
+            transport=transport,
+            result_format=result_format,
+            label_backend=config.label_backend,
+            api_url=config.api_url,
+            label_window_seconds=label_window_seconds,
+        )
+        self.config = config
+
+
+async def _read_json(response: httpx.Response) -> Dict[str, Any]:
+    """Read a whole JSON response."""
+    return json.loads(await response.aread())
+
+
+async def _run_in_thread(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking call in the default executor (`asyncio.to_thread` needs 3.9)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args))
+
+
+async def _query_label_batches(
+    uris: List[str],
+    build_query,
+    variables: Sequence[str],
+    batcher: AdaptiveBatcher,
+    client: AsyncSparqlClient,
+    languages: Optional[List[str]] = None,
+) -> List[Row]:
+    """Run label queries for all batches of URIs concurrently."""
+    # Rows are cached per URI by the label functions, not per batch query
+    batch_results = await asyncio.gather(
+        *(
+            client.select(
+                build_query(batch, languages),
+                variables,
+                observer=label_batch_observer(batcher, len(batch)),
+                use_cache=False,
+            )
+            for batch in batcher.batches(uris)
+        )
+    )
+
+    rows: List[Row] = []
+    for batch_result in batch_results:
+        if batch_result:
+            rows.extend(batch_result)
+    return rows
+
+
+class _LabelWindow:
+    """URIs whose labels are looked up together, and the rows once they arrive."""
+
+    def __init__(
+        self,
+        future: "asyncio.Future[List[Row]]",
+        build_query,
+        variables: Sequence[str],
+        batcher: AdaptiveBatcher,
+        languages: Optional[List[str]],
+    ):
+        self.future = future
+        self.build_query = build_query
+        self.variables = variables
+        self.batcher = batcher
+        self.languages = languages
+        self.uris: Set[str] = set()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class LabelResolver:
+    """
+    Merge the label lookups of concurrent callers into shared queries.
+
+    The URIs of lookups of one kind and language filter made within
+    `window_seconds` of the first one are queried together, in batches sized by
+    the usual adaptive batcher, and each caller gets the rows of its own URIs. A
+    window is closed early once it holds a full batch.
+    """
+
+    def __init__(self, client: AsyncSparqlClient, window_seconds: float):
+        """
+        Initialize the resolver.
+
+        Args:
+            client: The client running the queries.
+            window_seconds: How long lookups are collected before they are queried.
+        """
+        self.client = client
+        self.window_seconds = window_seconds
+        self._windows: Dict[Tuple[Any, ...], _LabelWindow] = {}
+        self.lookups = 0
+        self.windows = 0
+        self.uris_requested = 0
+        self.uris_queried = 0
+
+    async def resolve(
+        self,
+        uris: List[str],
+        build_query,
+        variables: Sequence[str],
+        batcher: AdaptiveBatcher,
+        languages: Optional[List[str]] = None,
+    ) -> List[Row]:
+        """
+        Look labels up together with the other lookups of the same window.
+
+        Takes the arguments of `_query_label_batches` and returns the same rows.
+        """
+        if not uris:
+            return []
+        key = (build_query, tuple(languages) if languages else None)
+        window = self._windows.get(key)
+        if window is None:
+            loop = asyncio.get_running_loop()
+            window = _LabelWindow(
+                loop.create_future(), build_query, variables, batcher, languages
+            )
+            window.timer = loop.call_later(self.window_seconds, self._flush, key)
+            self._windows[key] = window
+
+        self.lookups += 1
+        self.uris_requested += len(uris)
+        window.uris.update(uris)
+        if len(window.uris) >= batcher.size:
+            window.timer.cancel()
+            self._flush(key)
+
+        rows = await asyncio.shield(window.future)
+        wanted = set(uris)
+        return [row for row in rows if row[0] in wanted]
+
+    def _flush(self, key: Tuple[Any, ...]) -> None:
+        """Query the URIs of a window and hand the rows to its callers."""
+        window = self._windows.pop(key)
+        self.windows += 1
+        self.uris_queried += len(window.uris)
+
+        def complete(task: "asyncio.Task[List[Row]]") -> None:
+            if task.cancelled():
+                window.future.cancel()
+            elif task.exception() is not None:
+                window.future.set_exception(task.exception())
+            else:
+                window.future.set_result(task.result())
+
+        task = asyncio.ensure_future(
+            _query_label_batches(
+                sorted(window.uris),
+                window.build_query,
+                window.variables,
+                window.batcher,
+                self.client,
+                window.languages,
+            )
+        )
+        task.add_done_callback(complete)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of lookups, windows queried and URIs in them."""
+        return {
+            "lookups": self.lookups,
+            "windows": self.windows,
+            "uris_requested": self.uris_requested,
+            "uris_queried": self.uris_queried,
+        }
+
+
+async def _resolve_labels(
+    uris: List[str],
+    build_query,
+    variables: Sequence[str],
+    batcher: AdaptiveBatcher,
+    client: AsyncSparqlClient,
+    languages: Optional[List[str]] = None,
+) -> List[Row]:
+    """Run label queries through the client's label resolver, if it has one."""
+    if client.label_resolver is not None:
+        return await client.label_resolver.resolve(
+            uris, build_query, variables, batcher, languages
+        )
+    return await _query_label_batches(
+        uris, build_query, variables, batcher, client, languages
+    )
+
+
+async def _get_entity_labels(
+    uris: List[str],
+    client: AsyncSparqlClient,
+    languages: Optional[List[str]] = None,
+) -> List[Row]:
+    """Fetch labels from the Wikibase API for all batches of URIs concurrently."""
+    batch_results = await asyncio.gather(
+        *(
+            client.entity_labels(uris[i : i + WBGETENTITIES_MAX_IDS], languages)
+            for i in range(0, len(uris), WBGETENTITIES_MAX_IDS)
+        )
+    )
+
+    rows: List[Row] = []
+    for batch_result in batch_results:
+        if batch_result:
+            rows.extend(batch_result)
+    return rows
+
+
+async def get_properties_and_values(
+    item_id: str, client: AsyncSparqlClient
+) -> Optional[Dict[str, Any]]:
+    """
+    Retrieve properties and values for a given Wikidata item.
+
+    Args:
+        item_id: The ID of the Wikidata item to retrieve properties for.
+        client: The client used to run the query.
+
+    Returns:
+        The result of the SPARQL query, or None if the query fails.
+    """
+    return await client.query(
+        build_properties_and_values_query(item_id, client.config.entity_prefix)
+    )
+
+
+async def get_qualifier_properties_and_values(
+    item_id: str, client: AsyncSparqlClient
+) -> Optional[Dict[str, Any]]:
+    """
+    Retrieve qualifier properties and values for a given Wikidata item.
+
+    Args:
+        item_id: The ID of the Wikidata item to retrieve properties for.
+        client: The client used to run the query.
+
+    Returns:
+        The result of the SPARQL query, or None if the query fails.
+    """
+    return await client.query(
+        build_qualifier_properties_and_values_query(
+            item_id, client.config.entity_prefix
+        )
+    )
+
+
+async def get_reference_properties_and_values(
+    item_id: str, client: AsyncSparqlClient
+) -> Optional[Dict[str, Any]]:
+    """
+    Retrieve reference properties and values for a given Wikidata item.
+
+    Args:
+        item_id: The ID of the Wikidata item to retrieve properties for.
+        client: The client used to run the query.
+
+    Returns:
+        The result of the SPARQL query, or None if the query fails.
+    """
+    return await client.query(
+        build_reference_properties_and_values_query(
+            item_id, client.config.entity_prefix
+        )
+    )
+
+
+async def get_statements(
+    item_id: str, client: AsyncSparqlClient
+) -> Optional[Dict[str, List[Tuple[str, str]]]]:
+    """
+    Retrieve direct, qualifier and reference properties and values of an item at once.
+
+    Args:
+        item_id: The ID of the Wikidata item to retrieve properties for.
+        client: The client used to run the query.
+
+    Returns:
+        A dictionary mapping each source ('direct', 'qualifier', 'reference') to its
+        (property, value) pairs, or None if the query fails.
+    """
+    if is_local_endpoint(client.endpoint):
+        return get_local_index(client.endpoint).get_statements(item_id)
+
+    rows = await client.select(
+        build_statements_query(item_id, client.config.entity_prefix),
+        STATEMENT_VARIABLES,
+    )
+    if rows is None:
+        return None
+    return statement_pairs_by_source(rows)
+
+
+async def get_property_labels(
+    property_uris: List[str],
+    client: AsyncSparqlClient,
+    languages: Optional[List[str]] = None,
+) -> List[Tuple[str, str, str]]:
+    """
+    Retrieve labels for a list of property URIs.
+
+    Batches are sized by the shared adaptive batcher and queried concurrently,
+    bounded by the client's concurrency limit; clients with a label window merge
+    them with the lookups of concurrent callers. Properties found in the
+    endpoint's property label table or cached by an earlier lookup (see
+    `EntityLabelCache`) are not queried. Clients using the "wbgetentities"
+    label backend fetch the labels from the Wikibase API instead, and clients of a
+    local endpoint read them from its index.
+
+    Args:
+        property_uris: A list of property URIs.
+        client: The client used to run the queries.
+        languages: Only fetch labels in these languages (default: all languages).
+
+    Returns:
+        A list of tuples containing the property URI, label, and language.
+    """
+    filtered_uris = sorted(
+        {uri for uri in property_uris if uri.startswith(client.config.property_prefix)}
+    )
+    if is_local_endpoint(client.endpoint):
+        return get_local_index(client.endpoint).get_labels(
+            filtered_uris, client.config.property_prefix, languages
+        )
+
+    table_results: List[Tuple[str, str, str]] = []
+    table = get_property_table(client.endpoint)
+    if table is not None:
+        table_results, filtered_uris = table.get_labels(filtered_uris, languages)
+        if not filtered_uris:
+            return table_results
+
+    entity_labels = EntityLabelCache(client.cache_namespace)
+    cached_rows, filtered_uris = await _run_in_thread(
+        entity_labels.lookup, filtered_uris, languages
+    )
+    if client.label_backend == "wbgetentities":
+        rows = await _get_entity_labels(filtered_uris, client, languages)
+    else:
+        rows = await _resolve_labels(
+            filtered_uris,
+            build_property_labels_query,
+            PROPERTY_LABEL_VARIABLES,
+            property_label_batcher,
+            client,
+            languages,
+        )
+    await _run_in_thread(entity_labels.store, rows, languages)
+    return table_results + label_tuples(cached_rows + rows)
+
+
+async def get_value_labels(
+    value_uris: List[str],
+    client: AsyncSparqlClient,
+    languages: Optional[List[str]] = None,
+) -> List[Tuple[str, str, str]]:
+    """
+    Retrieve labels for a list of value URIs.
+
+    Batches are sized by the shared adaptive batcher and queried concurrently,
+    bounded by the client's concurrency limit; clients with a label window merge
+    them with the lookups of concurrent callers. Values cached by an earlier lookup
+    (see `EntityLabelCache`) are not queried. Clients using the "wbgetentities"
+    label backend fetch the labels from the Wikibase API instead, and clients of a
+    local endpoint read them from its index.
+
+    Args:
+        value_uris: A list of value URIs.
+        client: The client used to run the queries.
+        languages: Only fetch labels in these languages (default: all languages).
+
+    Returns:
+        A list of tuples containing the value URI, label, and language.
+    """
+    filtered_uris = sorted(
+        {uri for uri in value_uris if uri.startswith(client.config.item_prefix)}
+    )
+    if is_local_endpoint(client.endpoint):
+        return get_local_index(client.endpoint).get_labels(
+            filtered_uris, client.config.entity_prefix, languages
+        )
+    entity_labels = EntityLabelCache(client.cache_namespace)
+    cached_rows, filtered_uris = await _run_in_thread(
+        entity_labels.lookup, filtered_uris, languages
+    )
+    if client.label_backend == "wbgetentities":
+        rows = await _get_entity_labels(filtered_uris, client, languages)
+    else:
+        rows = await _resolve_labels(
+            filtered_uris,
+            build_value_labels_query,
+            VALUE_LABEL_VARIABLES,
+            value_label_batcher,
+            client,
+            languages,
+        )
+    await _run_in_thread(entity_labels.store, rows, languages)
+    return label_tuples(cached_rows + rows)
+
+
+# Global client instance, recreated when used from a different event loop
+_client: Optional[AsyncSparqlClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_client_options: Dict[str, Any] = {}
+_client_config: Optional[EndpointConfig] = None
+
+# Clients of other endpoints, by configuration, for the same event loop
+_endpoint_clients: "OrderedDict[Tuple[Any, ...], EndpointClient]" = OrderedDict()
+_endpoint_clients_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_client() -> AsyncSparqlClient:
+    """
+    Get or create the global async client for the running event loop.
+
+    Must be called from within a coroutine.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        if _client_config is not None:
+            _client = EndpointClient(_client_config, **_pool_options())
+        else:
+            _client = AsyncSparqlClient(**_client_options)
+        _client_loop = loop
+    return _client
+
+
+def _pool_options() -> Dict[str, Any]:
+    """Options of the global client that apply to the clients of any endpoint."""
+    return {
+        name: value
+        for name, value in _client_options.items()
+        if name in ("max_concurrency", "result_format", "label_window_seconds")
+    }
+
+
+def get_endpoint_client(config: EndpointConfig) -> AsyncSparqlClient:
+    """
+    Get the long-lived client of an endpoint for the running event loop.
+
+    Each endpoint configuration gets its own client, so requests to different
+    endpoints neither share nor wait for each other's connections. The global client
+    is returned for its own configuration. At most MAX_ENDPOINT_CLIENTS other clients
+    are kept; the least recently used one is retired to make room, and closed once
+    the callers holding it with `in_use` are done. Callers should enter `in_use`
+    before their first await.
+
+    Must be called from within a coroutine.
+
+    Args:
+        config: The endpoint configuration.
+
+    Returns:
+        The client of the endpoint.
+    """
+    global _endpoint_clients_loop
+    client = get_client()
+    if config == client.config:
+        return client
+
+    loop = asyncio.get_running_loop()
+    if _endpoint_clients_loop is not loop:
+        _endpoint_clients.clear()
+        _endpoint_clients_loop = loop
+
+    key = dataclasses.astuple(config)
+    endpoint_client = _endpoint_clients.get(key)
+    if endpoint_client is not None:
+        _endpoint_clients.move_to_end(key)
+        return endpoint_client
+
+    endpoint_client = EndpointClient(config, **_pool_options())
+    _endpoint_clients[key] = endpoint_client
+    if len(_endpoint_clients) > MAX_ENDPOINT_CLIENTS:
+        _, evicted = _endpoint_clients.popitem(last=False)
+        loop.create_task(evicted.retire())
+    return endpoint_client
+
+
+def configure_client(
+    endpoint: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    result_format: Optional[str] = None,
+    label_backend: Optional[str] = None,
+    api_url: Optional[str] = None,
+    config: Optional[EndpointConfig] = None,
+    label_window_seconds: Optional[float] = None,
+) -> None:
+    """
+    Configure the global async client.
+
+    The client is created lazily on next use with the new settings, and the
+    clients of other endpoints are recreated as well.
+
+    Args:
+        endpoint: SPARQL endpoint URL
+        max_concurrency: Maximum number of queries in flight at once
+        timeout: Timeout for a single request in seconds
+        result_format: Format requested for SELECT results ("tsv", "csv" or "json")
+        label_backend: How labels are resolved ("sparql" or "wbgetentities")
+        api_url: Wikibase Action API URL used by the "wbgetentities" backend
+        config: Full endpoint configuration (credentials, URI prefixes); when given,
+            the endpoint, timeout, label backend and API URL are taken from it
+        label_window_seconds: Merge the SPARQL label lookups of concurrent callers
+            made within this window into shared queries (0 to disable)
+    """
+    global _client, _client_loop, _client_config, _endpoint_clients_loop
+
+    _client_options.clear()
+    if endpoint is not None:
+        _client_options["endpoint"] = endpoint
+    if max_concurrency is not None:
+        _client_options["max_concurrency"] = max_concurrency
+    if timeout is not None:
+        _client_options["timeout"] = timeout
+    if result_format is not None:
+        _client_options["result_format"] = result_format
+    if label_backend is not None:
+        _client_options["label_backend"] = label_backend
+    if api_url is not None:
+        _client_options["api_url"] = api_url
+    if label_window_seconds is not None:
+        _client_options["label_window_seconds"] = label_window_seconds
+    _client_config = config
+
+    _client = None
+    _client_loop = None
+    _endpoint_clients.clear()
+    _endpoint_clients_loop = None
+
+
+def label_window_stats() -> Dict[str, int]:
+    """Return the label resolver statistics of the global and endpoint clients."""
+    totals = {"lookups": 0, "windows": 0, "uris_requested": 0, "uris_queried": 0}
+    clients = list(_endpoint_clients.values())
+    if _client is not None:
+        clients.append(_client)
+    for client in clients:
+        if client.label_resolver is not None:
+            for name, value in client.label_resolver.stats().items():
+                totals[name] += value
+    return totals
+
+
+async def close_client() -> None:
+    """Close the global async client and endpoint clients, if any were created."""
+    global _client, _client_loop, _endpoint_clients_loop
+    if _client is not None:
+        await _client.aclose()
+    for endpoint_client in _endpoint_clients.values():
+        await endpoint_client.aclose()
+    _client = None
+    _client_loop = None
+    _endpoint_clients.clear()
+    _endpoint_clients_loop = None
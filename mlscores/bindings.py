@@ -0,0 +1,398 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+"""Incremental decoding of SPARQL JSON, TSV and CSV results into compact tuples."""
+
+import codecs
+import csv
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, List, Optional, Sequence, Tuple
+
+Row = Tuple[Optional[str], ...]
+
+# Read responses in chunks of this many bytes
+CHUNK_SIZE = 64 * 1024
+
+# Accept headers for each result format; tabular formats fall back to JSON
+RESULT_FORMATS = ("tsv", "csv", "json")
+ACCEPT_HEADERS = {
+    "tsv": "text/tab-separated-values, application/sparql-results+json;q=0.5",
+    "csv": "text/csv, application/sparql-results+json;q=0.5",
+    "json": "application/sparql-results+json",
+}
+
+_BINDINGS_START = re.compile(r'"bindings"\s*:\s*\[')
+_SEPARATORS = " \t\r\n,"
+_TSV_ESCAPE = re.compile(r"\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)")
+_TSV_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f"}
+
+
+@dataclass
+class DecodeStats:
+    """Size and decoding cost of one query response."""
+
+    format: str
+    num_bytes: int
+    decode_seconds: float
+
+
+class BindingsDecoder:
+    """
+    Push decoder turning a SPARQL JSON results document into tuples.
+
+    Bytes are fed as they arrive from the endpoint. Each object of `results.bindings`
+    is decoded on its own and immediately reduced to a tuple of the values of the
+    requested variables (None for unbound variables), so neither the whole document
+    nor the binding dictionaries are kept in memory.
+    """
+
+    def __init__(self, variables: Sequence[str]):
+        """
+        Initialize the decoder.
+
+        Args:
+            variables: The variables to extract from each binding, in tuple order.
+        """
+        self.variables = tuple(variables)
+        self.done = False
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._in_bindings = False
+
+    def feed(self, data: bytes) -> List[Row]:
+        """
+        Decode the next chunk of the response.
+
+        Args:
+            data: The next bytes of the response body.
+
+        Returns:
+            The rows completed by this chunk.
+
+        Raises:
+            ValueError: If the response is not a valid SPARQL JSON results document.
+        """
+        if self.done:
+            return []
+        self._buffer += self._text.decode(data)
+        return self._decode_rows()
+
+    def close(self) -> List[Row]:
+        """
+        Finish decoding once the whole response has been fed.
+
+        Returns:
+            Any remaining rows.
+
+        Raises:
+            ValueError: If the response ended before the end of `results.bindings`.
+        """
+        rows: List[Row] = []
+        if not self.done:
+            self._buffer += self._text.decode(b"", final=True)
+            rows = self._decode_rows()
+        if not self.done:
+            raise ValueError("Truncated SPARQL JSON results")
+        return rows
+
+    def _decode_rows(self) -> List[Row]:
+        rows: List[Row] = []
+
+        if not self._in_bindings:
+            match = _BINDINGS_START.search(self._buffer)
+            if match is None:
+                return rows
+            self._buffer = self._buffer[match.end() :]
+            self._in_bindings = True
+
+        position = 0
+        buffer = self._buffer
+        while True:
+            while position < len(buffer) and buffer[position] in _SEPARATORS:
+                position += 1
+            if position == len(buffer):
+                break
+            if buffer[position] == "]":
+                self.done = True
+                position += 1
+                break
+            if buffer[position] != "{":
+                raise ValueError(
+                    f"Unexpected data in SPARQL JSON results: {buffer[position:position + 80]!r}"
+                )
+            try:
+                binding, end = self._decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The object continues in the next chunk
+                break
+            rows.append(
+                tuple(
+                    binding[variable]["value"] if variable in binding else None
+                    for variable in self.variables
+                )
+            )
+            position = end
+
+        self._buffer = "" if self.done else buffer[position:]
+        return rows
+
+
+def _unescape_tsv(match: "re.Match[str]") -> str:
+    escape = match.group(1)
+    if len(escape) > 1:
+        return chr(int(escape[1:], 16))
+    return _TSV_ESCAPES.get(escape, escape)
+
+
+def parse_tsv_term(term: str) -> Optional[str]:
+    """
+    Return the value of an RDF term as written in SPARQL TSV results.
+
+    Args:
+        term: An IRI (`<...>`), a literal with optional language tag or datatype
+            (`"..."@en`, `"..."^^<...>`), a bare number, boolean or blank node, or an
+            empty string for an unbound variable.
+
+    Returns:
+        The IRI or lexical form, or None if the variable is unbound.
+    """
+    if not term:
+        return None
+    if term[0] == "<":
+        return term[1:-1]
+    if term[0] == '"':
+        # Language tags and datatypes cannot contain quotes, so the last quote
+        # closes the literal
+        value = term[1 : term.rindex('"')]
+        if "\\" in value:
+            value = _TSV_ESCAPE.sub(_unescape_tsv, value)
+        return value
+    return term
+
+
+class TabularDecoder:
+    """
+    Push decoder turning SPARQL TSV or CSV results into tuples.
+
+    Complete lines are decoded as they arrive. The header line maps the requested
+    variables to columns; variables missing from the header are always None.
+    """
+
+    def __init__(self, variables: Sequence[str], delimiter: str):
+        """
+        Initialize the decoder.
+
+        Args:
+            variables: The variables to extract from each row, in tuple order.
+            delimiter: "\\t" for TSV results, "," for CSV results.
+        """
+        self.variables = tuple(variables)
+        self.delimiter = delimiter
+        self.done = False
+        self._pending = b""
+        self._record = ""
+        self._columns: Optional[List[Optional[int]]] = None
+
+    def feed(self, data: bytes) -> List[Row]:
+        """
+        Decode the next chunk of the response.
+
+        Args:
+            data: The next bytes of the response body.
+
+        Returns:
+            The rows completed by this chunk.
+        """
+        data = self._pending + data
+        end = data.rfind(b"\n") + 1
+        self._pending = data[end:]
+        # Line breaks never split UTF-8 sequences
+        return self._decode_lines(data[:end].decode("utf-8").split("\n")[:-1])
+
+    def close(self) -> List[Row]:
+        """
+        Finish decoding once the whole response has been fed.
+
+        Returns:
+            Any remaining rows.
+
+        Raises:
+            ValueError: If the response has no header or ends inside a quoted field.
+        """
+        lines = [self._pending.decode("utf-8")] if self._pending else []
+        self._pending = b""
+        rows = self._decode_lines(lines)
+        if self._columns is None or self._record:
+            raise ValueError("Truncated SPARQL tabular results")
+        self.done = True
+        return rows
+
+    def _decode_lines(self, lines: List[str]) -> List[Row]:
+        rows: List[Row] = []
+        for line in lines:
+            if line.endswith("\r"):
+                line = line[:-1]
+
+            if self.delimiter == ",":
+                # A CSV record continues on the next line while a quoted field is open
+                self._record = f"{self._record}\n{line}" if self._record else line
+                if self._record.count('"') % 2:
+                    continue
+                line, self._record = self._record, ""
+                if not line:
+                    continue
+                fields = next(csv.reader([line]))
+                values = [field if field else None for field in fields]
+            else:
+                if not line:
+                    continue
+                fields = line.split("\t")
+                values = [parse_tsv_term(field) for field in fields]
+
+            if self._columns is None:
+                names = [(name or "").lstrip("?$") for name in values]
+                self._columns = [
+                    names.index(variable) if variable in names else None
+                    for variable in self.variables
+                ]
+                continue
+
+            rows.append(
+                tuple(
+                    values[column] if column is not None and column < len(values) else None
+                    for column in self._columns
+                )
+            )
+        return rows
+
+
+class ResultsDecoder:
+    """
+    Push decoder for SPARQL results in any of the supported formats.
+
+    The format is recognised from the first bytes of the response (JSON starts with
+    "{", TSV with the "?" of its first variable, CSV with a variable name), so a
+    JSON response to a request for tabular results is still decoded. The number of
+    bytes and the time spent decoding them are recorded in `stats`.
+    """
+
+    def __init__(self, variables: Sequence[str]):
+        """
+        Initialize the decoder.
+
+        Args:
+            variables: The variables to extract from each row, in tuple order.
+        """
+        self.variables = tuple(variables)
+        self.format: Optional[str] = None
+        self.num_bytes = 0
+        self.decode_seconds = 0.0
+        self._decoder = None
+        self._pending = b""
+
+    @property
+    def done(self) -> bool:
+        """Whether the end of the results has been decoded."""
+        return self._decoder is not None and self._decoder.done
+
+    @property
+    def stats(self) -> DecodeStats:
+        """Size and decoding time of the response so far."""
+        return DecodeStats(self.format or "unknown", self.num_bytes, self.decode_seconds)
+
+    def feed(self, data: bytes) -> List[Row]:
+        """
+        Decode the next chunk of the response.
+
+        Args:
+            data: The next bytes of the response body.
+
+        Returns:
+            The rows completed by this chunk.
+
+        Raises:
+            ValueError: If the response is not valid SPARQL results.
+        """
+        start = time.perf_counter()
+        self.num_bytes += len(data)
+        try:
+            if self._decoder is None:
+                self._pending += data
+                data, self._pending = self._pending, b""
+                if not self._detect_format(data):
+                    self._pending = data
+                    return []
+            return self._decoder.feed(data)
+        finally:
+            self.decode_seconds += time.perf_counter() - start
+
+    def close(self) -> List[Row]:
+        """
+        Finish decoding once the whole response has been fed.
+
+        Returns:
+            Any remaining rows.
+
+        Raises:
+            ValueError: If the response is empty, truncated or not valid SPARQL results.
+        """
+        start = time.perf_counter()
+        try:
+            if self._decoder is None:
+                raise ValueError("Empty SPARQL results")
+            return self._decoder.close()
+        finally:
+            self.decode_seconds += time.perf_counter() - start
+
+    def _detect_format(self, data: bytes) -> bool:
+        first = data.lstrip()[:1]
+        if not first:
+            return False
+        if first == b"{":
+            self.format = "json"
+            self._decoder = BindingsDecoder(self.variables)
+        elif first == b"?":
+            self.format = "tsv"
+            self._decoder = TabularDecoder(self.variables, "\t")
+        elif first == b"<":
+            raise ValueError("Unsupported SPARQL results format (XML)")
+        else:
+            self.format = "csv"
+            self._decoder = TabularDecoder(self.variables, ",")
+        return True
+
+
+def read_rows(
+    stream: BinaryIO, variables: Sequence[str], chunk_size: int = CHUNK_SIZE
+) -> Tuple[List[Row], DecodeStats]:
+    """
+    Read SPARQL results from a stream, decoding one tuple per row.
+
+    Args:
+        stream: A binary file-like object with the response body.
+        variables: The variables to extract from each row, in tuple order.
+        chunk_size: Number of bytes read at a time.
+
+    Returns:
+        The rows, as tuples of the variables' values (None for unbound variables),
+        and the size and decoding time of the response.
+
+    Raises:
+        ValueError: If the response is not valid SPARQL results.
+    """
+    decoder = ResultsDecoder(variables)
+    rows: List[Row] = []
+    while not decoder.done:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            rows.extend(decoder.close())
+            break
+        rows.extend(decoder.feed(chunk))
+    return rows, decoder.stats
@@ -9,12 +9,27 @@
 import os
 import json
 import hashlib
+import re
+import sqlite3
+import struct
+import tempfile
+import threading
 import time
+import zlib
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 from dataclasses import dataclass
 
-from .constants import DEFAULT_CACHE_TTL_SECONDS
+from .constants import (
+    CACHE_ACCESS_TIME_RESOLUTION_SECONDS,
+    CACHE_BACKENDS,
+    CACHE_DATABASE_NAME,
+    DEFAULT_CACHE_BACKEND,
+    DEFAULT_CACHE_TTL_SECONDS,
+    DEFAULT_MEMORY_CACHE_BYTES,
+    DEFAULT_MEMORY_CACHE_ENTRIES,
+)
 
 
 @dataclass
@@ -26,14 +41,689 @@ class CacheEntry:
     query_hash: str
 
 
+class MemoryCache:
+    """Bounded in-process LRU cache of decoded entries, shared between threads."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MEMORY_CACHE_ENTRIES,
+        max_bytes: int = DEFAULT_MEMORY_CACHE_BYTES,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept
+            max_bytes: Maximum total serialized size of the entries kept
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Key -> (data, timestamp, serialized size), least recently used first
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, ttl_seconds: float) -> Optional[Any]:
+        """Return the data of a fresh entry, marking it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            data, timestamp, size = entry
+            if time.time() - timestamp > ttl_seconds:
+                del self._entries[key]
+                self.size_bytes -= size
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: str, data: Any, timestamp: float, size: int) -> None:
+        """Store an entry, evicting the least recently used ones beyond the bounds."""
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous[2]
+            self._entries[key] = (data, timestamp, size)
+            self.size_bytes += size
+            while (
+                len(self._entries) > self.max_entries
+                or self.size_bytes > self.max_bytes
+            ):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+                self.evictions += 1
+
+    def discard(self, key: str) -> None:
+        """Remove an entry if present."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.size_bytes -= entry[2]
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+
+# IRIs and string literals of a query, whose whitespace is significant, or a run
+# of whitespace between them
+_QUERY_TOKEN = re.compile(
+    r"""(<[^<>"{}|^`\\\s]*>"""
+    r'|"""(?:[^"\\]|\\.|"(?!""))*"""'
+    r"|'''(?:[^'\\]|\\.|'(?!''))*'''"
+    r'|"(?:[^"\\\n\r]|\\.)*"'
+    r"|'(?:[^'\\\n\r]|\\.)*')"
+    r"|\s+",
+    re.DOTALL,
+)
+
+
+def _canonical_query(query: str) -> str:
+    """Collapse the whitespace of a query outside its IRIs and string literals."""
+    return _QUERY_TOKEN.sub(
+        lambda match: " " if match.group(1) is None else match.group(1), query
+    ).strip()
+
+
+# Compressed entries start with this header, plain entries are JSON text
+COMPRESSED_MAGIC = b"MLZ\x01"
+# Compressed entry files store their timestamp right after the header
+_FILE_TIMESTAMP = struct.Struct("<d")
+
+
+def _compress(text: str) -> bytes:
+    """Compress the JSON text of an entry's data."""
+    return zlib.compress(text.encode("utf-8"))
+
+
+def _decompress(blob: bytes) -> str:
+    """Return the JSON text of compressed data."""
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def _remove_file(path: str) -> None:
+    """Remove a file, ignoring failures."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class FileStore:
+    """
+    Cache storage keeping each entry in its own file.
+
+    Files hold either a JSON object with the data and timestamp of the entry, or
+    COMPRESSED_MAGIC, the timestamp and the zlib-compressed JSON data. Both are
+    read whatever the `compress` setting, which only applies to new entries.
+
+    With a budget, the modification time of a file is its last access and the
+    least recently used files are removed as entries are written. The sizes and
+    order of the files are read once, on the first write, and then kept up to
+    date, so the directory is not scanned again; entries written by other
+    processes afterwards are not counted against the budget of this one.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        compress: bool = False,
+        max_bytes: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        """
+        Initialize the storage.
+
+        Args:
+            cache_dir: Directory of the entry files
+            compress: Whether to write compressed entries
+            max_bytes: Maximum total size of the entry files (default: no limit)
+            max_entries: Maximum number of entry files (default: no limit)
+        """
+        self.cache_dir = cache_dir
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # Key -> file size, least recently used first, loaded on the first write
+        self._index: "Optional[OrderedDict[str, int]]" = None
+        self._size_bytes = 0
+
+    @property
+    def bounded(self) -> bool:
+        """Whether entries are evicted to stay within a budget."""
+        return self.max_bytes is not None or self.max_entries is not None
+
+    def _path(self, key: str) -> Path:
+        """Get the file path for a cache entry."""
+        return self.cache_dir / f"{key}.json"
+
+    def read(self, key: str) -> Optional[Tuple[Any, float, int]]:
+        """
+        Read an entry, expired or not.
+
+        Returns:
+            (data, timestamp, size of its JSON text) or None if there is no entry
+
+        Raises:
+            ValueError: If the entry cannot be read
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        except IOError as e:
+            raise ValueError(f"Unreadable cache entry {path}") from e
+        if self.bounded:
+            self._touch(key, path)
+        try:
+            if content.startswith(COMPRESSED_MAGIC):
+                offset = len(COMPRESSED_MAGIC)
+                (timestamp,) = _FILE_TIMESTAMP.unpack_from(content, offset)
+                text = _decompress(content[offset + _FILE_TIMESTAMP.size :])
+                return json.loads(text), timestamp, len(text)
+            entry = json.loads(content)
+            return entry["data"], entry["timestamp"], len(content)
+        except (ValueError, KeyError, TypeError, struct.error, zlib.error) as e:
+            raise ValueError(f"Invalid cache entry {path}") from e
+
+    def read_many(self, keys: Sequence[str]) -> Dict[str, Tuple[Any, float, int]]:
+        """
+        Read many entries, expired or not.
+
+        Entries that cannot be read are removed and left out.
+
+        Returns:
+            (data, timestamp, size of its JSON text) of the entries found, by key
+        """
+        entries: Dict[str, Tuple[Any, float, int]] = {}
+        for key in keys:
+            try:
+                entry = self.read(key)
+            except ValueError:
+                self.delete(key)
+                continue
+            if entry is not None:
+                entries[key] = entry
+        return entries
+
+    def _timestamp(self, path: Path) -> float:
+        """Read the timestamp of an entry file, without decoding compressed data."""
+        with open(path, "rb") as f:
+            header = f.read(len(COMPRESSED_MAGIC) + _FILE_TIMESTAMP.size)
+            if header.startswith(COMPRESSED_MAGIC):
+                return _FILE_TIMESTAMP.unpack_from(header, len(COMPRESSED_MAGIC))[0]
+            return json.loads(header + f.read())["timestamp"]
+
+    def _touch(self, key: str, path: Path) -> None:
+        """Mark an entry as recently used."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            if self._index is not None and key in self._index:
+                self._index.move_to_end(key)
+
+    def _load_index(self) -> None:
+        """Read the sizes of the entry files, least recently used first."""
+        files = []
+        if self.cache_dir.exists():
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    key = entry.name[: -len(".json")]
+                    files.append((stat.st_mtime, key, stat.st_size))
+        files.sort()
+        self._index = OrderedDict((key, size) for _, key, size in files)
+        self._size_bytes = sum(self._index.values())
+
+    def _over_budget(self) -> bool:
+        return (
+            self.max_entries is not None and len(self._index) > self.max_entries
+        ) or (self.max_bytes is not None and self._size_bytes > self.max_bytes)
+
+    def _evict(self, written: Dict[str, int]) -> int:
+        """Record written entries and remove the least recently used over budget."""
+        with self._lock:
+            if self._index is None:
+                self._load_index()
+            for key, size in written.items():
+                self._size_bytes += size - self._index.pop(key, 0)
+                self._index[key] = size
+            victims = []
+            while self._index and self._over_budget():
+                victim, victim_size = self._index.popitem(last=False)
+                self._size_bytes -= victim_size
+                victims.append(victim)
+        for victim in victims:
+            self._path(victim).unlink(missing_ok=True)
+        return len(victims)
+
+    def write(self, key: str, text: str, timestamp: float) -> int:
+        """
+        Store the JSON text of an entry's data, replacing any previous entry.
+
+        Returns:
+            Number of entries removed to stay within the budget
+        """
+        return self.write_many([(key, text)], timestamp)
+
+    def write_many(self, items: Iterable[Tuple[str, str]], timestamp: float) -> int:
+        """
+        Store the JSON text of many entries, evicting once they are all written.
+
+        Args:
+            items: (key, JSON text of the data) pairs, replacing previous entries
+
+        Returns:
+            Number of entries removed to stay within the budget
+        """
+        written: Dict[str, int] = {}
+        for key, text in items:
+            size = self._write_file(key, text, timestamp)
+            if size is not None:
+                written[key] = size
+        return self._evict(written) if self.bounded and written else 0
+
+    def _write_file(self, key: str, text: str, timestamp: float) -> Optional[int]:
+        """Write the file of an entry and return its size, or None if it failed."""
+        if self.compress:
+            content = (
+                COMPRESSED_MAGIC + _FILE_TIMESTAMP.pack(timestamp) + _compress(text)
+            )
+        else:
+            content = (
+                '{"data": %s, "timestamp": %s, "query_hash": %s}'
+                % (text, json.dumps(timestamp), json.dumps(key))
+            ).encode("utf-8")
+        # Write to a temporary file first so that concurrent readers never see a
+        # partially written entry
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        except IOError:
+            # Cache write failure is non-fatal
+            return None
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, self._path(key))
+        except IOError:
+            # Neither leave the file behind, outside the budget, nor fail
+            _remove_file(tmp_path)
+            return None
+        except BaseException:
+            _remove_file(tmp_path)
+            raise
+        return len(content)
+
+    def delete(self, key: str) -> None:
+        """Remove an entry if present."""
+        self._path(key).unlink(missing_ok=True)
+        with self._lock:
+            if self._index is not None and key in self._index:
+                self._size_bytes -= self._index.pop(key)
+
+    def clear(self) -> int:
+        """Remove all entries and return their number."""
+        with self._lock:
+            self._index = None
+        count = 0
+        if self.cache_dir.exists():
+            for cache_file in self.cache_dir.glob("*.json"):
+                cache_file.unlink()
+                count += 1
+        return count
+
+    def clear_expired(self, cutoff: float) -> int:
+        """Remove entries older than `cutoff` or unreadable and return their number."""
+        count = 0
+
+        if self.cache_dir.exists():
+            for cache_file in self.cache_dir.glob("*.json"):
+                try:
+                    if self._timestamp(cache_file) < cutoff:
+                        cache_file.unlink()
+                        count += 1
+                except (ValueError, KeyError, TypeError, struct.error, IOError):
+                    cache_file.unlink(missing_ok=True)
+                    count += 1
+
+        # Read the remaining files again on the next write
+        with self._lock:
+            self._index = None
+        return count
+
+    def stats(self, cutoff: float) -> Tuple[int, int, int]:
+        """Return the number of entries, of entries from `cutoff` on, and their size."""
+        total = 0
+        valid = 0
+        total_size = 0
+
+        if self.cache_dir.exists():
+            for cache_file in self.cache_dir.glob("*.json"):
+                total += 1
+                total_size += cache_file.stat().st_size
+
+                try:
+                    if self._timestamp(cache_file) >= cutoff:
+                        valid += 1
+                except (ValueError, KeyError, TypeError, struct.error, IOError):
+                    pass
+
+        return total, valid, total_size
+
+
+# Maximum number of host parameters per SQLite statement in older versions
+_SQLITE_MAX_PARAMETERS = 900
+
+# Running totals are kept up to date by triggers, so statistics need not scan entries
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE totals SET entries = entries + 1, bytes = bytes + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE totals SET bytes = bytes - old.size + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE totals SET entries = entries - 1, bytes = bytes - old.size;
+END;
+"""
+
+
+class SQLiteStore:
+    """
+    Cache storage keeping all entries in one SQLite database.
+
+    The database is in WAL mode, so readers are not blocked by writers from other
+    threads or processes. Entries have an indexed timestamp, so removing expired
+    entries is one DELETE and statistics are a couple of aggregate queries. Each
+    thread gets its own connection.
+
+    Data is stored as JSON text, or as COMPRESSED_MAGIC followed by the
+    zlib-compressed JSON text; both are read whatever the `compress` setting.
+
+    With a budget, entries also have an indexed last access time, and the least
+    recently used entries are removed in the transaction writing a new one.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        compress: bool = False,
+        max_bytes: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        """
+        Initialize the storage.
+
+        Args:
+            path: Path of the database, created on first use
+            compress: Whether to write compressed entries
+            max_bytes: Maximum total size of the stored data (default: no limit)
+            max_entries: Maximum number of entries (default: no limit)
+        """
+        self.path = path
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    @property
+    def bounded(self) -> bool:
+        """Whether entries are evicted to stay within a budget."""
+        return self.max_bytes is not None or self.max_entries is not None
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(str(self.path), timeout=30)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.executescript(_SQLITE_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def read(self, key: str) -> Optional[Tuple[Any, float, int]]:
+        """
+        Read an entry, expired or not.
+
+        Returns:
+            (data, timestamp, size of its JSON text) or None if there is no entry
+
+        Raises:
+            ValueError: If the entry cannot be decoded
+        """
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT data, timestamp, accessed FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            # Limit writes on reads by only recording accesses once in a while
+            if self.bounded and now - row[2] > CACHE_ACCESS_TIME_RESOLUTION_SECONDS:
+                with connection:
+                    connection.execute(
+                        "UPDATE entries SET accessed = ? WHERE key = ?", (now, key)
+                    )
+        except sqlite3.Error:
+            return None
+        data, timestamp, _ = row
+        return self._decode(key, data, timestamp)
+
+    def _decode(
+        self, key: str, data: bytes, timestamp: float
+    ) -> Tuple[Any, float, int]:
+        try:
+            if data.startswith(COMPRESSED_MAGIC):
+                text = _decompress(data[len(COMPRESSED_MAGIC) :])
+                return json.loads(text), timestamp, len(text)
+            return json.loads(data), timestamp, len(data)
+        except (ValueError, zlib.error) as e:
+            raise ValueError(f"Invalid cache entry {key}") from e
+
+    def read_many(self, keys: Sequence[str]) -> Dict[str, Tuple[Any, float, int]]:
+        """
+        Read many entries, expired or not, with one query per 900 keys.
+
+        Entries that cannot be decoded are removed and left out.
+
+        Returns:
+            (data, timestamp, size of its JSON text) of the entries found, by key
+        """
+        entries: Dict[str, Tuple[Any, float, int]] = {}
+        invalid: List[Tuple[str]] = []
+        try:
+            connection = self._connection()
+            stale: List[str] = []
+            now = time.time()
+            for i in range(0, len(keys), _SQLITE_MAX_PARAMETERS):
+                batch = keys[i : i + _SQLITE_MAX_PARAMETERS]
+                placeholders = ",".join("?" * len(batch))
+                for key, data, timestamp, accessed in connection.execute(
+                    "SELECT key, data, timestamp, accessed FROM entries "
+                    f"WHERE key IN ({placeholders})",
+                    batch,
+                ):
+                    try:
+                        entries[key] = self._decode(key, data, timestamp)
+                    except ValueError:
+                        invalid.append((key,))
+                        continue
+                    if now - accessed > CACHE_ACCESS_TIME_RESOLUTION_SECONDS:
+                        stale.append(key)
+            if invalid or (self.bounded and stale):
+                with connection:
+                    connection.executemany("DELETE FROM entries WHERE key = ?", invalid)
+                    if self.bounded:
+                        connection.executemany(
+                            "UPDATE entries SET accessed = ? WHERE key = ?",
+                            [(now, key) for key in stale],
+                        )
+        except sqlite3.Error:
+            pass
+        return entries
+
+    def _encode(self, text: str) -> bytes:
+        if self.compress:
+            return COMPRESSED_MAGIC + _compress(text)
+        return text.encode("utf-8")
+
+    def write(self, key: str, text: str, timestamp: float) -> int:
+        """
+        Store the JSON text of an entry's data, replacing any previous entry.
+
+        Returns:
+            Number of entries removed to stay within the budget
+        """
+        return self.write_many([(key, text)], timestamp)
+
+    def write_many(self, items: Iterable[Tuple[str, str]], timestamp: float) -> int:
+        """
+        Store the JSON text of many entries in one transaction.
+
+        Args:
+            items: (key, JSON text of the data) pairs, replacing previous entries
+
+        Returns:
+            Number of entries removed to stay within the budget
+        """
+        rows = []
+        for key, text in items:
+            data = self._encode(text)
+            rows.append((key, timestamp, timestamp, len(data), data))
+        try:
+            connection = self._connection()
+            with connection:
+                connection.executemany(
+                    "INSERT INTO entries (key, timestamp, accessed, size, data) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "timestamp = excluded.timestamp, accessed = excluded.accessed, "
+                    "size = excluded.size, data = excluded.data",
+                    rows,
+                )
+                return self._evict(connection)
+        except sqlite3.Error:
+            # Cache write failure is non-fatal
+            return 0
+
+    def _evict(self, connection: sqlite3.Connection) -> int:
+        """Remove the least recently used entries beyond the budget."""
+        if not self.bounded:
+            return 0
+        entries, size = connection.execute(
+            "SELECT entries, bytes FROM totals"
+        ).fetchone()
+        victims = []
+        rows = connection.execute("SELECT key, size FROM entries ORDER BY accessed")
+        for key, entry_size in rows:
+            if (self.max_entries is None or entries <= self.max_entries) and (
+                self.max_bytes is None or size <= self.max_bytes
+            ):
+                break
+            victims.append((key,))
+            entries -= 1
+            size -= entry_size
+        rows.close()
+        connection.executemany("DELETE FROM entries WHERE key = ?", victims)
+        return len(victims)
+
+    def delete(self, key: str) -> None:
+        """Remove an entry if present."""
+        self._execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> int:
+        """Remove all entries and return their number."""
+        return self._execute("DELETE FROM entries")
+
+    def clear_expired(self, cutoff: float) -> int:
+        """Remove entries older than `cutoff` and return their number."""
+        return self._execute("DELETE FROM entries WHERE timestamp < ?", (cutoff,))
+
+    def stats(self, cutoff: float) -> Tuple[int, int, int]:
+        """Return the number of entries, of entries from `cutoff` on, and their size."""
+        if not self.path.exists():
+            return 0, 0, 0
+        connection = self._connection()
+        total, total_size = connection.execute(
+            "SELECT entries, bytes FROM totals"
+        ).fetchone()
+        (valid,) = connection.execute(
+            "SELECT COUNT(*) FROM entries WHERE timestamp >= ?", (cutoff,)
+        ).fetchone()
+        return total, valid, total_size
+
+    def _execute(self, statement: str, parameters: Tuple[Any, ...] = ()) -> int:
+        """Run a DELETE statement and return the number of entries removed."""
+        if not self.path.exists():
+            return 0
+        connection = self._connection()
+        with connection:
+            return connection.execute(statement, parameters).rowcount
+
+
 class QueryCache:
-    """File-based cache for SPARQL query results."""
+    """
+    Two-tier cache for SPARQL query results: an in-process LRU in front of disk.
+
+    Entries are stored on disk either as one file each or in one SQLite database,
+    as JSON or zlib-compressed JSON. Entries read from disk are promoted to the
+    memory tier, so repeated lookups in a long-running process skip the disk and
+    JSON parsing. Data returned from the memory tier is shared between callers and
+    must not be modified.
+
+    Many small entries can be written at once with `set_many`: they skip the memory
+    tier and, with the SQLite backend, are written in one transaction.
+    """
 
     def __init__(
         self,
         cache_dir: Optional[str] = None,
         ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS,
         enabled: bool = True,
+        memory_max_entries: int = DEFAULT_MEMORY_CACHE_ENTRIES,
+        memory_max_bytes: int = DEFAULT_MEMORY_CACHE_BYTES,
+        backend: str = DEFAULT_CACHE_BACKEND,
+        compress: bool = False,
+        max_bytes: Optional[int] = None,
+        max_entries: Optional[int] = None,
     ):
         """
         Initialize the cache.
@@ -42,27 +732,55 @@ class QueryCache:
             cache_dir: Directory to store cache files. Defaults to ~/.mlscores/cache
             ttl_seconds: Time-to-live for cache entries in seconds
             enabled: Whether caching is enabled
+            memory_max_entries: Maximum number of entries kept in memory (0 disables
+                the memory tier)
+            memory_max_bytes: Maximum total size of the entries kept in memory
+            backend: Storage of the entries on disk, one of CACHE_BACKENDS
+            compress: Whether to compress new entries on disk (existing entries
+                are read in either encoding)
+            max_bytes: Maximum size of the entries on disk, beyond which the least
+                recently used are removed (default: no limit)
+            max_entries: Maximum number of entries on disk (default: no limit)
+
+        Raises:
+            ValueError: If the backend is unknown
         """
+        if backend not in CACHE_BACKENDS:
+            raise ValueError(
+                f"Unknown cache backend {backend!r}, expected one of "
+                + ", ".join(CACHE_BACKENDS)
+            )
         self.enabled = enabled
         self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self.compress = compress
+        self.memory = MemoryCache(memory_max_entries, memory_max_bytes)
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_evictions = 0
 
         if cache_dir is None:
             cache_dir = os.path.join(Path.home(), ".mlscores", "cache")
 
         self.cache_dir = Path(cache_dir)
+        self.store = (
+            SQLiteStore(
+                self.cache_dir / CACHE_DATABASE_NAME, compress, max_bytes, max_entries
+            )
+            if backend == "sqlite"
+            else FileStore(self.cache_dir, compress, max_bytes, max_entries)
+        )
 
         if self.enabled:
             self.cache_dir.mkdir(parents=True, exist_ok=True)
 
     def _hash_query(self, query: str, endpoint: str) -> str:
         """Generate a hash for a query and endpoint combination."""
-        content = f"{endpoint}:{query}"
+        # Formatting differences map to the same key, different literals do not
+        content = f"{endpoint}:{_canonical_query(query)}"
         return hashlib.sha256(content.encode()).hexdigest()[:16]
 
-    def _get_cache_path(self, query_hash: str) -> Path:
-        """Get the file path for a cache entry."""
-        return self.cache_dir / f"{query_hash}.json"
-
     def get(self, query: str, endpoint: str) -> Optional[Any]:
         """
         Retrieve a cached result if available and not expired.
@@ -78,29 +796,34 @@ class QueryCache:
             return None
 
         query_hash = self._hash_query(query, endpoint)
-        cache_path = self._get_cache_path(query_hash)
-
-        if not cache_path.exists():
-            return None
+        data = self.memory.get(query_hash, self.ttl_seconds)
+        if data is not None:
+            return data
 
         try:
-            with open(cache_path, "r", encoding="utf-8") as f:
-                entry = json.load(f)
-
-            # Check TTL
-            age = time.time() - entry["timestamp"]
-            if age > self.ttl_seconds:
-                # Expired, remove and return None
-                cache_path.unlink(missing_ok=True)
-                return None
+            entry = self.store.read(query_hash)
+        except ValueError:
+            # Corrupted cache entry
+            self.store.delete(query_hash)
+            self._count("disk_misses", "disk_evictions")
+            return None
 
-            return entry["data"]
+        if entry is None:
+            self._count("disk_misses")
+            return None
 
-        except (json.JSONDecodeError, KeyError, IOError):
-            # Corrupted cache entry
-            cache_path.unlink(missing_ok=True)
+        data, timestamp, size = entry
+        # Check TTL
+        if time.time() - timestamp > self.ttl_seconds:
+            # Expired, remove and return None
+            self.store.delete(query_hash)
+            self._count("disk_misses", "disk_evictions")
             return None
 
+        self._count("disk_hits")
+        self.memory.put(query_hash, data, timestamp, size)
+        return data
+
     def set(self, query: str, endpoint: str, data: Any) -> None:
         """
         Store a result in the cache.
@@ -114,20 +837,75 @@ class QueryCache:
             return
 
         query_hash = self._hash_query(query, endpoint)
-        cache_path = self._get_cache_path(query_hash)
+        timestamp = time.time()
+        text = json.dumps(data)
+        # The memory tier keeps a decoded copy, as a disk read would return, so
+        # that callers changing `data` afterwards do not change the cached entry
+        self.memory.put(query_hash, json.loads(text), timestamp, len(text))
+        evicted = self.store.write(query_hash, text, timestamp)
+        if evicted:
+            with self._lock:
+                self.disk_evictions += evicted
+
+    def get_many(self, queries: Iterable[str], endpoint: str) -> Dict[str, Any]:
+        """
+        Retrieve entries stored with `set_many`, with one read for all of them.
 
-        entry = {
-            "data": data,
-            "timestamp": time.time(),
-            "query_hash": query_hash,
-        }
+        Args:
+            queries: The keys of the entries
+            endpoint: The endpoint (namespace) of the entries
 
-        try:
-            with open(cache_path, "w", encoding="utf-8") as f:
-                json.dump(entry, f)
-        except IOError:
-            # Cache write failure is non-fatal
-            pass
+        Returns:
+            The data of the cached and unexpired entries, by key
+        """
+        if not self.enabled:
+            return {}
+
+        hashes = {self._hash_query(query, endpoint): query for query in queries}
+        entries = self.store.read_many(list(hashes))
+        cutoff = time.time() - self.ttl_seconds
+        found: Dict[str, Any] = {}
+        for query_hash, (data, timestamp, _) in entries.items():
+            if timestamp < cutoff:
+                self.store.delete(query_hash)
+                self._count("disk_evictions")
+            else:
+                found[hashes[query_hash]] = data
+        with self._lock:
+            self.disk_hits += len(found)
+            self.disk_misses += len(hashes) - len(found)
+        return found
+
+    def set_many(self, entries: Dict[str, Any], endpoint: str) -> None:
+        """
+        Store many small entries at once, in one transaction with the SQLite backend.
+
+        The entries skip the memory tier, so that a large batch does not evict the
+        results of whole queries kept there. Read them back with `get_many`.
+
+        Args:
+            entries: The data to cache, by key
+            endpoint: The endpoint (namespace) of the entries
+        """
+        if not self.enabled or not entries:
+            return
+
+        evicted = self.store.write_many(
+            [
+                (self._hash_query(query, endpoint), json.dumps(data))
+                for query, data in entries.items()
+            ],
+            time.time(),
+        )
+        if evicted:
+            with self._lock:
+                self.disk_evictions += evicted
+
+    def _count(self, *counters: str) -> None:
+        """Increment disk tier counters."""
+        with self._lock:
+            for counter in counters:
+                setattr(self, counter, getattr(self, counter) + 1)
 
     def clear(self) -> int:
         """
@@ -136,12 +914,8 @@ class QueryCache:
         Returns:
             Number of entries cleared
         """
-        count = 0
-        if self.cache_dir.exists():
-            for cache_file in self.cache_dir.glob("*.json"):
-                cache_file.unlink()
-                count += 1
-        return count
+        self.memory.clear()
+        return self.store.clear()
 
     def clear_expired(self) -> int:
         """
@@ -150,24 +924,7 @@ class QueryCache:
         Returns:
             Number of entries removed
         """
-        count = 0
-        current_time = time.time()
-
-        if self.cache_dir.exists():
-            for cache_file in self.cache_dir.glob("*.json"):
-                try:
-                    with open(cache_file, "r", encoding="utf-8") as f:
-                        entry = json.load(f)
-
-                    age = current_time - entry["timestamp"]
-                    if age > self.ttl_seconds:
-                        cache_file.unlink()
-                        count += 1
-                except (json.JSONDecodeError, KeyError, IOError):
-                    cache_file.unlink(missing_ok=True)
-                    count += 1
-
-        return count
+        return self.store.clear_expired(time.time() - self.ttl_seconds)
 
     def stats(self) -> dict:
         """
@@ -176,37 +933,28 @@ class QueryCache:
         Returns:
             Dictionary with cache stats
         """
-        total = 0
-        expired = 0
-        valid = 0
-        total_size = 0
-        current_time = time.time()
-
-        if self.cache_dir.exists():
-            for cache_file in self.cache_dir.glob("*.json"):
-                total += 1
-                total_size += cache_file.stat().st_size
-
-                try:
-                    with open(cache_file, "r", encoding="utf-8") as f:
-                        entry = json.load(f)
-
-                    age = current_time - entry["timestamp"]
-                    if age > self.ttl_seconds:
-                        expired += 1
-                    else:
-                        valid += 1
-                except (json.JSONDecodeError, KeyError, IOError):
-                    expired += 1
+        total, valid, total_size = self.store.stats(time.time() - self.ttl_seconds)
 
         return {
             "total_entries": total,
             "valid_entries": valid,
-            "expired_entries": expired,
+            "expired_entries": total - valid,
             "total_size_bytes": total_size,
             "cache_dir": str(self.cache_dir),
+            "backend": self.backend,
+            "compress": self.compress,
+            "max_bytes": self.store.max_bytes,
+            "max_entries": self.store.max_entries,
             "ttl_seconds": self.ttl_seconds,
             "enabled": self.enabled,
+            "memory_entries": len(self.memory),
+            "memory_size_bytes": self.memory.size_bytes,
+            "memory_hits": self.memory.hits,
+            "memory_misses": self.memory.misses,
+            "memory_evictions": self.memory.evictions,
+            "disk_hits": self.disk_hits,
+            "disk_misses": self.disk_misses,
+            "disk_evictions": self.disk_evictions,
         }
 
 
@@ -226,6 +974,12 @@ def configure_cache(
     cache_dir: Optional[str] = None,
     ttl_seconds: Optional[int] = None,
     enabled: bool = True,
+    memory_max_entries: Optional[int] = None,
+    memory_max_bytes: Optional[int] = None,
+    backend: str = DEFAULT_CACHE_BACKEND,
+    compress: bool = False,
+    max_bytes: Optional[int] = None,
+    max_entries: Optional[int] = None,
 ) -> None:
     """
     Configure the global cache instance.
@@ -234,11 +988,31 @@ def configure_cache(
         cache_dir: Directory to store cache files
         ttl_seconds: Time-to-live for cache entries
         enabled: Whether caching is enabled
+        memory_max_entries: Maximum number of entries kept in memory
+        memory_max_bytes: Maximum total size of the entries kept in memory
+        backend: Storage of the entries on disk, one of CACHE_BACKENDS
+        compress: Whether to compress new entries on disk
+        max_bytes: Maximum size of the entries on disk (default: no limit)
+        max_entries: Maximum number of entries on disk (default: no limit)
     """
     global _cache
 
     _cache = QueryCache(
         cache_dir=cache_dir,
-        ttl_seconds=ttl_seconds or DEFAULT_CACHE_TTL_SECONDS,
+        ttl_seconds=(
+            DEFAULT_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        ),
         enabled=enabled,
+        memory_max_entries=(
+            DEFAULT_MEMORY_CACHE_ENTRIES
+            if memory_max_entries is None
+            else memory_max_entries
+        ),
+        memory_max_bytes=(
+            DEFAULT_MEMORY_CACHE_BYTES if memory_max_bytes is None else memory_max_bytes
+        ),
+        backend=backend,
+        compress=compress,
+        max_bytes=max_bytes,
+        max_entries=max_entries,
     )
@@ -6,15 +6,46 @@
 
 """Constants for mlscores configuration."""
 
-from typing import Final
+from typing import Final, Tuple
 
 # SPARQL configuration
 DEFAULT_SPARQL_ENDPOINT: Final[str] = "https://query.wikidata.org/sparql"
+# Endpoint URLs with this prefix name a local index (see mlscores.index)
+LOCAL_ENDPOINT_PREFIX: Final[str] = "local:"
 BATCH_SIZE: Final[int] = 100
+LABEL_BATCH_MIN_SIZE: Final[int] = 25
+LABEL_BATCH_MAX_SIZE: Final[int] = 400
+LABEL_BATCH_TARGET_SECONDS: Final[Tuple[float, float]] = (1.0, 5.0)
+LABEL_BATCH_MAX_ROWS: Final[int] = 20000
+LABEL_BATCH_MAX_BYTES: Final[int] = 8 * 1024 * 1024
+DEFAULT_RESULT_FORMAT: Final[str] = "tsv"
 MAX_RETRIES: Final[int] = 5
 INITIAL_SLEEP_SECONDS: Final[int] = 1
 BACKOFF_MULTIPLIER: Final[int] = 2
 PROGRESS_BAR_TOTAL: Final[int] = 100
+DEFAULT_MAX_CONCURRENT_QUERIES: Final[int] = 10
+# Label lookups of concurrent web requests are merged over this window
+DEFAULT_LABEL_WINDOW_MS: Final[float] = 15
+# Endpoint clients kept by the web server; the least recently used one is closed
+MAX_ENDPOINT_CLIENTS: Final[int] = 16
+DEFAULT_QUERY_TIMEOUT_SECONDS: Final[int] = 60
+DEFAULT_REQUESTS_PER_SECOND: Final[float] = 5.0
+# Queries whose URL-encoded form is longer than this are sent as POST instead of GET
+DEFAULT_MAX_GET_QUERY_LENGTH: Final[int] = 4096
+
+# Label resolution: "sparql" queries the endpoint, "wbgetentities" the Wikibase API
+LABEL_BACKENDS: Final[Tuple[str, ...]] = ("sparql", "wbgetentities")
+DEFAULT_LABEL_BACKEND: Final[str] = "sparql"
+DEFAULT_WIKIBASE_API_URL: Final[str] = "https://www.wikidata.org/w/api.php"
+# wbgetentities accepts at most 50 entity IDs per request (500 for bots)
+WBGETENTITIES_MAX_IDS: Final[int] = 50
+DEFAULT_LABEL_API_WORKERS: Final[int] = 4
+
+# Batch processing configuration
+DEFAULT_MAX_WORKERS: Final[int] = 1
+DEFAULT_ITEMS_PER_BATCH: Final[int] = 50
+# Number of dump lines parsed per task when scoring a dump offline
+DEFAULT_DUMP_CHUNK_LINES: Final[int] = 500
 
 # URI patterns for Wikidata
 WIKIDATA_PROPERTY_PREFIX: Final[str] = "http://www.wikidata.org/prop/direct/"
@@ -27,3 +58,19 @@ DEFAULT_UNKNOWN_LANGUAGE: Final[str] = "Unknown language"
 
 # Cache configuration
 DEFAULT_CACHE_TTL_SECONDS: Final[int] = 3600  # 1 hour
+# Bounds of the in-process tier in front of the on-disk query cache
+DEFAULT_MEMORY_CACHE_ENTRIES: Final[int] = 1024
+DEFAULT_MEMORY_CACHE_BYTES: Final[int] = 64 * 1024 * 1024
+# Storage of the on-disk query cache: one JSON file per entry or one SQLite database
+CACHE_BACKENDS: Final[Tuple[str, ...]] = ("files", "sqlite")
+DEFAULT_CACHE_BACKEND: Final[str] = "files"
+CACHE_DATABASE_NAME: Final[str] = "cache.sqlite"
+# Last access times of cache entries on disk are only updated after this long
+CACHE_ACCESS_TIME_RESOLUTION_SECONDS: Final[int] = 60
+
+# Property label tables (see mlscores.properties)
+DEFAULT_PROPERTY_TABLE_TTL_SECONDS: Final[int] = 7 * 24 * 3600  # 1 week
+# Rows of (property, language) fetched per query when warming a table
+DEFAULT_PROPERTY_TABLE_PAGE_SIZE: Final[int] = 100000
+# Missing or expired tables are looked for again on disk after this delay
+PROPERTY_TABLE_RECHECK_SECONDS: Final[int] = 60
@@ -0,0 +1,500 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+"""Offline scoring of the entities of a Wikidata JSON dump."""
+
+import argparse
+import bz2
+import gzip
+import json
+import os
+import sqlite3
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from .constants import (
+    DEFAULT_DUMP_CHUNK_LINES,
+    DEFAULT_NO_LABEL,
+    DEFAULT_UNKNOWN_LANGUAGE,
+    WIKIDATA_ENTITY_PREFIX,
+    WIKIDATA_PROPERTY_PREFIX,
+)
+from .formatters import MultilingualityResult
+from .query import STATEMENT_SOURCES
+from .scores import PropertyTuple
+from .scoring import build_result, output_results
+
+# What scoring needs from one entity of the dump: its ID, the languages of its
+# labels, the IDs of its properties and the IDs of the items among its values
+EntityRecord = Tuple[str, Tuple[str, ...], List[str], List[str]]
+
+# (property ID, item ID or None) pairs of an entity's statements grouped by source
+StatementIds = Dict[str, List[Tuple[str, Optional[str]]]]
+
+T = TypeVar("T")
+
+# Maximum number of host parameters per SQLite statement in older versions
+_MAX_QUERY_IDS = 900
+
+
+def open_dump(path: str) -> IO[str]:
+    """
+    Open a Wikidata JSON dump for reading, decompressing it on the fly.
+
+    Args:
+        path: Path of the dump; ".gz" and ".bz2" files are decompressed.
+
+    Returns:
+        A text stream over the dump.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def parse_dump_line(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode one line of a Wikidata JSON dump.
+
+    The dump is a JSON array with one entity per line, so each line is an entity
+    followed by a comma, or one of the brackets opening and closing the array.
+
+    Args:
+        line: A line of the dump.
+
+    Returns:
+        The entity, or None for the brackets and empty lines.
+    """
+    line = line.strip().rstrip(",")
+    if not line or line in ("[", "]"):
+        return None
+    return json.loads(line)
+
+
+def _snak_item_id(snak: Dict[str, Any]) -> Optional[str]:
+    """Return the ID of the item a snak has as value, if any."""
+    if snak.get("snaktype") != "value":
+        return None
+    datavalue = snak.get("datavalue", {})
+    if datavalue.get("type") != "wikibase-entityid":
+        return None
+    value = datavalue["value"]
+    entity_id = value.get("id")
+    if entity_id is None and value.get("entity-type") == "item":
+        entity_id = f"Q{value['numeric-id']}"
+    if entity_id is None or not entity_id.startswith("Q"):
+        return None
+    return entity_id
+
+
+def _truthy_statements(statements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return the statements of a property with the best rank (wdt: triples)."""
+    preferred = [s for s in statements if s.get("rank") == "preferred"]
+    if preferred:
+        return preferred
+    return [s for s in statements if s.get("rank", "normal") == "normal"]
+
+
+def extract_statements(entity: Dict[str, Any]) -> StatementIds:
+    """
+    Extract the (property, value) pairs the combined statements query reports.
+
+    Direct pairs are those of truthy statements (`wdt:` triples: statements of the
+    best rank, except "novalue" ones); qualifier and reference pairs come from the
+    qualifiers and references of every statement.
+
+    Args:
+        entity: An entity of the dump.
+
+    Returns:
+        The distinct (property ID, item ID) pairs of each source, in the order of
+        `STATEMENT_SOURCES`; the item ID is None when the value is not an item.
+    """
+    pairs: Dict[str, Dict[Tuple[str, Optional[str]], None]] = {
+        source: {} for source in STATEMENT_SOURCES
+    }
+    for property_id, statements in entity.get("claims", {}).items():
+        for statement in _truthy_statements(statements):
+            mainsnak = statement.get("mainsnak", {})
+            if mainsnak.get("snaktype") != "novalue":
+                pairs["direct"][(property_id, _snak_item_id(mainsnak))] = None
+
+        for statement in statements:
+            for snaks in statement.get("qualifiers", {}).values():
+                for snak in snaks:
+                    pairs["qualifier"][(snak["property"], _snak_item_id(snak))] = None
+            for reference in statement.get("references", []):
+                for snaks in reference.get("snaks", {}).values():
+                    for snak in snaks:
+                        pairs["reference"][(snak["property"], _snak_item_id(snak))] = None
+
+    return {source: list(source_pairs) for source, source_pairs in pairs.items()}
+
+
+def label_languages(
+    entity: Dict[str, Any], languages: Optional[Sequence[str]] = None
+) -> Tuple[str, ...]:
+    """Return the sorted languages of an entity's labels, optionally filtered."""
+    return tuple(
+        sorted(
+            lang
+            for lang in entity.get("labels", {})
+            if not languages or lang in languages
+        )
+    )
+
+
+def extract_entity(
+    entity: Dict[str, Any], languages: Optional[Sequence[str]] = None
+) -> EntityRecord:
+    """
+    Extract what scoring needs from an entity of the dump.
+
+    The properties are those of the entity's direct statements (the label functions
+    only keep `wdt:` properties) and the values are the items among the values of
+    all its statements, qualifiers and references (see `extract_statements`).
+
+    Args:
+        entity: An entity of the dump.
+        languages: Only keep labels in these languages (default: all languages).
+
+    Returns:
+        The entity ID, the languages of its labels, the IDs of its properties and
+        the IDs of the items among its values.
+    """
+    statements = extract_statements(entity)
+    property_ids = {property_id for property_id, _ in statements["direct"]}
+    value_ids = {
+        item_id
+        for source_pairs in statements.values()
+        for _, item_id in source_pairs
+        if item_id is not None
+    }
+    return (
+        entity["id"],
+        label_languages(entity, languages),
+        sorted(property_ids),
+        sorted(value_ids),
+    )
+
+
+def extract_entities(
+    lines: List[str],
+    languages: Optional[Sequence[str]] = None,
+    extract: Callable[[Dict[str, Any], Optional[Sequence[str]]], T] = extract_entity,
+) -> List[T]:
+    """
+    Extract the entities of a chunk of dump lines (run in worker processes).
+
+    Args:
+        lines: Consecutive lines of the dump.
+        languages: Only keep labels in these languages (default: all languages).
+        extract: Module-level function turning an entity into a record.
+
+    Returns:
+        One record per entity, in the order of the lines.
+    """
+    records = []
+    for line in lines:
+        entity = parse_dump_line(line)
+        if entity is not None:
+            records.append(extract(entity, languages))
+    return records
+
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_entity_records(
+    path: str,
+    languages: Optional[Sequence[str]] = None,
+    processes: Optional[int] = None,
+    chunk_lines: int = DEFAULT_DUMP_CHUNK_LINES,
+    extract: Callable[[Dict[str, Any], Optional[Sequence[str]]], T] = extract_entity,
+) -> Iterator[T]:
+    """
+    Stream the entity records of a dump, parsing the entities across processes.
+
+    Lines are read in chunks of `chunk_lines` and each chunk is parsed by a worker
+    process. Only a few chunks per worker are in flight at once, so memory stays
+    bounded however large the dump is; records are yielded in dump order.
+
+    Args:
+        path: Path of the dump (optionally gzip- or bzip2-compressed).
+        languages: Only keep labels in these languages (default: all languages).
+        processes: Number of worker processes (default: one per CPU); with 1, the
+            dump is parsed in the calling process.
+        chunk_lines: Number of lines parsed per task.
+        extract: Module-level function turning an entity into a record (by default
+            `extract_entity`); it must be picklable to run in worker processes.
+
+    Yields:
+        One record per entity of the dump.
+    """
+    processes = processes or os.cpu_count() or 1
+    languages = list(languages) if languages else None
+
+    with open_dump(path) as dump:
+        chunks = _chunks(dump, max(chunk_lines, 1))
+
+        if processes <= 1:
+            for chunk in chunks:
+                yield from extract_entities(chunk, languages, extract)
+            return
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            pending: Deque["Future[List[T]]"] = deque()
+            for chunk in chunks:
+                pending.append(
+                    executor.submit(extract_entities, chunk, languages, extract)
+                )
+                # Wait for the oldest chunk before reading too far ahead
+                if len(pending) >= 2 * processes:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+
+def _entity_labels(
+    uri: str, label_languages: Optional[Tuple[str, ...]]
+) -> List[PropertyTuple]:
+    """
+    Build the label tuples the label functions would return for one URI.
+
+    Label texts are not kept, as scores only depend on the URI and language.
+    """
+    if not label_languages:
+        return [(uri, DEFAULT_NO_LABEL, DEFAULT_UNKNOWN_LANGUAGE)]
+    return [(uri, "", lang) for lang in label_languages]
+
+
+class _LabelTable:
+    """
+    The label languages of every entity of a dump, in a temporary SQLite database.
+
+    A full dump has too many entities to keep their label languages in memory, so
+    rows are written in batches while the dump is read and looked up per scored
+    entity.
+    """
+
+    def __init__(self, path: str, batch_size: int):
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode = OFF")
+        self._connection.execute("PRAGMA synchronous = OFF")
+        self._connection.execute(
+            "CREATE TABLE labels (id TEXT PRIMARY KEY, languages TEXT NOT NULL) "
+            "WITHOUT ROWID"
+        )
+        self._batch: List[Tuple[str, str]] = []
+        self._batch_size = max(batch_size, 1)
+
+    def add(self, entity_id: str, languages: Tuple[str, ...]) -> None:
+        """Record the label languages of an entity."""
+        self._batch.append((entity_id, ",".join(languages)))
+        if len(self._batch) >= self._batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the pending rows."""
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO labels (id, languages) VALUES (?, ?)",
+                self._batch,
+            )
+        self._batch.clear()
+
+    def get(self, entity_ids: Sequence[str]) -> Dict[str, Tuple[str, ...]]:
+        """Return the label languages of the entities found in the dump."""
+        languages: Dict[str, Tuple[str, ...]] = {}
+        for i in range(0, len(entity_ids), _MAX_QUERY_IDS):
+            batch = entity_ids[i : i + _MAX_QUERY_IDS]
+            placeholders = ",".join("?" * len(batch))
+            for entity_id, codes in self._connection.execute(
+                f"SELECT id, languages FROM labels WHERE id IN ({placeholders})",
+                batch,
+            ):
+                languages[entity_id] = tuple(codes.split(",")) if codes else ()
+        return languages
+
+    def close(self) -> None:
+        """Close the database."""
+        self._connection.close()
+
+
+def score_dump(
+    path: str,
+    language_codes: Optional[List[str]] = None,
+    missing: bool = False,
+    identifiers: Optional[Sequence[str]] = None,
+    processes: Optional[int] = None,
+    chunk_lines: int = DEFAULT_DUMP_CHUNK_LINES,
+) -> Iterator[MultilingualityResult]:
+    """
+    Calculate multilinguality scores of the entities of a Wikidata JSON dump.
+
+    The dump is read once. While it is parsed, the label languages of every entity
+    are written to a temporary label table on disk, and the property and value IDs
+    of the entities to score are spilled to a temporary file. The entities are then
+    scored from the spill file and the label table, with the same results as
+    `calculate_multilinguality_scores` gives against an endpoint holding the dump.
+    No network access is needed and memory stays bounded however large the dump
+    is. Properties and values missing from the dump count as unlabelled.
+
+    Args:
+        path: Path of the dump (optionally gzip- or bzip2-compressed).
+        language_codes: A list of language codes to filter results. Defaults to None
+            (all languages).
+        missing: Whether to include missing translations in results.
+        identifiers: Only score these entities (default: every entity of the dump).
+        processes: Number of processes parsing the dump (default: one per CPU).
+        chunk_lines: Number of dump lines parsed per task.
+
+    Yields:
+        A MultilingualityResult per scored entity, in dump order, as soon as it is
+        scored.
+    """
+    wanted = set(identifiers) if identifiers else None
+
+    with tempfile.TemporaryDirectory() as directory, tempfile.TemporaryFile(
+        "w+", encoding="utf-8", dir=directory
+    ) as spill:
+        label_table = _LabelTable(os.path.join(directory, "labels.sqlite"), chunk_lines)
+        try:
+            records = read_entity_records(path, language_codes, processes, chunk_lines)
+            for entity_id, label_languages, property_ids, value_ids in records:
+                label_table.add(entity_id, label_languages)
+                if wanted is None or entity_id in wanted:
+                    record = [entity_id, property_ids, value_ids]
+                    spill.write(json.dumps(record) + "\n")
+            label_table.flush()
+
+            spill.seek(0)
+            for line in spill:
+                entity_id, property_ids, value_ids = json.loads(line)
+                labels = label_table.get(property_ids + value_ids)
+                property_labels = [
+                    label
+                    for property_id in property_ids
+                    for label in _entity_labels(
+                        f"{WIKIDATA_PROPERTY_PREFIX}{property_id}",
+                        labels.get(property_id),
+                    )
+                ]
+                value_labels = [
+                    label
+                    for value_id in value_ids
+                    for label in _entity_labels(
+                        f"{WIKIDATA_ENTITY_PREFIX}{value_id}", labels.get(value_id)
+                    )
+                ]
+                yield build_result(
+                    entity_id, property_labels, value_labels, language_codes, missing
+                )
+        finally:
+            label_table.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point of `python -m mlscores dump`."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mlscores dump",
+        description="Calculate multilinguality scores offline from a Wikidata JSON dump.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python -m mlscores dump latest-all.json.gz -l en fr -f csv -o scores.csv
+  python -m mlscores dump latest-all.json.bz2 --ids Q42 Q5 -j 8
+        """,
+    )
+    parser.add_argument(
+        "path",
+        type=str,
+        help="Path of the dump (.json, .json.gz or .json.bz2)",
+    )
+    parser.add_argument(
+        "--ids",
+        type=str,
+        nargs="+",
+        help="Only score these entities (default: every entity of the dump)",
+    )
+    parser.add_argument(
+        "-l",
+        "--language",
+        type=str,
+        nargs="+",
+        help="One or more language codes to filter results (e.g., en fr es)",
+    )
+    parser.add_argument(
+        "-m",
+        "--missing",
+        action="store_true",
+        help="Show properties missing translation",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        type=str,
+        choices=["table", "json", "csv"],
+        default="table",
+        help="Output format (default: table)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Output file path (default: stdout)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of processes parsing the dump (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--chunk-lines",
+        type=int,
+        default=DEFAULT_DUMP_CHUNK_LINES,
+        help="Number of dump lines parsed per task "
+        f"(default: {DEFAULT_DUMP_CHUNK_LINES})",
+    )
+
+    args = parser.parse_args(argv)
+
+    # Results are written out as they are scored rather than collected first
+    results = score_dump(
+        args.path,
+        args.language,
+        args.missing,
+        identifiers=args.ids,
+        processes=args.jobs,
+        chunk_lines=args.chunk_lines,
+    )
+    output_results(results, args.format, args.output, args.missing)
@@ -11,7 +11,12 @@ from dataclasses import dataclass
 from typing import Optional
 
 from .constants import (
+    DEFAULT_LABEL_BACKEND,
+    DEFAULT_MAX_GET_QUERY_LENGTH,
+    DEFAULT_QUERY_TIMEOUT_SECONDS,
     DEFAULT_SPARQL_ENDPOINT,
+    DEFAULT_WIKIBASE_API_URL,
+    LOCAL_ENDPOINT_PREFIX,
     WIKIDATA_PROPERTY_PREFIX,
     WIKIDATA_ENTITY_PREFIX,
     WIKIDATA_ITEM_PREFIX,
@@ -20,7 +25,12 @@ from .constants import (
 
 @dataclass
 class EndpointConfig:
-    """Configuration for a SPARQL endpoint."""
+    """
+    Configuration for a SPARQL endpoint.
+
+    A URL of the form "local:/path/to/index" names a local index built with
+    `python -m mlscores index` instead, which is queried without any network access.
+    """
 
     url: str = DEFAULT_SPARQL_ENDPOINT
     property_prefix: str = WIKIDATA_PROPERTY_PREFIX
@@ -28,6 +38,13 @@ class EndpointConfig:
     item_prefix: str = WIKIDATA_ITEM_PREFIX
     username: Optional[str] = None
     password: Optional[str] = None
+    # Transport settings
+    timeout: float = DEFAULT_QUERY_TIMEOUT_SECONDS
+    gzip: bool = True
+    max_get_query_length: int = DEFAULT_MAX_GET_QUERY_LENGTH
+    # Label resolution: "sparql" or "wbgetentities" (through the Wikibase API)
+    label_backend: str = DEFAULT_LABEL_BACKEND
+    api_url: Optional[str] = DEFAULT_WIKIBASE_API_URL
 
     @property
     def auth_header(self) -> Optional[str]:
@@ -42,6 +59,15 @@ class EndpointConfig:
         """Check if this is the default Wikidata endpoint."""
         return self.url == DEFAULT_SPARQL_ENDPOINT
 
+    def is_local(self) -> bool:
+        """Check if this endpoint is a local index."""
+        return is_local_endpoint(self.url)
+
+
+def is_local_endpoint(url: str) -> bool:
+    """Check if an endpoint URL names a local index ("local:/path/to/index")."""
+    return url.startswith(LOCAL_ENDPOINT_PREFIX)
+
 
 # Predefined configurations for known Wikibase instances
 KNOWN_ENDPOINTS = {
@@ -51,6 +77,9 @@ KNOWN_ENDPOINTS = {
         property_prefix="http://www.wikidata.org/prop/direct/",
         entity_prefix="http://commons.wikimedia.org/entity/",
         item_prefix="http://commons.wikimedia.org/entity/M",
+        # Properties are Wikidata's and values mostly Wikidata items, which the
+        # Commons API does not serve, so labels are resolved through SPARQL
+        api_url=None,
     ),
 }
 
@@ -61,16 +90,20 @@ def create_endpoint_config(
     entity_prefix: Optional[str] = None,
     username: Optional[str] = None,
     password: Optional[str] = None,
+    api_url: Optional[str] = None,
+    label_backend: Optional[str] = None,
 ) -> EndpointConfig:
     """
     Create an endpoint configuration.
 
     Args:
-        url: SPARQL endpoint URL
+        url: SPARQL endpoint URL, or "local:/path/to/index" for a local index
         property_prefix: URI prefix for properties
         entity_prefix: URI prefix for entities
         username: Username for basic auth
         password: Password for basic auth
+        api_url: Wikibase Action API URL (api.php) of the instance
+        label_backend: How labels are resolved ("sparql" or "wbgetentities")
 
     Returns:
         EndpointConfig instance
@@ -79,6 +112,14 @@ def create_endpoint_config(
 
     if url is not None:
         config.url = url
+        # The Wikidata API only serves the default endpoint's entities
+        config.api_url = None
+
+    if api_url is not None:
+        config.api_url = api_url
+
+    if label_backend is not None:
+        config.label_backend = label_backend
 
     if property_prefix is not None:
         config.property_prefix = property_prefix
@@ -8,8 +8,10 @@
 
 import json
 import csv
+import tempfile
+import textwrap
 from io import StringIO
-from typing import Dict, Any, List, Optional, Set
+from typing import IO, Dict, Any, Iterable, List, Optional, Set
 from dataclasses import dataclass, asdict, field
 
 
@@ -32,14 +34,29 @@ class OutputFormatter:
         """Format results to string output."""
         raise NotImplementedError
 
+    def write(self, results: Iterable[MultilingualityResult], stream: IO[str]) -> None:
+        """Write results to a stream, formatting them as they are produced."""
+        stream.write(self.format(list(results)))
+
 
 class JSONFormatter(OutputFormatter):
     """Format results as JSON."""
 
     def format(self, results: List[MultilingualityResult]) -> str:
         """Format results as pretty-printed JSON."""
-        data = [asdict(r) for r in results]
-        return json.dumps(data, indent=2, ensure_ascii=False)
+        output = StringIO()
+        self.write(results, output)
+        return output.getvalue()
+
+    def write(self, results: Iterable[MultilingualityResult], stream: IO[str]) -> None:
+        """Write results as a pretty-printed JSON array, one result at a time."""
+        empty = True
+        for result in results:
+            text = json.dumps(asdict(result), indent=2, ensure_ascii=False)
+            stream.write("[\n" if empty else ",\n")
+            stream.write(textwrap.indent(text, "  "))
+            empty = False
+        stream.write("[]" if empty else "\n]")
 
 
 class CSVFormatter(OutputFormatter):
@@ -48,43 +65,57 @@ class CSVFormatter(OutputFormatter):
     def format(self, results: List[MultilingualityResult]) -> str:
         """Format results as CSV with one row per item/category combination."""
         output = StringIO()
+        self.write(results, output)
+        return output.getvalue()
 
-        if not results:
-            return ""
-
-        # Collect all languages across all results
-        all_languages: Set[str] = set()
-        for result in results:
-            all_languages.update(result.combined_percentages.keys())
-
-        all_languages_sorted = sorted(all_languages)
-
-        writer = csv.writer(output)
-
-        # Header
-        header = ["item_id", "category"] + all_languages_sorted
-        writer.writerow(header)
-
-        for result in results:
-            # Property labels row
-            row = [result.item_id, "property_labels"]
-            for lang in all_languages_sorted:
-                row.append(f"{result.property_label_percentages.get(lang, 0):.2f}")
-            writer.writerow(row)
-
-            # Value labels row
-            row = [result.item_id, "value_labels"]
-            for lang in all_languages_sorted:
-                row.append(f"{result.value_label_percentages.get(lang, 0):.2f}")
-            writer.writerow(row)
-
-            # Combined row
-            row = [result.item_id, "combined"]
-            for lang in all_languages_sorted:
-                row.append(f"{result.combined_percentages.get(lang, 0):.2f}")
-            writer.writerow(row)
+    def write(self, results: Iterable[MultilingualityResult], stream: IO[str]) -> None:
+        """
+        Write results as CSV with one row per item/category combination.
 
-        return output.getvalue()
+        The columns are the languages of all results, so results are spilled to a
+        temporary file until the last one is known instead of being kept in memory.
+        """
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as spill:
+            # Collect all languages across all results
+            all_languages: Set[str] = set()
+            count = 0
+            for result in results:
+                all_languages.update(result.combined_percentages.keys())
+                spill.write(json.dumps(asdict(result)) + "\n")
+                count += 1
+
+            if not count:
+                return
+
+            all_languages_sorted = sorted(all_languages)
+
+            writer = csv.writer(stream)
+
+            # Header
+            header = ["item_id", "category"] + all_languages_sorted
+            writer.writerow(header)
+
+            spill.seek(0)
+            for line in spill:
+                result = MultilingualityResult(**json.loads(line))
+
+                # Property labels row
+                row = [result.item_id, "property_labels"]
+                for lang in all_languages_sorted:
+                    row.append(f"{result.property_label_percentages.get(lang, 0):.2f}")
+                writer.writerow(row)
+
+                # Value labels row
+                row = [result.item_id, "value_labels"]
+                for lang in all_languages_sorted:
+                    row.append(f"{result.value_label_percentages.get(lang, 0):.2f}")
+                writer.writerow(row)
+
+                # Combined row
+                row = [result.item_id, "combined"]
+                for lang in all_languages_sorted:
+                    row.append(f"{result.combined_percentages.get(lang, 0):.2f}")
+                writer.writerow(row)
 
 
 class TableFormatter(OutputFormatter):
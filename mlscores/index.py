@@ -0,0 +1,447 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+"""Persistent SQLite index of entity statements and label languages."""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .constants import (
+    DEFAULT_DUMP_CHUNK_LINES,
+    DEFAULT_NO_LABEL,
+    DEFAULT_UNKNOWN_LANGUAGE,
+    LOCAL_ENDPOINT_PREFIX,
+    WIKIDATA_ENTITY_PREFIX,
+    WIKIDATA_PROPERTY_PREFIX,
+)
+from .dump import (
+    StatementIds,
+    extract_statements,
+    label_languages,
+    open_dump,
+    read_entity_records,
+)
+from .query import STATEMENT_SOURCES
+
+# An entity to store: its ID, the languages of its labels and its statements
+IndexRecord = Tuple[str, Tuple[str, ...], StatementIds]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS languages (
+    bit INTEGER PRIMARY KEY,
+    code TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS entities (
+    id TEXT PRIMARY KEY,
+    labels BLOB NOT NULL,
+    statements TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Repeated entities (e.g. split across an N-Triples file) are merged
+_UPSERT = """
+INSERT INTO entities (id, labels, statements) VALUES (?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    labels = merge_labels(labels, excluded.labels),
+    statements = merge_statements(statements, excluded.statements)
+"""
+
+_RDFS_LABEL = "http://www.w3.org/2000/01/rdf-schema#label"
+# Subject IRI, predicate IRI and object (IRI, literal or blank node) of a triple
+_NTRIPLE = re.compile(
+    r'<([^>]*)>\s+<([^>]*)>\s+(<[^>]*>|".*"(?:@[\w-]+|\^\^<[^>]*>)?|_:\S+)\s*\.'
+)
+
+# IDs of items, properties and lexemes, as opposed to the statement, reference
+# and value nodes also found under the entity prefix
+_ENTITY_ID = re.compile(r"[QPL]\d+")
+_ITEM_ID = re.compile(r"Q\d+")
+
+# Prefix of the property URIs of each statement source, as the statements query
+# reports them
+_PROPERTY_PREFIXES = {
+    "direct": WIKIDATA_PROPERTY_PREFIX,
+    "qualifier": WIKIDATA_ENTITY_PREFIX,
+    "reference": WIKIDATA_ENTITY_PREFIX,
+}
+
+# Maximum number of host parameters per SQLite statement in older versions
+_MAX_QUERY_IDS = 900
+
+
+def _index_record(
+    entity: Dict[str, Any], languages: Optional[Sequence[str]] = None
+) -> IndexRecord:
+    """Extract the record stored for an entity of a JSON dump (run in workers)."""
+    return entity["id"], label_languages(entity, languages), extract_statements(entity)
+
+
+def _encode_statements(statements: StatementIds) -> str:
+    return json.dumps(
+        [statements.get(source, []) for source in STATEMENT_SOURCES],
+        separators=(",", ":"),
+    )
+
+
+def _decode_statements(text: str) -> StatementIds:
+    return {
+        source: [tuple(pair) for pair in pairs]
+        for source, pairs in zip(STATEMENT_SOURCES, json.loads(text))
+    }
+
+
+def _merge_labels(first: bytes, second: bytes) -> bytes:
+    merged = int.from_bytes(first, "little") | int.from_bytes(second, "little")
+    return merged.to_bytes(max(len(first), len(second)), "little")
+
+
+def _merge_statements(first: str, second: str) -> str:
+    merged = _decode_statements(first)
+    for source, pairs in _decode_statements(second).items():
+        merged[source] = list(dict.fromkeys(merged[source] + pairs))
+    return _encode_statements(merged)
+
+
+def read_ntriples_records(path: str) -> Iterator[IndexRecord]:
+    """
+    Stream the entities described by an N-Triples file (e.g. `latest-truthy.nt.gz`).
+
+    Labels (`rdfs:label`) and direct statements (`wdt:` triples) of items,
+    properties and lexemes are read; other triples, including those of the
+    statement nodes (`wds:`) that carry qualifiers and references, are ignored.
+    Consecutive triples of the same entity make up one record.
+
+    Args:
+        path: Path of the file (optionally gzip- or bzip2-compressed).
+
+    Yields:
+        One record per run of triples about an entity.
+    """
+    subject: Optional[str] = None
+    languages: Dict[str, None] = {}
+    direct: Dict[Tuple[str, Optional[str]], None] = {}
+
+    def record() -> IndexRecord:
+        statements: StatementIds = {source: [] for source in STATEMENT_SOURCES}
+        statements["direct"] = list(direct)
+        return subject or "", tuple(sorted(languages)), statements
+
+    with open_dump(path) as triples:
+        for line in triples:
+            match = _NTRIPLE.match(line)
+            if match is None:
+                continue
+            subject_uri, predicate, obj = match.groups()
+            if not subject_uri.startswith(WIKIDATA_ENTITY_PREFIX):
+                continue
+
+            entity_id = subject_uri[len(WIKIDATA_ENTITY_PREFIX) :]
+            if not _ENTITY_ID.fullmatch(entity_id):
+                continue
+            if entity_id != subject:
+                if subject is not None:
+                    yield record()
+                subject, languages, direct = entity_id, {}, {}
+
+            if predicate == _RDFS_LABEL and obj.startswith('"'):
+                language = obj[obj.rindex('"') + 1 :]
+                if language.startswith("@"):
+                    languages[language[1:]] = None
+            elif predicate.startswith(WIKIDATA_PROPERTY_PREFIX):
+                property_id = predicate[len(WIKIDATA_PROPERTY_PREFIX) :]
+                value = obj[1:-1] if obj.startswith("<") else ""
+                value_id = (
+                    value[len(WIKIDATA_ENTITY_PREFIX) :]
+                    if value.startswith(WIKIDATA_ENTITY_PREFIX)
+                    else ""
+                )
+                item_id = value_id if _ITEM_ID.fullmatch(value_id) else None
+                direct[(property_id, item_id)] = None
+
+    if subject is not None:
+        yield record()
+
+
+def build_index(
+    source: str,
+    index_path: str,
+    processes: Optional[int] = None,
+    chunk_lines: int = DEFAULT_DUMP_CHUNK_LINES,
+) -> int:
+    """
+    Build an index from a Wikidata JSON dump or an N-Triples file.
+
+    The index is a SQLite database with one row per entity holding its statements
+    and a bitset of the languages of its labels. It is written next to
+    `index_path` and moved into place once complete, so an interrupted build never
+    leaves a partial index behind.
+
+    Args:
+        source: Path of a JSON dump (".json", optionally ".gz"/".bz2") or of an
+            N-Triples file (".nt", optionally ".gz"/".bz2").
+        index_path: Path of the index to create or replace.
+        processes: Number of processes parsing a JSON dump (default: one per CPU).
+        chunk_lines: Number of dump lines parsed per task.
+
+    Returns:
+        The number of entities in the index.
+    """
+    if ".nt" in os.path.basename(source):
+        records: Iterator[IndexRecord] = read_ntriples_records(source)
+    else:
+        records = read_entity_records(
+            source, None, processes, chunk_lines, extract=_index_record
+        )
+
+    building_path = f"{index_path}.building"
+    if os.path.exists(building_path):
+        os.remove(building_path)
+
+    connection = sqlite3.connect(building_path)
+    try:
+        connection.executescript(_SCHEMA)
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.create_function("merge_labels", 2, _merge_labels, deterministic=True)
+        connection.create_function(
+            "merge_statements", 2, _merge_statements, deterministic=True
+        )
+
+        bits: Dict[str, int] = {}
+        batch: List[Tuple[str, bytes, str]] = []
+
+        def flush() -> None:
+            connection.executemany(_UPSERT, batch)
+            batch.clear()
+
+        for entity_id, languages, statements in records:
+            mask = 0
+            for language in languages:
+                bit = bits.setdefault(language, len(bits))
+                mask |= 1 << bit
+            labels = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+            batch.append((entity_id, labels, _encode_statements(statements)))
+            if len(batch) >= chunk_lines:
+                flush()
+        flush()
+
+        connection.executemany(
+            "INSERT INTO languages (bit, code) VALUES (?, ?)",
+            [(bit, code) for code, bit in bits.items()],
+        )
+        connection.commit()
+        count = connection.execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+    finally:
+        connection.close()
+
+    os.replace(building_path, index_path)
+    return count
+
+
+class LocalIndex:
+    """
+    Read-only access to an index built by `build_index`.
+
+    It answers the statement and label lookups of `mlscores.query` without any
+    network access. Each thread gets its own SQLite connection.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open an index.
+
+        Args:
+            path: Path of the index.
+
+        Raises:
+            FileNotFoundError: If there is no index at this path.
+        """
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"No index at {path}")
+        self.path = path
+        self._local = threading.local()
+        self.languages: Dict[int, str] = dict(
+            self._connection().execute("SELECT bit, code FROM languages")
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            self._local.connection = connection
+        return connection
+
+    def _rows(self, ids: Sequence[str], column: str) -> Dict[str, Any]:
+        rows: Dict[str, Any] = {}
+        for i in range(0, len(ids), _MAX_QUERY_IDS):
+            batch = ids[i : i + _MAX_QUERY_IDS]
+            placeholders = ",".join("?" * len(batch))
+            rows.update(
+                self._connection().execute(
+                    f"SELECT id, {column} FROM entities WHERE id IN ({placeholders})",
+                    batch,
+                )
+            )
+        return rows
+
+    def get_statements_for_items(
+        self, item_ids: Sequence[str]
+    ) -> Dict[str, Dict[str, List[Tuple[str, str]]]]:
+        """
+        Retrieve the statements of many items, as `mlscores.query` reports them.
+
+        Properties of direct statements are `wdt:` URIs and those of qualifiers and
+        references entity URIs; values are item URIs, or empty strings for other
+        values, whose literal form is not stored. Items missing from the index have
+        no statements.
+
+        Args:
+            item_ids: The IDs of the items.
+
+        Returns:
+            A dictionary mapping each item ID to its (property, value) pairs grouped
+            by source.
+        """
+        stored = self._rows(list(dict.fromkeys(item_ids)), "statements")
+        statements: Dict[str, Dict[str, List[Tuple[str, str]]]] = {}
+        for item_id in item_ids:
+            pairs = _decode_statements(stored[item_id]) if item_id in stored else {}
+            statements[item_id] = {
+                source: [
+                    (
+                        f"{_PROPERTY_PREFIXES[source]}{property_id}",
+                        f"{WIKIDATA_ENTITY_PREFIX}{value_id}" if value_id else "",
+                    )
+                    for property_id, value_id in pairs.get(source, [])
+                ]
+                for source in STATEMENT_SOURCES
+            }
+        return statements
+
+    def get_statements(self, item_id: str) -> Dict[str, List[Tuple[str, str]]]:
+        """Retrieve the statements of one item (see `get_statements_for_items`)."""
+        return self.get_statements_for_items([item_id])[item_id]
+
+    def get_labels(
+        self, uris: Sequence[str], prefix: str, languages: Optional[List[str]] = None
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Retrieve the label languages of property or value URIs.
+
+        Args:
+            uris: The URIs; those not starting with `prefix` are left out.
+            prefix: URI prefix followed by the entity ID (e.g. the `wdt:` prefix).
+            languages: Only report labels in these languages (default: all languages).
+
+        Returns:
+            (URI, label, language) tuples as returned by the SPARQL label functions,
+            except that label texts are not stored and are empty. URIs without a
+            (matching) label get one tuple with the default label and language.
+        """
+        ids = {uri: uri[len(prefix) :] for uri in uris if uri.startswith(prefix)}
+        masks = self._rows(list(set(ids.values())), "labels")
+
+        labels: List[Tuple[str, str, str]] = []
+        for uri, entity_id in ids.items():
+            mask = int.from_bytes(masks.get(entity_id, b""), "little")
+            uri_labels = [
+                (uri, "", code)
+                for bit, code in self.languages.items()
+                if mask >> bit & 1 and (not languages or code in languages)
+            ]
+            labels.extend(
+                uri_labels or [(uri, DEFAULT_NO_LABEL, DEFAULT_UNKNOWN_LANGUAGE)]
+            )
+        return labels
+
+    def get_label_counts(
+        self, uris: Sequence[str], prefix: str, languages: Optional[List[str]] = None
+    ) -> Tuple[int, Dict[str, int]]:
+        """
+        Count, for each language, how many of the given URIs have a label.
+
+        Returns:
+            The number of distinct URIs counted and the number of URIs labelled in
+            each language; URIs without a (matching) label count under the unknown
+            language.
+        """
+        counts: Dict[str, int] = {}
+        total = 0
+        seen = set()
+        for uri, _, language in self.get_labels(uris, prefix, languages):
+            if uri not in seen:
+                seen.add(uri)
+                total += 1
+            counts[language] = counts.get(language, 0) + 1
+        return total, counts
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+# Open indexes, by path
+_indexes: Dict[str, LocalIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_local_index(endpoint: str) -> LocalIndex:
+    """
+    Get the index of a local endpoint, opening it on first use.
+
+    Args:
+        endpoint: A "local:/path/to/index" endpoint URL, or the path itself.
+
+    Returns:
+        The LocalIndex instance for the path.
+    """
+    if endpoint.startswith(LOCAL_ENDPOINT_PREFIX):
+        endpoint = endpoint[len(LOCAL_ENDPOINT_PREFIX) :]
+    with _indexes_lock:
+        index = _indexes.get(endpoint)
+        if index is None:
+            index = _indexes[endpoint] = LocalIndex(endpoint)
+        return index
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point of `python -m mlscores index`."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mlscores index",
+        description="Build a local index from a Wikidata JSON dump or N-Triples file, "
+        "to score items offline with --endpoint local:PATH.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python -m mlscores index latest-all.json.gz wikidata.sqlite
+  python -m mlscores Q42 -l en fr --endpoint local:wikidata.sqlite
+        """,
+    )
+    parser.add_argument(
+        "source",
+        type=str,
+        help="JSON dump (.json[.gz|.bz2]) or N-Triples file (.nt[.gz|.bz2])",
+    )
+    parser.add_argument("index", type=str, help="Path of the index to create")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of processes parsing a JSON dump (default: one per CPU)",
+    )
+
+    args = parser.parse_args(argv)
+
+    count = build_index(args.source, args.index, processes=args.jobs)
+    print(f"Indexed {count} entities into {args.index}")
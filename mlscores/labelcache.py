@@ -0,0 +1,106 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+"""Cached labels of single entities and properties, keyed by endpoint and URI."""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .bindings import Row
+from .cache import get_cache
+
+
+class EntityLabelCache:
+    """
+    The label rows of single URIs of an endpoint, kept in the query cache.
+
+    Label batches that overlap earlier ones only need their new URIs queried,
+    where the cache entry of a whole batch query would miss as soon as one URI
+    differs. Each entry holds the (label, language) pairs of one URI and the
+    languages they were fetched for, and answers lookups for any subset of them.
+
+    The entries of a lookup or of a label query are read and written together
+    (see `QueryCache.get_many`), in one transaction rather than once per URI. These
+    calls block on disk I/O, so async code runs them in a thread.
+    """
+
+    def __init__(self, endpoint: str):
+        """
+        Initialize the cache.
+
+        Args:
+            endpoint: Identifies the endpoint (and credentials) the labels come from.
+        """
+        self.namespace = f"{endpoint}#entity-labels"
+
+    def lookup(
+        self, uris: Iterable[str], languages: Optional[List[str]] = None
+    ) -> Tuple[List[Row], List[str]]:
+        """
+        Look up label rows like the label queries return them.
+
+        Args:
+            uris: Entity or property URIs.
+            languages: Only return labels in these languages (default: all).
+
+        Returns:
+            The (URI, label, language) rows of the cached URIs, with None for the
+            label and language of URIs without a label, and the URIs to query.
+        """
+        cache = get_cache()
+        if not cache.enabled:
+            return [], list(uris)
+
+        uris = list(uris)
+        entries = cache.get_many(uris, self.namespace)
+        wanted = set(languages) if languages else None
+        rows: List[Row] = []
+        missing: List[str] = []
+        for uri in uris:
+            entry = entries.get(uri)
+            if entry is None or not _covers(entry["languages"], wanted):
+                missing.append(uri)
+                continue
+            labels = [
+                (uri, label, lang)
+                for label, lang in entry["labels"]
+                if wanted is None or lang in wanted
+            ]
+            rows.extend(labels or [(uri, None, None)])
+        return rows, missing
+
+    def store(self, rows: Iterable[Row], languages: Optional[List[str]] = None) -> None:
+        """
+        Cache the label rows of the URIs of successful label queries.
+
+        Args:
+            rows: (URI, label, language) rows; URIs without a label have a single
+                row with None for the label and language.
+            languages: The languages the rows were fetched for (default: all).
+        """
+        cache = get_cache()
+        if not cache.enabled:
+            return
+
+        labels: Dict[str, List[Sequence[Optional[str]]]] = {}
+        for uri, label, lang in rows:
+            uri_labels = labels.setdefault(uri, [])
+            if label is not None or lang is not None:
+                uri_labels.append((label, lang))
+        fetched = sorted(set(languages)) if languages else None
+        cache.set_many(
+            {
+                uri: {"languages": fetched, "labels": uri_labels}
+                for uri, uri_labels in labels.items()
+            },
+            self.namespace,
+        )
+
+
+def _covers(fetched: Optional[List[str]], wanted: Optional[set]) -> bool:
+    """Whether labels fetched for some languages include all wanted languages."""
+    if fetched is None:
+        return True
+    return wanted is not None and wanted.issubset(fetched)
@@ -0,0 +1,416 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+"""Local tables of the label languages of every property of an endpoint."""
+
+import argparse
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .constants import (
+    DEFAULT_NO_LABEL,
+    DEFAULT_PROPERTY_TABLE_PAGE_SIZE,
+    DEFAULT_PROPERTY_TABLE_TTL_SECONDS,
+    DEFAULT_UNKNOWN_LANGUAGE,
+    PROPERTY_TABLE_RECHECK_SECONDS,
+    WIKIDATA_PROPERTY_PREFIX,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PropertyLabelTable:
+    """The label languages of every property of an endpoint, fetched at one time."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        languages: Dict[str, FrozenSet[str]],
+        timestamp: Optional[float] = None,
+        property_prefix: str = WIKIDATA_PROPERTY_PREFIX,
+    ):
+        """
+        Initialize the table.
+
+        Args:
+            endpoint: The SPARQL endpoint URL the table was fetched from.
+            languages: Map of property ID (e.g. "P31") to its label languages.
+            timestamp: When the table was fetched (default: now).
+            property_prefix: URI prefix of the endpoint's (direct) properties.
+        """
+        self.endpoint = endpoint
+        self.languages = languages
+        self.property_prefix = property_prefix
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    def __len__(self) -> int:
+        return len(self.languages)
+
+    def is_expired(self, ttl_seconds: float) -> bool:
+        """Whether the table is older than `ttl_seconds`."""
+        return time.time() - self.timestamp > ttl_seconds
+
+    def _lookup(self, uri: str) -> Optional[FrozenSet[str]]:
+        if not uri.startswith(self.property_prefix):
+            return None
+        return self.languages.get(uri[len(self.property_prefix) :])
+
+    def get_labels(
+        self, uris: Iterable[str], languages: Optional[List[str]] = None
+    ) -> Tuple[List[Tuple[str, str, str]], List[str]]:
+        """
+        Look up label languages like `query.get_property_labels` returns them.
+
+        Label texts are not kept, so labels are returned as empty strings.
+
+        Args:
+            uris: Property URIs.
+            languages: Only return labels in these languages.
+
+        Returns:
+            The (URI, label, language) tuples of the properties in the table, and
+            the URIs of properties missing from it (e.g. created since it was fetched).
+        """
+        wanted = set(languages) if languages else None
+        rows: List[Tuple[str, str, str]] = []
+        missing: List[str] = []
+        for uri in uris:
+            langs = self._lookup(uri)
+            if langs is None:
+                missing.append(uri)
+                continue
+            if wanted is not None:
+                langs = langs & wanted
+            if langs:
+                rows.extend((uri, "", lang) for lang in sorted(langs))
+            else:
+                rows.append((uri, DEFAULT_NO_LABEL, DEFAULT_UNKNOWN_LANGUAGE))
+        return rows, missing
+
+    def get_label_counts(
+        self, uris: Iterable[str], languages: Optional[List[str]] = None
+    ) -> Tuple[int, Dict[str, int], List[str]]:
+        """
+        Count labels like `query.get_property_label_counts`.
+
+        Args:
+            uris: Distinct property URIs.
+            languages: Only count labels in these languages.
+
+        Returns:
+            The number of properties counted, the number of them labelled in each
+            language, and the URIs of properties missing from the table.
+        """
+        counts: Dict[str, int] = {}
+        rows, missing = self.get_labels(uris, languages)
+        for _, _, lang in rows:
+            counts[lang] = counts.get(lang, 0) + 1
+        return len({uri for uri, _, _ in rows}), counts, missing
+
+    def save(self, path: Path) -> None:
+        """Write the table to `path`, replacing any previous table at once."""
+        codes = sorted({lang for langs in self.languages.values() for lang in langs})
+        positions = {code: i for i, code in enumerate(codes)}
+        document = {
+            "endpoint": self.endpoint,
+            "property_prefix": self.property_prefix,
+            "timestamp": self.timestamp,
+            "languages": codes,
+            "properties": {
+                property_id: sorted(positions[lang] for lang in langs)
+                for property_id, langs in sorted(self.languages.items())
+            },
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(document, f, separators=(",", ":"))
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: Path) -> "PropertyLabelTable":
+        """
+        Read a table written by `save`.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If the file is not a property label table.
+        """
+        with open(path, encoding="utf-8") as f:
+            document = json.load(f)
+        try:
+            # Properties sharing a language set share one frozenset
+            codes = document["languages"]
+            sets: Dict[Tuple[int, ...], FrozenSet[str]] = {}
+            languages = {}
+            for property_id, positions in document["properties"].items():
+                key = tuple(positions)
+                if key not in sets:
+                    sets[key] = frozenset(codes[i] for i in key)
+                languages[property_id] = sets[key]
+            return cls(
+                document["endpoint"],
+                languages,
+                document["timestamp"],
+                # Tables saved before prefixes were recorded are Wikidata's
+                document.get("property_prefix", WIKIDATA_PROPERTY_PREFIX),
+            )
+        except (KeyError, IndexError, TypeError) as e:
+            raise ValueError(f"Invalid property label table {path}: {e}") from e
+
+
+@dataclasses.dataclass
+class _LoadedTable:
+    """A table read from disk, or None if there was none, and when it was read."""
+
+    table: Optional[PropertyLabelTable]
+    checked_at: float
+
+
+_directory: Optional[str] = None
+_ttl_seconds: float = DEFAULT_PROPERTY_TABLE_TTL_SECONDS
+_enabled = True
+_tables: Dict[str, _LoadedTable] = {}
+_tables_lock = threading.Lock()
+
+
+def configure_property_tables(
+    directory: Optional[str] = None,
+    ttl_seconds: Optional[float] = None,
+    enabled: bool = True,
+) -> None:
+    """
+    Configure where property label tables are kept and how long they are used.
+
+    Args:
+        directory: Directory of the tables. Defaults to ~/.mlscores/properties
+        ttl_seconds: Tables older than this are no longer used
+        enabled: Whether label lookups use the tables
+    """
+    global _directory, _ttl_seconds, _enabled
+    with _tables_lock:
+        _directory = directory
+        _ttl_seconds = (
+            DEFAULT_PROPERTY_TABLE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        )
+        _enabled = enabled
+        _tables.clear()
+
+
+def property_table_path(endpoint: str, directory: Optional[str] = None) -> Path:
+    """Return the path of the property label table of an endpoint."""
+    if directory is None:
+        directory = _directory or os.path.join(Path.home(), ".mlscores", "properties")
+    name = hashlib.sha256(endpoint.encode()).hexdigest()[:16]
+    return Path(directory) / f"{name}.json"
+
+
+def _read_table(endpoint: str) -> Optional[PropertyLabelTable]:
+    path = property_table_path(endpoint)
+    try:
+        table = PropertyLabelTable.load(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring property label table %s: %s", path, e)
+        return None
+    if table.endpoint != endpoint:
+        return None
+    if table.is_expired(_ttl_seconds):
+        logger.info(
+            "Property label table %s has expired, run "
+            "'python -m mlscores warm-properties' to refresh it",
+            path,
+        )
+        return None
+    return table
+
+
+def get_property_table(endpoint: str) -> Optional[PropertyLabelTable]:
+    """
+    Get the property label table of an endpoint, if one is warm.
+
+    A table is read from disk on first use. Once it expires, or while there is
+    none, the disk is checked again at most every PROPERTY_TABLE_RECHECK_SECONDS,
+    so a long-running process picks up tables refreshed by `warm-properties`.
+
+    Args:
+        endpoint: The SPARQL endpoint URL.
+
+    Returns:
+        The table, or None if property labels have to be queried.
+    """
+    if not _enabled:
+        return None
+    now = time.monotonic()
+    with _tables_lock:
+        loaded = _tables.get(endpoint)
+        if loaded is not None:
+            if loaded.table is not None and not loaded.table.is_expired(_ttl_seconds):
+                return loaded.table
+            if now - loaded.checked_at < PROPERTY_TABLE_RECHECK_SECONDS:
+                return None
+        table = _read_table(endpoint)
+        _tables[endpoint] = _LoadedTable(table, now)
+        return table
+
+
+def fetch_property_table(
+    page_size: int = DEFAULT_PROPERTY_TABLE_PAGE_SIZE,
+) -> PropertyLabelTable:
+    """
+    Fetch the label languages of every property of the configured endpoint.
+
+    (property, language) rows are fetched in pages of `page_size`, bypassing the
+    query cache.
+
+    Raises:
+        RuntimeError: If a page cannot be fetched.
+    """
+    # Imported here because mlscores.query builds on this module
+    from .query import (
+        PROPERTY_LANGUAGE_VARIABLES,
+        build_property_label_languages_query,
+        get_sparql,
+        run_select,
+    )
+
+    sparql = get_sparql()
+    endpoint = sparql.endpoint
+    property_prefix = sparql.config.property_prefix
+    languages: Dict[str, Set[str]] = {}
+    offset = 0
+    while True:
+        rows = run_select(
+            build_property_label_languages_query(page_size, offset),
+            PROPERTY_LANGUAGE_VARIABLES,
+            use_cache=False,
+        )
+        if rows is None:
+            raise RuntimeError(f"Failed to fetch property labels from {endpoint}")
+        for uri, lang in rows:
+            if not uri.startswith(property_prefix):
+                continue
+            langs = languages.setdefault(uri[len(property_prefix) :], set())
+            if lang:
+                langs.add(lang)
+        logger.debug("Fetched %d property label rows from offset %d", len(rows), offset)
+        if len(rows) < page_size:
+            break
+        offset += page_size
+
+    return PropertyLabelTable(
+        endpoint,
+        {property_id: frozenset(langs) for property_id, langs in languages.items()},
+        property_prefix=property_prefix,
+    )
+
+
+def warm_property_table(
+    page_size: int = DEFAULT_PROPERTY_TABLE_PAGE_SIZE, force: bool = False
+) -> Tuple[PropertyLabelTable, bool]:
+    """
+    Fetch and save the property label table of the configured endpoint.
+
+    Args:
+        page_size: Rows fetched per query.
+        force: Fetch the table even if the saved one has not expired.
+
+    Returns:
+        The table, and whether it was fetched (False if the saved table was kept).
+    """
+    from .query import get_sparql
+
+    endpoint = get_sparql().endpoint
+    if not force:
+        table = _read_table(endpoint)
+        if table is not None:
+            return table, False
+
+    table = fetch_property_table(page_size)
+    table.save(property_table_path(endpoint))
+    with _tables_lock:
+        _tables[endpoint] = _LoadedTable(table, time.monotonic())
+    return table, True
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point of `python -m mlscores warm-properties`."""
+    from .endpoint import create_endpoint_config, get_known_endpoint
+    from .query import configure_endpoint
+
+    parser = argparse.ArgumentParser(
+        prog="python -m mlscores warm-properties",
+        description="Fetch the label languages of every property of an endpoint "
+        "once, so that scoring looks property labels up locally.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python -m mlscores warm-properties
+  python -m mlscores warm-properties --endpoint commons --force
+        """,
+    )
+    parser.add_argument(
+        "--endpoint",
+        type=str,
+        help="SPARQL endpoint URL or known endpoint name (default: wikidata)",
+    )
+    parser.add_argument(
+        "--dir",
+        type=str,
+        help="Directory of property label tables (default: ~/.mlscores/properties)",
+    )
+    parser.add_argument(
+        "--ttl",
+        type=int,
+        default=DEFAULT_PROPERTY_TABLE_TTL_SECONDS,
+        help="Keep a saved table younger than this many seconds "
+        f"(default: {DEFAULT_PROPERTY_TABLE_TTL_SECONDS})",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Fetch the table even if the saved one has not expired",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=DEFAULT_PROPERTY_TABLE_PAGE_SIZE,
+        help="(property, language) rows fetched per query "
+        f"(default: {DEFAULT_PROPERTY_TABLE_PAGE_SIZE})",
+    )
+
+    args = parser.parse_args(argv)
+
+    endpoint = get_known_endpoint(args.endpoint) if args.endpoint else None
+    if endpoint is None:
+        endpoint = create_endpoint_config(url=args.endpoint)
+    if endpoint.is_local():
+        parser.error("local endpoints do not need a property label table")
+    configure_endpoint(endpoint)
+    configure_property_tables(directory=args.dir, ttl_seconds=args.ttl)
+
+    try:
+        table, fetched = warm_property_table(args.page_size, force=args.force)
+    except RuntimeError as e:
+        parser.exit(1, f"{e}\n")
+    path = property_table_path(endpoint.url)
+    if fetched:
+        print(f"Saved the label languages of {len(table)} properties to {path}")
+    else:
+        print(f"{path} has not expired yet, use --force to fetch it again")
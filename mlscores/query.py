@@ -4,44 +4,229 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 #
 
+import http.client
+import logging
 import sys
+import threading
 import time
 import urllib
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from SPARQLWrapper import SPARQLWrapper, JSON, SPARQLExceptions
+from SPARQLWrapper import JSON, SPARQLExceptions
 from tqdm import tqdm
 
+from .bindings import ACCEPT_HEADERS, RESULT_FORMATS, DecodeStats, Row, read_rows
+from .cache import get_cache
+from .endpoint import EndpointConfig
+from .labelcache import EntityLabelCache
+from .properties import get_property_table
+from .transport import SparqlSession
+from .wikibase_api import WikibaseApiSession, entity_id, read_entity_labels
+from .ratelimit import get_rate_limiter, parse_retry_after
 from .constants import (
-    DEFAULT_SPARQL_ENDPOINT,
     BATCH_SIZE,
+    DEFAULT_ITEMS_PER_BATCH,
+    DEFAULT_LABEL_API_WORKERS,
+    DEFAULT_RESULT_FORMAT,
+    LABEL_BATCH_MIN_SIZE,
+    LABEL_BATCH_MAX_SIZE,
+    LABEL_BATCH_TARGET_SECONDS,
+    LABEL_BATCH_MAX_ROWS,
+    LABEL_BATCH_MAX_BYTES,
+    LABEL_BACKENDS,
+    WBGETENTITIES_MAX_IDS,
     MAX_RETRIES,
     BACKOFF_MULTIPLIER,
     PROGRESS_BAR_TOTAL,
-    WIKIDATA_PROPERTY_PREFIX,
-    WIKIDATA_ITEM_PREFIX,
     DEFAULT_NO_LABEL,
     DEFAULT_UNKNOWN_LANGUAGE,
 )
 import importlib.util
 from pathlib import Path
 
-_BUILDERS_PATH = Path(__file__).parent / "web" / "static" / "wasm" / "query_builders.py"
-_SPEC = importlib.util.spec_from_file_location("mlscores_query_builders", _BUILDERS_PATH)
-if _SPEC is None or _SPEC.loader is None:
-    raise ImportError(f"Unable to load shared query builders from {_BUILDERS_PATH}")
-_query_builders = importlib.util.module_from_spec(_SPEC)
-_SPEC.loader.exec_module(_query_builders)
+if TYPE_CHECKING:
+    from .index import LocalIndex
+
+_SHARED_MODULES_DIR = Path(__file__).parent / "web" / "static" / "wasm"
+
+
+def _load_shared_module(name: str):
+    """Load a module shared with the Pyodide runtime from the static wasm directory."""
+    path = _SHARED_MODULES_DIR / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(f"mlscores_{name}", path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Unable to load shared module from {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+_query_builders = _load_shared_module("query_builders")
 
 build_properties_and_values_query = _query_builders.build_properties_and_values_query
 build_qualifier_properties_and_values_query = _query_builders.build_qualifier_properties_and_values_query
 build_reference_properties_and_values_query = _query_builders.build_reference_properties_and_values_query
+build_statements_query = _query_builders.build_statements_query
+build_items_statements_query = _query_builders.build_items_statements_query
 build_property_labels_query = _query_builders.build_property_labels_query
 build_value_labels_query = _query_builders.build_value_labels_query
+build_property_label_languages_query = (
+    _query_builders.build_property_label_languages_query
+)
+build_property_label_counts_query = _query_builders.build_property_label_counts_query
+build_value_label_counts_query = _query_builders.build_value_label_counts_query
+STATEMENT_SOURCES = _query_builders.STATEMENT_SOURCES
+
+# Projected variables of the queries whose results are decoded into tuples
+STATEMENT_VARIABLES = ("source", "property", "value")
+ITEMS_STATEMENT_VARIABLES = ("item", "source", "property", "value")
+PROPERTY_LABEL_VARIABLES = ("p", "propertyLabel", "propertyLabelLang")
+VALUE_LABEL_VARIABLES = ("v", "valueLabel", "valueLabelLang")
+LABEL_COUNT_VARIABLES = ("lang", "count")
+PROPERTY_LANGUAGE_VARIABLES = ("p", "lang")
+
+AdaptiveBatcher = _load_shared_module("adaptive_batching").AdaptiveBatcher
+
+# Label batch sizes adapt to the endpoint and are shared by all threads
+property_label_batcher = AdaptiveBatcher(
+    "property",
+    initial_size=BATCH_SIZE,
+    min_size=LABEL_BATCH_MIN_SIZE,
+    max_size=LABEL_BATCH_MAX_SIZE,
+    target_seconds=LABEL_BATCH_TARGET_SECONDS,
+    max_rows=LABEL_BATCH_MAX_ROWS,
+    max_bytes=LABEL_BATCH_MAX_BYTES,
+)
+value_label_batcher = AdaptiveBatcher(
+    "value",
+    initial_size=BATCH_SIZE,
+    min_size=LABEL_BATCH_MIN_SIZE,
+    max_size=LABEL_BATCH_MAX_SIZE,
+    target_seconds=LABEL_BATCH_TARGET_SECONDS,
+    max_rows=LABEL_BATCH_MAX_ROWS,
+    max_bytes=LABEL_BATCH_MAX_BYTES,
+)
+
+logger = logging.getLogger(__name__)
 
 # Wikidata SPARQL endpoint
 user_agent = "WDQS-mlscores Python/%s.%s" % (sys.version_info[0], sys.version_info[1])
-sparql = SPARQLWrapper(DEFAULT_SPARQL_ENDPOINT, agent=user_agent)
+
+# Sessions keep the current query and an open connection as mutable state, so
+# every thread gets its own session instead of sharing a module-level one.
+_thread_local = threading.local()
+
+# Endpoint used by new sessions; bumping the generation replaces existing ones
+_endpoint_config = EndpointConfig()
+_endpoint_generation = 0
+
+
+def configure_endpoint(config: EndpointConfig) -> None:
+    """
+    Set the endpoint and transport settings used by all query functions.
+
+    Sessions of all threads are replaced on their next query.
+
+    Args:
+        config: The endpoint configuration.
+
+    Raises:
+        ValueError: If the label backend is unknown, or is "wbgetentities" without
+            an API URL.
+    """
+    global _endpoint_config, _endpoint_generation
+    if config.label_backend not in LABEL_BACKENDS:
+        raise ValueError(f"Unsupported label backend: {config.label_backend}")
+    if config.label_backend == "wbgetentities" and not config.api_url:
+        raise ValueError("The wbgetentities label backend requires an API URL")
+    _endpoint_config = config
+    _endpoint_generation += 1
+
+
+# Result format requested by run_select
+_result_format = DEFAULT_RESULT_FORMAT
+
+
+def set_result_format(result_format: str) -> None:
+    """
+    Set the result format requested for SELECT queries run by `run_select`.
+
+    Args:
+        result_format: One of "tsv", "csv" or "json". Tabular formats are much
+            smaller and faster to decode; endpoints that do not support them may
+            still answer with JSON, which is decoded as well.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    global _result_format
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"Unsupported result format: {result_format}")
+    _result_format = result_format
+
+
+def get_sparql() -> SparqlSession:
+    """
+    Return the SPARQL session bound to the calling thread.
+
+    A new session is created the first time a thread asks for one, which lets
+    worker pools run queries concurrently without overwriting each other's query.
+    Each session keeps its connection to the endpoint open between queries.
+
+    Returns:
+        The SparqlSession instance for the current thread.
+    """
+    sparql = getattr(_thread_local, "sparql", None)
+    if sparql is None or _thread_local.generation != _endpoint_generation:
+        if sparql is not None:
+            sparql.close()
+        sparql = SparqlSession(_endpoint_config, user_agent)
+        _thread_local.sparql = sparql
+        _thread_local.generation = _endpoint_generation
+    return sparql
+
+
+def get_api_session() -> WikibaseApiSession:
+    """
+    Return the Wikibase API session bound to the calling thread.
+
+    Returns:
+        The WikibaseApiSession instance for the current thread, sending requests to
+        the API URL of the configured endpoint.
+    """
+    session = getattr(_thread_local, "api_session", None)
+    if session is None or _thread_local.api_generation != _endpoint_generation:
+        if session is not None:
+            session.close()
+        session = WikibaseApiSession(
+            _endpoint_config.api_url or "",
+            user_agent,
+            _endpoint_config.timeout,
+            _endpoint_config.gzip,
+        )
+        _thread_local.api_session = session
+        _thread_local.api_generation = _endpoint_generation
+    return session
+
+
+def _local_index() -> "LocalIndex":
+    """Return the local index the configured endpoint names."""
+    # Imported here because mlscores.index builds on this module
+    from .index import get_local_index
+
+    return get_local_index(_endpoint_config.url)
 
 
 def get_properties_and_values(item_id: str) -> Optional[Dict[str, Any]]:
@@ -57,13 +242,13 @@ def get_properties_and_values(item_id: str) -> Optional[Dict[str, Any]]:
         The result of the SPARQL query, or None if the query fails.
 
     Notes:
-        This function uses the `safe_query` function to execute the SPARQL query with retry mechanism.
+        This function uses the `run_query` function to execute the SPARQL query through the
+        query cache, with retry mechanism.
     """
-    sparql.setQuery(build_properties_and_values_query(item_id))
-    sparql.setReturnFormat(JSON)
-
-    # Execute the query with retry mechanism
-    return safe_query(sparql)
+    # Execute the query through the cache with retry mechanism
+    return run_query(
+        build_properties_and_values_query(item_id, _endpoint_config.entity_prefix)
+    )
 
 
 def get_qualifier_properties_and_values(item_id: str) -> Optional[Dict[str, Any]]:
@@ -79,13 +264,15 @@ def get_qualifier_properties_and_values(item_id: str) -> Optional[Dict[str, Any]
         The result of the SPARQL query, or None if the query fails.
 
     Notes:
-        This function uses the `safe_query` function to execute the SPARQL query with retry mechanism.
+        This function uses the `run_query` function to execute the SPARQL query through the
+        query cache, with retry mechanism.
     """
-    sparql.setQuery(build_qualifier_properties_and_values_query(item_id))
-    sparql.setReturnFormat(JSON)
-
-    # Execute the query with retry mechanism
-    return safe_query(sparql)
+    # Execute the query through the cache with retry mechanism
+    return run_query(
+        build_qualifier_properties_and_values_query(
+            item_id, _endpoint_config.entity_prefix
+        )
+    )
 
 
 def get_reference_properties_and_values(item_id: str) -> Optional[Dict[str, Any]]:
@@ -101,16 +288,116 @@ def get_reference_properties_and_values(item_id: str) -> Optional[Dict[str, Any]
         The result of the SPARQL query, or None if the query fails.
 
     Notes:
-        This function uses the `safe_query` function to execute the SPARQL query with retry mechanism.
+        This function uses the `run_query` function to execute the SPARQL query through the
+        query cache, with retry mechanism.
     """
-    sparql.setQuery(build_reference_properties_and_values_query(item_id))
-    sparql.setReturnFormat(JSON)
+    # Execute the query through the cache with retry mechanism
+    return run_query(
+        build_reference_properties_and_values_query(
+            item_id, _endpoint_config.entity_prefix
+        )
+    )
 
-    # Execute the query with retry mechanism
-    return safe_query(sparql)
 
+def get_statements(item_id: str) -> Optional[Dict[str, List[Tuple[str, str]]]]:
+    """
+    Retrieve direct, qualifier and reference properties and values of an item at once.
+
+    This function replaces separate calls to `get_properties_and_values`,
+    `get_qualifier_properties_and_values` and `get_reference_properties_and_values`
+    with a single SPARQL query whose rows are tagged with their source.
+
+    Args:
+        item_id (str): The ID of the Wikidata item to retrieve properties for.
+
+    Returns:
+        A dictionary mapping each source ('direct', 'qualifier', 'reference') to its
+        (property, value) pairs, or None if the query fails.
 
-def get_property_labels(property_uris: List[str]) -> List[Tuple[str, str, str]]:
+    Notes:
+        This function uses the `run_select` function to execute the SPARQL query through the
+        query cache, with retry mechanism. A local endpoint ("local:/path") is served
+        from its index instead.
+    """
+    if _endpoint_config.is_local():
+        return _local_index().get_statements(item_id)
+
+    rows = run_select(
+        build_statements_query(item_id, _endpoint_config.entity_prefix),
+        STATEMENT_VARIABLES,
+    )
+    if rows is None:
+        return None
+    return statement_pairs_by_source(rows)
+
+
+def get_statements_for_items(
+    item_ids: List[str], items_per_batch: int = DEFAULT_ITEMS_PER_BATCH
+) -> Dict[str, Optional[Dict[str, List[Tuple[str, str]]]]]:
+    """
+    Retrieve direct, qualifier and reference properties and values of many items.
+
+    Items are queried in batches of `items_per_batch` with a `VALUES ?item` clause,
+    so a large list of items needs far fewer requests than `get_statements`.
+
+    Args:
+        item_ids (list): The IDs of the Wikidata items to retrieve properties for.
+        items_per_batch (int): Maximum number of items per query.
+
+    Returns:
+        A dictionary mapping each item ID to the result `get_statements` would give
+        for it: its (property, value) pairs grouped by source, or None if its query failed.
+
+    Notes:
+        When a batch fails it is split in halves and retried, so that a single invalid
+        identifier only fails its own item. A local endpoint is served from its index.
+    """
+    if _endpoint_config.is_local():
+        return dict(_local_index().get_statements_for_items(item_ids))
+
+    statements: Dict[str, Optional[Dict[str, List[Tuple[str, str]]]]] = {}
+    unique_ids = list(dict.fromkeys(item_ids))
+    items_per_batch = max(items_per_batch, 1)
+
+    for i in range(0, len(unique_ids), items_per_batch):
+        _get_statements_for_batch(unique_ids[i : i + items_per_batch], statements)
+
+    return statements
+
+
+def _get_statements_for_batch(
+    batch: List[str],
+    statements: Dict[str, Optional[Dict[str, List[Tuple[str, str]]]]],
+) -> None:
+    """Query one batch of items, bisecting it on failure."""
+    rows = run_select(
+        build_items_statements_query(batch, _endpoint_config.entity_prefix),
+        ITEMS_STATEMENT_VARIABLES,
+    )
+
+    if rows is None:
+        if len(batch) == 1:
+            statements[batch[0]] = None
+            return
+        middle = len(batch) // 2
+        _get_statements_for_batch(batch[:middle], statements)
+        _get_statements_for_batch(batch[middle:], statements)
+        return
+
+    entity_prefix = _endpoint_config.entity_prefix
+    item_ids_by_uri = {f"{entity_prefix}{item_id}": item_id for item_id in batch}
+    for item_id in batch:
+        statements[item_id] = {source: [] for source in STATEMENT_SOURCES}
+
+    for item_uri, source, property_uri, value in rows:
+        item_id = item_ids_by_uri.get(item_uri)
+        if item_id is not None:
+            statements[item_id][source].append((property_uri, value))
+
+
+def get_property_labels(
+    property_uris: List[str], languages: Optional[List[str]] = None
+) -> List[Tuple[str, str, str]]:
     """
     Retrieve labels for a list of property URIs.
 
@@ -118,55 +405,82 @@ def get_property_labels(property_uris: List[str]) -> List[Tuple[str, str, str]]:
 
     Args:
         property_uris (list): A list of property URIs.
+        languages (list, optional): Only fetch labels in these languages. Properties
+            without a label in any of them are returned once with an unknown language.
 
     Returns:
         A list of tuples containing the property URI, label, and language.
 
     Notes:
-        This function uses the `safe_query` function to execute SPARQL queries with retry mechanism.
-        It also uses a batch processing approach to handle large lists of property URIs.
+        This function uses the `run_select` function to execute SPARQL queries with
+        retry mechanism. Labels are cached per property (see `EntityLabelCache`), so
+        only properties not seen before are queried.
+        It also uses a batch processing approach to handle large lists of property URIs,
+        with batch sizes adapted by `property_label_batcher`.
+        Properties found in the endpoint's property label table (see
+        `python -m mlscores warm-properties`) are answered from it without any query.
+        When the endpoint's label backend is "wbgetentities", labels are fetched from
+        the Wikibase API with `get_entity_labels` instead; a local endpoint is served
+        from its index.
     """
-    # Filter out non-Wikidata property URIs
+    # Filter out URIs that are not properties of the endpoint
     filtered_uris = {
         uri
         for uri in property_uris
-        if uri.startswith(WIKIDATA_PROPERTY_PREFIX)
+        if uri.startswith(_endpoint_config.property_prefix)
     }
 
-    # Convert the set to a list for easier processing
-    filtered_uris = list(filtered_uris)
-
-    # Initialize an empty list to store the results
-    results = []
+    # Sort the URIs so that identical sets always produce identical batches
+    # (and therefore identical cache keys)
+    filtered_uris = sorted(filtered_uris)
 
-    # Process the property URIs in batches
-    for i in range(0, len(filtered_uris), BATCH_SIZE):
-        # Get the current batch of property URIs
-        batch = filtered_uris[i : i + BATCH_SIZE]
+    if _endpoint_config.is_local():
+        return _local_index().get_labels(
+            filtered_uris, _endpoint_config.property_prefix, languages
+        )
 
+    # Properties of the warmed table need no query, new ones are still queried
+    table_results: List[Tuple[str, str, str]] = []
+    table = get_property_table(_endpoint_config.url)
+    if table is not None:
+        table_results, filtered_uris = table.get_labels(filtered_uris, languages)
+        if not filtered_uris:
+            return table_results
+
+    # Only properties whose labels are not cached yet are queried
+    entity_labels = EntityLabelCache(_endpoint_config.url)
+    results, filtered_uris = entity_labels.lookup(filtered_uris, languages)
+
+    if _endpoint_config.label_backend == "wbgetentities":
+        rows = get_entity_labels(filtered_uris, languages)
+        entity_labels.store(rows, languages)
+        return table_results + label_tuples(results + rows)
+
+    # Process the property URIs in batches sized from earlier responses
+    for batch in property_label_batcher.batches(filtered_uris):
         # Create the SPARQL query
-        query = build_property_labels_query(batch)
-
-        # Execute the query with retry mechanism
-        sparql.setQuery(query)
-        batch_results = safe_query(sparql)
+        query = build_property_labels_query(batch, languages)
+
+        # Execute the query with retry mechanism; its rows are cached per property
+        batch_results = run_select(
+            query,
+            PROPERTY_LABEL_VARIABLES,
+            observer=label_batch_observer(property_label_batcher, len(batch)),
+            use_cache=False,
+        )
 
         # Add the results to the list if the query was successful
         if batch_results:
-            results.extend(batch_results["results"]["bindings"])
+            entity_labels.store(batch_results, languages)
+            results.extend(batch_results)
 
     # Return a list of tuples: (property, label, language)
-    return [
-        (
-            result["p"]["value"],
-            result.get("propertyLabel", {}).get("value", DEFAULT_NO_LABEL),
-            result.get("propertyLabelLang", {}).get("value", DEFAULT_UNKNOWN_LANGUAGE),
-        )
-        for result in results
-    ]
+    return table_results + label_tuples(results)
 
 
-def get_value_labels(value_uris: List[str]) -> List[Tuple[str, str, str]]:
+def get_value_labels(
+    value_uris: List[str], languages: Optional[List[str]] = None
+) -> List[Tuple[str, str, str]]:
     """
     Retrieve labels for a list of value URIs.
 
@@ -174,53 +488,424 @@ def get_value_labels(value_uris: List[str]) -> List[Tuple[str, str, str]]:
 
     Args:
         value_uris (list): A list of value URIs.
+        languages (list, optional): Only fetch labels in these languages. Values
+            without a label in any of them are returned once with an unknown language.
 
     Returns:
         A list of tuples containing the value URI, label, and language.
 
     Notes:
-        This function uses the `safe_query` function to execute SPARQL queries with retry mechanism.
-        It also uses a batch processing approach to handle large lists of value URIs.
+        This function uses the `run_select` function to execute SPARQL queries with
+        retry mechanism. Labels are cached per value (see `EntityLabelCache`), so
+        only values not seen before are queried.
+        It also uses a batch processing approach to handle large lists of value URIs,
+        with batch sizes adapted by `value_label_batcher`.
+        When the endpoint's label backend is "wbgetentities", labels are fetched from
+        the Wikibase API with `get_entity_labels` instead; a local endpoint is served
+        from its index.
     """
-    # Filter out non-Wikidata value URIs
+    # Filter out URIs that are not items of the endpoint
     filtered_uris = {
-        uri for uri in value_uris if uri.startswith(WIKIDATA_ITEM_PREFIX)
+        uri for uri in value_uris if uri.startswith(_endpoint_config.item_prefix)
     }
 
-    # Convert the set to a list for easier processing
-    filtered_uris = list(filtered_uris)
+    # Sort the URIs so that identical sets always produce identical batches
+    # (and therefore identical cache keys)
+    filtered_uris = sorted(filtered_uris)
 
-    # Initialize an empty list to store the results
-    results = []
+    if _endpoint_config.is_local():
+        return _local_index().get_labels(
+            filtered_uris, _endpoint_config.entity_prefix, languages
+        )
+    # Only values whose labels are not cached yet are queried
+    entity_labels = EntityLabelCache(_endpoint_config.url)
+    results, filtered_uris = entity_labels.lookup(filtered_uris, languages)
 
-    # Process the value URIs in batches
-    for i in range(0, len(filtered_uris), BATCH_SIZE):
-        # Get the current batch of value URIs
-        batch = filtered_uris[i : i + BATCH_SIZE]
+    if _endpoint_config.label_backend == "wbgetentities":
+        rows = get_entity_labels(filtered_uris, languages)
+        entity_labels.store(rows, languages)
+        return label_tuples(results + rows)
 
+    # Process the value URIs in batches sized from earlier responses
+    for batch in value_label_batcher.batches(filtered_uris):
         # Create the SPARQL query
-        query = build_value_labels_query(batch)
-
-        # Execute the query with retry mechanism
-        sparql.setQuery(query)
-        batch_results = safe_query(sparql)
+        query = build_value_labels_query(batch, languages)
+
+        # Execute the query with retry mechanism; its rows are cached per value
+        batch_results = run_select(
+            query,
+            VALUE_LABEL_VARIABLES,
+            observer=label_batch_observer(value_label_batcher, len(batch)),
+            use_cache=False,
+        )
 
         # Add the results to the list if the query was successful
         if batch_results:
-            results.extend(batch_results["results"]["bindings"])
+            entity_labels.store(batch_results, languages)
+            results.extend(batch_results)
 
     # Return a list of tuples: (value, label, language)
+    return label_tuples(results)
+
+
+def get_entity_labels(
+    uris: List[str],
+    languages: Optional[List[str]] = None,
+    max_workers: int = DEFAULT_LABEL_API_WORKERS,
+) -> List[Row]:
+    """
+    Retrieve labels of entities or properties through the Wikibase API.
+
+    The entity IDs at the end of the URIs are requested with `wbgetentities` in
+    batches of `WBGETENTITIES_MAX_IDS`, several batches at a time. Batches that fail
+    are left out, like failed SPARQL label batches.
+
+    Args:
+        uris: Sorted entity or property URIs.
+        languages: Only fetch labels in these languages (default: all languages).
+        max_workers: Maximum number of batches requested concurrently.
+
+    Returns:
+        (URI, label, language) rows as returned by the SPARQL label queries, with
+        None for the label and language of URIs without a label.
+    """
+    batches = [
+        uris[i : i + WBGETENTITIES_MAX_IDS]
+        for i in range(0, len(uris), WBGETENTITIES_MAX_IDS)
+    ]
+    if not batches:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as pool:
+        batch_results = list(
+            pool.map(lambda batch: run_entity_labels(batch, languages), batches)
+        )
+
+    rows: List[Row] = []
+    for batch_result in batch_results:
+        if batch_result:
+            rows.extend(batch_result)
+    return rows
+
+
+def run_entity_labels(
+    uris: Sequence[str], languages: Optional[List[str]] = None
+) -> Optional[List[Row]]:
+    """
+    Fetch the labels of one batch of URIs with `wbgetentities`.
+
+    The rows are not cached here: the label functions cache them per URI (see
+    `EntityLabelCache`).
+
+    Args:
+        uris: At most `WBGETENTITIES_MAX_IDS` entity or property URIs.
+        languages: Only fetch labels in these languages (default: all languages).
+
+    Returns:
+        (URI, label, language) rows, or None if the request fails.
+    """
+    session = get_api_session()
+    session.setEntities([entity_id(uri) for uri in uris], languages)
+
+    start = time.perf_counter()
+    rows = _query_with_retries(
+        session, lambda result: read_entity_labels(result, uris, languages)
+    )
+    if rows is None:
+        return None
+
+    logger.debug(
+        "wbgetentities: %d URIs, %d rows in %.2fs",
+        len(uris),
+        len(rows),
+        time.perf_counter() - start,
+    )
+    return rows
+
+
+def _get_label_counts(
+    uris: List[str], build_query, languages: Optional[List[str]]
+) -> Tuple[int, Dict[str, int]]:
+    """Run label count queries in batches and sum the per-language counts."""
+    total = 0
+    counts: Dict[str, int] = {}
+
+    for i in range(0, len(uris), BATCH_SIZE):
+        batch = uris[i : i + BATCH_SIZE]
+        batch_results = run_select(build_query(batch, languages), LABEL_COUNT_VARIABLES)
+
+        # URIs of failed batches are left out, as in get_property_labels
+        if batch_results is None:
+            continue
+
+        total += len(batch)
+        for lang, count in batch_results:
+            lang = lang or DEFAULT_UNKNOWN_LANGUAGE
+            counts[lang] = counts.get(lang, 0) + int(count)
+
+    return total, counts
+
+
+def get_property_label_counts(
+    property_uris: List[str], languages: Optional[List[str]] = None
+) -> Tuple[int, Dict[str, int]]:
+    """
+    Count, for each language, how many of the given properties have a label.
+
+    Unlike `get_property_labels`, the counting is done by the endpoint, so no label
+    text is transferred. Properties found in the endpoint's property label table
+    are counted from it.
+
+    Args:
+        property_uris (list): A list of property URIs.
+        languages (list, optional): Only count labels in these languages.
+
+    Returns:
+        A tuple of the number of distinct properties counted and a dictionary mapping
+        each language to the number of properties labelled in it. Properties without
+        a (matching) label are counted under the unknown language.
+    """
+    filtered_uris = sorted(
+        {
+            uri
+            for uri in property_uris
+            if uri.startswith(_endpoint_config.property_prefix)
+        }
+    )
+    if _endpoint_config.is_local():
+        return _local_index().get_label_counts(
+            filtered_uris, _endpoint_config.property_prefix, languages
+        )
+    table = get_property_table(_endpoint_config.url)
+    if table is None:
+        return _get_label_counts(
+            filtered_uris, build_property_label_counts_query, languages
+        )
+    total, counts, filtered_uris = table.get_label_counts(filtered_uris, languages)
+    queried_total, queried_counts = _get_label_counts(
+        filtered_uris, build_property_label_counts_query, languages
+    )
+    for lang, count in queried_counts.items():
+        counts[lang] = counts.get(lang, 0) + count
+    return total + queried_total, counts
+
+
+def get_value_label_counts(
+    value_uris: List[str], languages: Optional[List[str]] = None
+) -> Tuple[int, Dict[str, int]]:
+    """
+    Count, for each language, how many of the given values have a label.
+
+    Unlike `get_value_labels`, the counting is done by the endpoint, so no label
+    text is transferred.
+
+    Args:
+        value_uris (list): A list of value URIs.
+        languages (list, optional): Only count labels in these languages.
+
+    Returns:
+        A tuple of the number of distinct values counted and a dictionary mapping
+        each language to the number of values labelled in it. Values without
+        a (matching) label are counted under the unknown language.
+    """
+    filtered_uris = sorted(
+        {uri for uri in value_uris if uri.startswith(_endpoint_config.item_prefix)}
+    )
+    if _endpoint_config.is_local():
+        return _local_index().get_label_counts(
+            filtered_uris, _endpoint_config.entity_prefix, languages
+        )
+    return _get_label_counts(filtered_uris, build_value_label_counts_query, languages)
+
+
+def statement_pairs_by_source(rows: Iterable[Row]) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    Group the rows of a combined statements query by source.
+
+    Args:
+        rows: (source, property, value) rows of a combined statements query.
+
+    Returns:
+        A dictionary mapping each source to its (property, value) pairs.
+    """
+    pairs: Dict[str, List[Tuple[str, str]]] = {source: [] for source in STATEMENT_SOURCES}
+    for source, property_uri, value in rows:
+        pairs[source].append((property_uri, value))
+    return pairs
+
+
+def label_tuples(rows: Iterable[Row]) -> List[Tuple[str, str, str]]:
+    """
+    Fill in the defaults of unlabelled rows of a property or value labels query.
+
+    Args:
+        rows: (URI, label, language) rows, with None for a missing label or language.
+
+    Returns:
+        A list of tuples containing the URI, label, and language.
+    """
     return [
         (
-            result["v"]["value"],
-            result.get("valueLabel", {}).get("value", DEFAULT_NO_LABEL),
-            result.get("valueLabelLang", {}).get("value", DEFAULT_UNKNOWN_LANGUAGE),
+            uri,
+            label if label is not None else DEFAULT_NO_LABEL,
+            lang if lang is not None else DEFAULT_UNKNOWN_LANGUAGE,
         )
-        for result in results
+        for uri, label, lang in rows
     ]
 
 
-def safe_query(sparql: SPARQLWrapper) -> Optional[Dict[str, Any]]:
+def label_batch_observer(
+    batcher: AdaptiveBatcher, batch_size: int
+) -> Callable[[Optional[List[Row]], float, Optional[DecodeStats]], None]:
+    """
+    Create a `run_select` observer that reports label query outcomes to a batcher.
+
+    Args:
+        batcher: The batcher sizing the label queries.
+        batch_size: Number of URIs in the observed query.
+
+    Returns:
+        A callback taking the query result (None on failure), its wall time and its
+        decoding statistics.
+    """
+
+    def observe(
+        result: Optional[List[Row]], seconds: float, stats: Optional[DecodeStats]
+    ) -> None:
+        batcher.record(
+            batch_size,
+            len(result) if result is not None else None,
+            seconds,
+            stats.num_bytes if stats is not None else None,
+        )
+
+    return observe
+
+
+def run_query(
+    query: str,
+    observer: Optional[Callable[[Optional[Dict[str, Any]], float], None]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Execute a SPARQL query through the read-through query cache.
+
+    The cache is consulted first; on a miss the query is run on the calling thread's
+    SPARQL session and a successful result is written back to the cache.
+
+    Args:
+        query: The SPARQL query string.
+        observer: Optional callback receiving the result (None on failure) and wall time
+            of queries sent to the endpoint. It is not called for cache hits.
+
+    Returns:
+        The result of the query, or None if the query fails.
+    """
+    sparql = get_sparql()
+    cache = get_cache()
+
+    cached = cache.get(query, sparql.endpoint)
+    if cached is not None:
+        return cached
+
+    sparql.setQuery(query)
+    sparql.setReturnFormat(JSON)
+    sparql.clearCustomHttpHeader("Accept")
+
+    # Execute the query with retry mechanism
+    start = time.perf_counter()
+    result = safe_query(sparql)
+    if observer is not None:
+        observer(result, time.perf_counter() - start)
+
+    if result is not None:
+        cache.set(query, sparql.endpoint, result)
+    return result
+
+
+def run_select(
+    query: str,
+    variables: Sequence[str],
+    observer: Optional[
+        Callable[[Optional[List[Row]], float, Optional[DecodeStats]], None]
+    ] = None,
+    use_cache: bool = True,
+) -> Optional[List[Row]]:
+    """
+    Execute a SPARQL SELECT query through the query cache, decoding rows as tuples.
+
+    Unlike `run_query`, results are requested in the format set with
+    `set_result_format` (TSV by default) and decoded while they are read, straight
+    into one tuple per result row, so the full response is never held in memory.
+    The tuples are cached separately from the documents cached by `run_query`.
+
+    Args:
+        query: The SPARQL query string.
+        variables: The projected variables, in tuple order.
+        observer: Optional callback receiving the rows (None on failure), wall time
+            and decoding statistics (None on failure) of queries sent to the
+            endpoint. It is not called for cache hits.
+        use_cache: Whether to look up and store the rows in the query cache.
+
+    Returns:
+        One tuple per result row with the values of `variables` (None when unbound),
+        or None if the query fails.
+    """
+    sparql = get_sparql()
+    cache = get_cache()
+    cache_endpoint = f"{sparql.endpoint}#tuples"
+
+    cached = cache.get(query, cache_endpoint) if use_cache else None
+    if cached is not None:
+        return [tuple(row) for row in cached]
+
+    sparql.setQuery(query)
+    sparql.setReturnFormat(JSON)
+    sparql.addCustomHttpHeader("Accept", ACCEPT_HEADERS[_result_format])
+
+    # Execute the query with retry mechanism
+    start = time.perf_counter()
+    result = safe_select(sparql, variables)
+    seconds = time.perf_counter() - start
+    rows, stats = result if result is not None else (None, None)
+    if observer is not None:
+        observer(rows, seconds, stats)
+
+    if rows is None:
+        return None
+
+    logger.debug(
+        "%s results: %d rows, %d bytes in %.2fs, decoded in %.3fs",
+        stats.format,
+        len(rows),
+        stats.num_bytes,
+        seconds,
+        stats.decode_seconds,
+    )
+    if use_cache:
+        cache.set(query, cache_endpoint, rows)
+    return rows
+
+
+def safe_select(
+    sparql: SparqlSession, variables: Sequence[str]
+) -> Optional[Tuple[List[Row], DecodeStats]]:
+    """
+    Execute a SPARQL SELECT query with retry mechanism, streaming its rows into tuples.
+
+    Args:
+        sparql: A SPARQL query object.
+        variables: The projected variables, in tuple order.
+
+    Returns:
+        The result rows and the size and decoding time of the response, or None if the
+        query fails after the maximum number of retries or its response cannot be decoded.
+    """
+    return _query_with_retries(
+        sparql, lambda result: read_rows(result.response, variables)
+    )
+
+
+def safe_query(sparql: SparqlSession) -> Optional[Dict[str, Any]]:
     """
     Execute a SPARQL query with retry mechanism.
 
@@ -234,30 +919,50 @@ def safe_query(sparql: SPARQLWrapper) -> Optional[Dict[str, Any]]:
         The result of the query, or None if the query fails after the maximum number of retries.
 
     Notes:
-        This function uses an exponential backoff strategy to retry the query if it is rate-limited.
+        Queries wait for the endpoint host's rate limiter. When rate-limited, the query is
+        retried after the Retry-After delay sent by the endpoint, or with exponential backoff
+        if there is none, and the limiter slows down all other queries to the same host.
     """
+    return _query_with_retries(sparql, lambda result: result.convert())
+
+
+def _query_with_retries(
+    sparql: Union[SparqlSession, WikibaseApiSession], read: Callable[[Any], Any]
+) -> Any:
+    """Run a request through the rate limiter, reading its response with `read`."""
+    limiter = get_rate_limiter(sparql.endpoint)
+
     for attempt in range(MAX_RETRIES):
+        # Wait for the endpoint's share of the request rate
+        wait_time = limiter.reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
+
         try:
             # Show progress while waiting for the query to complete
-            with tqdm(
+            with limiter.slot(), tqdm(
                 total=PROGRESS_BAR_TOTAL,
                 desc="Querying",
                 bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt}",
                 ncols=100,
             ) as progress_bar:
                 # Execute the query
-                result = sparql.query().convert()
+                result = read(sparql.query())
                 # Update the progress bar to complete
                 progress_bar.update(PROGRESS_BAR_TOTAL)
+                limiter.reward()
                 return result
 
         except urllib.error.HTTPError as e:
             # Handle rate limit errors
             if e.code == 429:
-                # Exponential backoff
-                wait_time = BACKOFF_MULTIPLIER**attempt
+                # Pause all queries to this host, for as long as the endpoint asks if it
+                # sent Retry-After, otherwise with exponential backoff
+                retry_after = (
+                    parse_retry_after(e.headers.get("Retry-After")) if e.headers else None
+                )
+                wait_time = limiter.penalize(retry_after, BACKOFF_MULTIPLIER**attempt)
                 print(f"Rate limit hit, retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
             else:
                 # Handle other HTTP errors
                 print(f"HTTP error: {e}")
@@ -269,5 +974,25 @@ def safe_query(sparql: SPARQLWrapper) -> Optional[Dict[str, Any]]:
             print(sparql)
             break
 
+        except ValueError as e:
+            # Handle truncated or malformed responses (e.g. a query timeout mid-stream)
+            print(f"Invalid response: {e}")
+            break
+
+        except (http.client.HTTPException, EOFError) as e:
+            # Handle responses cut off in transfer (IncompleteRead, truncated gzip
+            # stream): the connection cannot be reused, retry on a new one
+            close = getattr(sparql, "close", None)
+            if close is not None:
+                close()
+            wait_time = BACKOFF_MULTIPLIER**attempt
+            print(f"Incomplete response ({e!r}), retrying in {wait_time} seconds...")
+            time.sleep(wait_time)
+
+        except OSError as e:
+            # Handle connection errors and timeouts
+            print(f"Connection error: {e}")
+            break
+
     # If all retries fail, return None
     return None
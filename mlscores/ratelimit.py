@@ -0,0 +1,195 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+"""Process-wide rate limiting of SPARQL requests per endpoint host."""
+
+import email.utils
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+from .constants import (
+    DEFAULT_REQUESTS_PER_SECOND,
+    DEFAULT_MAX_CONCURRENT_QUERIES,
+)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value: The header value, either a number of seconds or an HTTP date.
+
+    Returns:
+        The number of seconds to wait, or None if the value is missing or invalid.
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the request rate and concurrency towards one host.
+
+    Callers reserve a token before each request and sleep for the returned delay, so
+    the limiter itself never blocks and can be shared by threads and event loops.
+    When the endpoint answers 429, `penalize` pauses all callers until the
+    Retry-After delay has passed and halves the rate; every successful request then
+    raises the rate again by a tenth of the configured rate.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENT_QUERIES,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_second: Maximum sustained request rate
+            max_concurrency: Maximum number of requests in flight at once
+
+        Raises:
+            ValueError: If the rate or the concurrency is not positive.
+        """
+        if requests_per_second <= 0:
+            raise ValueError(
+                f"Request rate must be positive, got {requests_per_second}"
+            )
+        if max_concurrency < 1:
+            raise ValueError(f"Concurrency must be at least 1, got {max_concurrency}")
+        self.max_rate = requests_per_second
+        self.min_rate = requests_per_second / 16
+        self.max_concurrency = max_concurrency
+        self.capacity = max(1.0, requests_per_second)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.rate = self.max_rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        # _updated lies in the future while the limiter is paused
+        if now > self._updated:
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+
+    def reserve(self) -> float:
+        """
+        Reserve a token for one request.
+
+        Returns:
+            The number of seconds the caller must wait before sending the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = max(self._updated - now, 0.0)
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return wait
+
+    def penalize(self, retry_after: Optional[float], fallback: float) -> float:
+        """
+        Slow down all callers after the endpoint rejected a request.
+
+        Args:
+            retry_after: Delay requested by the endpoint, if any
+            fallback: Delay to use when the endpoint did not send one
+
+        Returns:
+            The delay applied.
+        """
+        delay = retry_after if retry_after is not None else fallback
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._updated = max(self._updated, now + delay)
+            self._tokens = min(self._tokens, 0.0)
+        return delay
+
+    def reward(self) -> None:
+        """Recover the request rate after a successful request."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one of the concurrent request slots (for blocking callers)."""
+        with self._slots:
+            yield
+
+
+# Global limiters, one per endpoint host
+_limiters: Dict[str, RateLimiter] = {}
+_limiter_options: Dict[str, Any] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(endpoint: str) -> RateLimiter:
+    """Get or create the global rate limiter for the host of an endpoint."""
+    host = urlsplit(endpoint).netloc or endpoint
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = RateLimiter(**_limiter_options)
+        return limiter
+
+
+def configure_rate_limit(
+    requests_per_second: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
+) -> None:
+    """
+    Configure the global rate limiters.
+
+    Limiters are created lazily on next use with the new settings.
+
+    Args:
+        requests_per_second: Maximum sustained request rate per host
+        max_concurrency: Maximum number of requests in flight per host
+
+    Raises:
+        ValueError: If the rate or the concurrency is not positive.
+    """
+    # Validate now rather than when a limiter is first needed
+    RateLimiter(
+        DEFAULT_REQUESTS_PER_SECOND
+        if requests_per_second is None
+        else requests_per_second,
+        DEFAULT_MAX_CONCURRENT_QUERIES if max_concurrency is None else max_concurrency,
+    )
+    with _limiters_lock:
+        _limiter_options.clear()
+        if requests_per_second is not None:
+            _limiter_options["requests_per_second"] = requests_per_second
+        if max_concurrency is not None:
+            _limiter_options["max_concurrency"] = max_concurrency
+        _limiters.clear()
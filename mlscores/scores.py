@@ -141,6 +141,37 @@ def calculate_language_percentages(properties: List[PropertyTuple]) -> Dict[str,
     return language_percentages
 
 
+def calculate_language_percentages_from_counts(
+    total: int, language_counts: Dict[str, int], languages: Optional[List[str]] = None
+) -> Dict[str, float]:
+    """
+    Calculate language percentages from precomputed per-language counts.
+
+    This function gives the same results as `calculate_language_percentages` and
+    `calculate_language_percentage_for_languages` when the counts are the number of
+    distinct properties labelled in each language.
+
+    Args:
+        total (int): The number of distinct properties.
+        language_counts (dict): Map of language to the number of properties labelled in it.
+        languages (list, optional): Languages to calculate the percentages for.
+            Defaults to None (every language in the counts).
+
+    Returns:
+        A dictionary where the keys are the languages and the values are the percentages of properties for each language.
+    """
+    if languages is not None:
+        return {
+            lang: (language_counts.get(lang, 0) / total) * 100 if total else 0
+            for lang in languages
+        }
+
+    if not total:
+        return {}
+
+    return {lang: (count / total) * 100 for lang, count in language_counts.items()}
+
+
 def get_missing_translations(
     properties: List[PropertyTuple], languages: List[str]
 ) -> Dict[str, Set[str]]:
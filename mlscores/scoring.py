@@ -0,0 +1,146 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+"""Building and outputting item results, shared by the command line entry points."""
+
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from .display import print_language_percentages, print_item_language_table
+from .formatters import MultilingualityResult, convert_sets_to_lists, get_formatter
+from .scores import (
+    PropertyTuple,
+    calculate_language_percentages,
+    calculate_language_percentage_for_languages,
+    get_properties_without_translations,
+    get_properties_without_translations_in_languages,
+)
+
+
+def _language_percentages(
+    labels: List[PropertyTuple], language_codes: Optional[List[str]]
+) -> Dict[str, float]:
+    """Calculate language percentages for all languages or the given ones."""
+    if language_codes is None:
+        return calculate_language_percentages(labels)
+    return calculate_language_percentage_for_languages(labels, language_codes)
+
+
+def _missing_translations(
+    labels: List[PropertyTuple], language_codes: Optional[List[str]]
+) -> Dict[str, List[str]]:
+    """Find missing translations for all languages or the given ones."""
+    if language_codes is None:
+        return convert_sets_to_lists(get_properties_without_translations(labels))
+    return convert_sets_to_lists(
+        get_properties_without_translations_in_languages(labels, language_codes)
+    )
+
+
+def build_result(
+    item_id: str,
+    property_labels_results: List[PropertyTuple],
+    value_labels_results: List[PropertyTuple],
+    language_codes: Optional[List[str]] = None,
+    missing: bool = False,
+) -> MultilingualityResult:
+    """
+    Build the result of an item from its property and value labels.
+
+    Args:
+        item_id: A Wikidata/Wikibase item identifier.
+        property_labels_results: (property, label, language) tuples of the item.
+        value_labels_results: (value, label, language) tuples of the item.
+        language_codes: A list of language codes to filter results. Defaults to None (all languages).
+        missing: Whether to include missing translations in results.
+
+    Returns:
+        A MultilingualityResult for the item.
+    """
+    missing_property_trans = None
+    missing_value_trans = None
+    if missing:
+        missing_property_trans = _missing_translations(
+            property_labels_results, language_codes
+        )
+        missing_value_trans = _missing_translations(value_labels_results, language_codes)
+
+    return MultilingualityResult(
+        item_id=item_id,
+        property_label_percentages=_language_percentages(
+            property_labels_results, language_codes
+        ),
+        value_label_percentages=_language_percentages(
+            value_labels_results, language_codes
+        ),
+        combined_percentages=_language_percentages(
+            property_labels_results + value_labels_results, language_codes
+        ),
+        missing_property_translations=missing_property_trans,
+        missing_value_translations=missing_value_trans,
+    )
+
+
+def output_results(
+    results: Iterable[MultilingualityResult],
+    output_format: str = "table",
+    output_file: Optional[str] = None,
+    show_missing: bool = False,
+) -> None:
+    """
+    Output results in the specified format.
+
+    Args:
+        results: MultilingualityResult objects, possibly produced lazily (e.g. by
+            a generator); they are written out one at a time.
+        output_format: Output format ('table', 'json', or 'csv').
+        output_file: Optional file path to write output to.
+        show_missing: Whether to show missing translations (for table format).
+    """
+    formatter = get_formatter(output_format)
+
+    if output_format == "table":
+        # For table format, use direct console output
+        for result in results:
+            print(f"\nFor Wikidata (Wikibase) item: {result.item_id}")
+            print_language_percentages(
+                result.property_label_percentages,
+                "Language Percentages for property labels",
+            )
+            if show_missing and result.missing_property_translations:
+                # Convert lists back to sets for display
+                missing_as_sets = {
+                    k: set(v) for k, v in result.missing_property_translations.items()
+                }
+                print_item_language_table(
+                    missing_as_sets, "Properties missing translation"
+                )
+
+            print_language_percentages(
+                result.value_label_percentages,
+                "Language Percentages for property value labels",
+            )
+            if show_missing and result.missing_value_translations:
+                missing_as_sets = {
+                    k: set(v) for k, v in result.missing_value_translations.items()
+                }
+                print_item_language_table(
+                    missing_as_sets, "Property values missing translation"
+                )
+
+            print_language_percentages(
+                result.combined_percentages,
+                "Combined Language Percentages for property label and property value labels",
+            )
+    else:
+        # For JSON/CSV formats, use formatter, writing results as they come
+        if output_file:
+            with open(output_file, "w", encoding="utf-8") as f:
+                formatter.write(results, f)
+            print(f"Results written to {output_file}")
+        else:
+            formatter.write(results, sys.stdout)
+            print()
@@ -0,0 +1,265 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+"""Keep-alive HTTP transport for synchronous SPARQL and Wikibase API requests."""
+
+import gzip
+import http.client
+import io
+import json
+import urllib.error
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode, urlsplit
+
+from SPARQLWrapper import JSON, SPARQLExceptions
+
+from .bindings import ACCEPT_HEADERS
+from .endpoint import EndpointConfig
+
+# Errors raised when the endpoint closed an idle keep-alive connection
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class SessionResult:
+    """Response of a `SparqlSession` query, readable as a stream or as JSON."""
+
+    def __init__(self, response: http.client.HTTPResponse):
+        """
+        Wrap a successful HTTP response.
+
+        Args:
+            response: The HTTP response, possibly gzip-encoded.
+        """
+        self.headers = response.headers
+        if (response.getheader("Content-Encoding") or "").lower() == "gzip":
+            self.response: Any = gzip.GzipFile(fileobj=response, mode="rb")
+        else:
+            self.response = response
+
+    def info(self) -> http.client.HTTPMessage:
+        """Return the response headers."""
+        return self.headers
+
+    def convert(self) -> Dict[str, Any]:
+        """Decode the whole response as JSON."""
+        return json.load(self.response)
+
+
+class HttpSession:
+    """
+    HTTP client keeping one connection to a host open across requests.
+
+    Responses are requested gzip-compressed unless disabled, and a connection the
+    server closed while idle is transparently replaced. Sessions are not
+    thread-safe; callers keep one per thread.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        agent: str,
+        timeout: float,
+        gzip: bool = True,
+        auth_header: Optional[str] = None,
+    ):
+        """
+        Initialize the session.
+
+        Args:
+            url: URL requests are sent to; its query string is kept in every request.
+            agent: User-Agent header sent with each request.
+            timeout: Timeout of a single request in seconds.
+            gzip: Whether to request gzip-compressed responses.
+            auth_header: Authorization header sent with each request, if any.
+        """
+        self.endpoint = url
+        self.agent = agent
+        self.timeout = timeout
+        self.gzip = gzip
+        self.auth_header = auth_header
+
+        parts = urlsplit(url)
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname or ""
+        self._port = parts.port
+        self._path = parts.path or "/"
+        self._base_params = parts.query
+
+        self._connection: Optional[http.client.HTTPConnection] = None
+        self._response: Optional[http.client.HTTPResponse] = None
+
+    def get(self, params: Dict[str, str], accept: str = "*/*") -> SessionResult:
+        """
+        Send a GET request with the given query parameters.
+
+        Args:
+            params: Query parameters added to those of the session URL.
+            accept: Accept header of the request.
+
+        Returns:
+            The successful response.
+
+        Raises:
+            urllib.error.HTTPError: For an HTTP error status.
+            OSError: If the host cannot be reached.
+        """
+        target = self._target(urlencode(params))
+        response = self._send("GET", target, None, self._headers(accept))
+        if response.status >= 400:
+            raise self._http_error(response, response.read())
+        return SessionResult(response)
+
+    def close(self) -> None:
+        """Close the connection; the next request opens a new one."""
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = None
+        self._response = None
+
+    def _headers(self, accept: str) -> Dict[str, str]:
+        headers = {"User-Agent": self.agent, "Accept": accept}
+        if self.gzip:
+            headers["Accept-Encoding"] = "gzip"
+        if self.auth_header:
+            headers["Authorization"] = self.auth_header
+        return headers
+
+    def _target(self, params: str = "") -> str:
+        query = "&".join(part for part in (self._base_params, params) if part)
+        return f"{self._path}?{query}" if query else self._path
+
+    def _http_error(
+        self, response: http.client.HTTPResponse, content: bytes
+    ) -> urllib.error.HTTPError:
+        return urllib.error.HTTPError(
+            self.endpoint,
+            response.status,
+            response.reason,
+            response.headers,
+            io.BytesIO(content),
+        )
+
+    def _send(
+        self,
+        method: str,
+        target: str,
+        body: Optional[bytes],
+        headers: Dict[str, str],
+    ) -> http.client.HTTPResponse:
+        self._finish_response()
+
+        while True:
+            reused = self._connection is not None
+            if self._connection is None:
+                self._connection = self._connect()
+            try:
+                self._connection.request(method, target, body=body, headers=headers)
+                self._response = self._connection.getresponse()
+                return self._response
+            except _STALE_CONNECTION_ERRORS:
+                self.close()
+                # Only an idle connection may have been closed by the server; retry
+                # once on a fresh one
+                if not reused:
+                    raise
+
+    def _connect(self) -> http.client.HTTPConnection:
+        connection_class = (
+            http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+        )
+        return connection_class(self._host, self._port, timeout=self.timeout)
+
+    def _finish_response(self) -> None:
+        # The previous response must be read to the end before the connection is reused
+        if self._response is not None and not self._response.isclosed():
+            try:
+                self._response.read()
+            except (OSError, http.client.HTTPException):
+                self.close()
+        self._response = None
+
+
+class SparqlSession(HttpSession):
+    """
+    SPARQL client keeping one HTTP connection open across queries.
+
+    It implements the part of SPARQLWrapper's interface used by `mlscores.query`
+    (`setQuery`, `setReturnFormat`, custom headers and `query`), so `safe_query` works
+    with either. Unlike SPARQLWrapper, the connection is reused between queries,
+    responses are requested gzip-compressed, and short queries are sent as GET so
+    that the endpoint's HTTP cache can answer repeated queries. Sessions are not
+    thread-safe; `mlscores.query` keeps one per thread.
+    """
+
+    def __init__(self, config: EndpointConfig, agent: str):
+        """
+        Initialize the session.
+
+        Args:
+            config: Endpoint URL, credentials and transport settings.
+            agent: User-Agent header sent with each request.
+        """
+        super().__init__(
+            config.url, agent, config.timeout, config.gzip, config.auth_header
+        )
+        self.config = config
+
+        self._query: Optional[str] = None
+        self._return_format = JSON
+        self._custom_headers: Dict[str, str] = {}
+
+    def setQuery(self, query: str) -> None:
+        """Set the query sent by the next call to `query`."""
+        self._query = query
+
+    def setReturnFormat(self, return_format: str) -> None:
+        """Set the result format requested when no Accept header is set."""
+        self._return_format = return_format
+
+    def addCustomHttpHeader(self, name: str, value: str) -> None:
+        """Send a header with every request, replacing the default of the same name."""
+        self._custom_headers[name] = value
+
+    def clearCustomHttpHeader(self, name: str) -> bool:
+        """Stop sending a custom header."""
+        return self._custom_headers.pop(name, None) is not None
+
+    def query(self) -> SessionResult:
+        """
+        Send the current query.
+
+        Returns:
+            The successful response.
+
+        Raises:
+            SPARQLExceptions.QueryBadFormed: If the endpoint rejects the query (400).
+            urllib.error.HTTPError: For any other HTTP error status.
+            OSError: If the endpoint cannot be reached.
+        """
+        params = urlencode({"query": self._query or ""})
+        headers = self._headers(ACCEPT_HEADERS.get(self._return_format, "*/*"))
+        headers.update(self._custom_headers)
+
+        if len(params) <= self.config.max_get_query_length:
+            method, target, body = "GET", self._target(params), None
+        else:
+            method, target, body = "POST", self._target(), params.encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        response = self._send(method, target, body, headers)
+
+        if response.status >= 400:
+            content = response.read()
+            if response.status == 400:
+                raise SPARQLExceptions.QueryBadFormed(content.decode("utf-8", "replace"))
+            raise self._http_error(response, content)
+
+        return SessionResult(response)
@@ -6,6 +6,7 @@
 
 """FastAPI application for mlscores web interface."""
 
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -13,6 +14,14 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
 from .routes import router
+from ..aquery import close_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release pooled SPARQL connections on shutdown."""
+    yield
+    await close_client()
 
 
 def create_app() -> FastAPI:
@@ -54,6 +63,7 @@ POST /api/scores
         docs_url="/api/docs",
         redoc_url="/api/redoc",
         openapi_url="/api/openapi.json",
+        lifespan=lifespan,
     )
 
     # Include API routes
@@ -112,6 +112,51 @@ class HealthResponse(BaseModel):
     endpoint: str
 
 
+class CacheStatsResponse(BaseModel):
+    """Query cache statistics."""
+
+    enabled: bool
+    cache_dir: str
+    backend: str = "files"
+    compress: bool = False
+    max_bytes: Optional[int] = None
+    max_entries: Optional[int] = None
+    ttl_seconds: int
+    total_entries: int = 0
+    valid_entries: int = 0
+    expired_entries: int = 0
+    total_size_bytes: int = 0
+    memory_entries: int = 0
+    memory_size_bytes: int = 0
+    memory_hits: int = 0
+    memory_misses: int = 0
+    memory_evictions: int = 0
+    disk_hits: int = 0
+    disk_misses: int = 0
+    disk_evictions: int = 0
+
+
+class CoalescingStatsResponse(BaseModel):
+    """Statistics of requests sharing computations and label queries."""
+
+    requests: int = Field(..., description="Item score requests received")
+    computations: int = Field(..., description="Item score computations run")
+    coalesced: int = Field(
+        ..., description="Requests answered by a computation already in flight"
+    )
+    in_flight: int = Field(..., description="Computations currently running")
+    label_lookups: int = Field(
+        0, description="Label lookups merged through label windows"
+    )
+    label_windows: int = Field(0, description="Label windows queried")
+    label_uris_requested: int = Field(
+        0, description="URIs requested by label lookups, counting repeats"
+    )
+    label_uris_queried: int = Field(
+        0, description="Distinct URIs queried by label windows"
+    )
+
+
 class EntitySearchResult(BaseModel):
     """Single entity search suggestion."""
 
@@ -6,6 +6,7 @@
 
 """FastAPI route definitions."""
 
+import asyncio
 import json
 import urllib.parse
 import urllib.request
@@ -20,16 +21,21 @@ from .models import (
     MissingTranslations,
     ErrorResponse,
     HealthResponse,
+    CacheStatsResponse,
+    CoalescingStatsResponse,
     EntitySearchResponse,
     EntitySearchResult,
 )
-from ..query import (
-    get_properties_and_values,
-    get_qualifier_properties_and_values,
-    get_reference_properties_and_values,
+from ..aquery import (
+    AsyncSparqlClient,
+    get_client,
+    get_endpoint_client,
+    get_statements,
     get_property_labels,
+    label_window_stats,
     get_value_labels,
 )
+from ..query import STATEMENT_SOURCES
 from ..scores import (
     calculate_language_percentages,
     calculate_language_percentage_for_languages,
@@ -37,10 +43,14 @@ from ..scores import (
     get_properties_without_translations_in_languages,
 )
 from ..cache import get_cache
-from ..constants import DEFAULT_SPARQL_ENDPOINT
+from ..endpoint import create_endpoint_config, get_known_endpoint
+from .singleflight import SingleFlight
 
 router = APIRouter()
 
+# Identical item score requests in flight at the same time share one computation
+item_scores_flight = SingleFlight()
+
 WIKIBASE_ENTITY_SEARCH_APIS = {
     "wikidata": "https://www.wikidata.org/w/api.php",
     "commons": "https://commons.wikimedia.org/w/api.php",
@@ -56,10 +66,27 @@ async def health_check():
         status="healthy",
         version="0.1.0",
         cache_enabled=cache.enabled,
-        endpoint=DEFAULT_SPARQL_ENDPOINT,
+        endpoint=get_client().endpoint,
     )
 
 
+@router.get("/cache", response_model=CacheStatsResponse, tags=["System"])
+async def cache_stats():
+    """Get query cache statistics."""
+    return CacheStatsResponse(**get_cache().stats())
+
+
+@router.get(
+    "/coalescing", response_model=CoalescingStatsResponse, tags=["System"]
+)
+async def coalescing_stats():
+    """Get statistics of requests coalesced with identical ones or label windows."""
+    stats = item_scores_flight.stats()
+    for name, value in label_window_stats().items():
+        stats[f"label_{name}"] = value
+    return CoalescingStatsResponse(**stats)
+
+
 @router.post(
     "/scores",
     response_model=MultilingualityResponse,
@@ -75,21 +102,33 @@ async def calculate_scores(request: MultilingualityRequest):
     - **identifiers**: List of Wikidata item IDs (e.g., Q42, Q5)
     - **languages**: Optional list of language codes to filter results
     - **include_missing**: Include missing translation details
+    - **endpoint**, **endpoint_url**: Named endpoint preset or SPARQL endpoint URL
+      (default: the server's endpoint)
     """
     results = []
+    client = _request_client(request.endpoint, request.endpoint_url)
+
+    # Items are scored concurrently; errors are reported in input order. The client
+    # is held so that it is not closed if evicted by requests to other endpoints
+    async with client.in_use():
+        item_results = await asyncio.gather(
+            *(
+                _calculate_item_scores(
+                    item_id, request.languages, request.include_missing, client
+                )
+                for item_id in request.identifiers
+            ),
+            return_exceptions=True,
+        )
 
-    for item_id in request.identifiers:
-        try:
-            item_result = _calculate_item_scores(
-                item_id, request.languages, request.include_missing
-            )
-            results.append(item_result)
-        except ValueError as e:
-            raise HTTPException(status_code=404, detail=str(e))
-        except Exception as e:
+    for item_id, item_result in zip(request.identifiers, item_results):
+        if isinstance(item_result, ValueError):
+            raise HTTPException(status_code=404, detail=str(item_result))
+        if isinstance(item_result, Exception):
             raise HTTPException(
-                status_code=500, detail=f"Error processing {item_id}: {str(e)}"
+                status_code=500, detail=f"Error processing {item_id}: {str(item_result)}"
             )
+        results.append(item_result)
 
     return MultilingualityResponse(success=True, results=results)
 
@@ -185,38 +224,67 @@ async def get_item_scores(
     - **include_missing**: Include missing translation details
     """
     try:
-        return _calculate_item_scores(item_id, languages, include_missing)
+        return await _calculate_item_scores(item_id, languages, include_missing)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
-def _calculate_item_scores(
+def _request_client(
+    endpoint: Optional[str], endpoint_url: Optional[str]
+) -> AsyncSparqlClient:
+    """Get the client of the endpoint a request names, or the server's client."""
+    if endpoint_url:
+        if not endpoint_url.startswith(("http://", "https://")):
+            raise HTTPException(
+                status_code=400, detail="endpoint_url must be an HTTP(S) URL"
+            )
+        config = create_endpoint_config(url=endpoint_url)
+    elif endpoint:
+        config = get_known_endpoint(endpoint)
+        if config is None:
+            raise HTTPException(status_code=400, detail=f"Unknown endpoint: {endpoint}")
+    else:
+        return get_client()
+    return get_endpoint_client(config)
+
+
+async def _calculate_item_scores(
+    item_id: str,
+    languages: Optional[List[str]],
+    include_missing: bool,
+    client: Optional[AsyncSparqlClient] = None,
+) -> ItemResult:
+    """Calculate the scores of an item, sharing identical computations in flight."""
+    if client is None:
+        client = get_client()
+    key = (
+        client.cache_namespace,
+        item_id,
+        tuple(languages) if languages else None,
+        include_missing,
+    )
+    return await item_scores_flight.do(
+        key, lambda: _compute_item_scores(item_id, languages, include_missing, client)
+    )
+
+
+async def _compute_item_scores(
     item_id: str,
     languages: Optional[List[str]],
     include_missing: bool,
+    client: AsyncSparqlClient,
 ) -> ItemResult:
     """Internal function to calculate scores for an item."""
 
-    # Get properties and values
-    properties_values = get_properties_and_values(item_id)
+    # Get properties and values, with qualifier and reference properties
+    statements = await get_statements(item_id, client)
 
-    if not properties_values:
+    if not statements:
         raise ValueError(f"No properties found for item {item_id}")
 
-    # Get qualifier and reference properties
-    qualifier_results = get_qualifier_properties_and_values(item_id)
-    reference_results = get_reference_properties_and_values(item_id)
-
     # Combine results
-    bindings = properties_values["results"]["bindings"]
-    if qualifier_results:
-        bindings.extend(qualifier_results["results"]["bindings"])
-    if reference_results:
-        bindings.extend(reference_results["results"]["bindings"])
-
-    # Extract URIs
     property_value_pairs = [
-        (result["property"]["value"], result["value"]["value"]) for result in bindings
+        pair for source in STATEMENT_SOURCES for pair in statements[source]
     ]
 
     property_uris = list(set(pv[0] for pv in property_value_pairs))
@@ -225,8 +293,10 @@ def _calculate_item_scores(
     )
 
     # Get labels
-    property_labels_results = get_property_labels(property_uris)
-    value_labels_results = get_value_labels(value_uris)
+    property_labels_results, value_labels_results = await asyncio.gather(
+        get_property_labels(property_uris, client, languages),
+        get_value_labels(value_uris, client, languages),
+    )
 
     # Calculate percentages
     if languages:
@@ -0,0 +1,64 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+"""Coalescing of identical computations running at the same time."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Run at most one computation per key at a time.
+
+    Callers asking for a key whose computation is in flight await that computation
+    instead of starting their own, and all of them get its result or exception.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        """
+        Return the result of `compute()`, sharing it with concurrent calls for `key`.
+
+        Args:
+            key: Identifies computations with the same result.
+            compute: Starts the computation when none is in flight for `key`.
+
+        Returns:
+            The result of the computation.
+        """
+        self.requests += 1
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        # A cancelled caller (e.g. a closed connection) must not cancel the others
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved when every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of requests, computations run and requests coalesced."""
+        return {
+            "requests": self.requests,
+            "computations": self.requests - self.coalesced,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,145 @@
+"""Adaptive label batch sizing shared by FastAPI and Pyodide runtimes."""
+
+import logging
+import threading
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("mlscores.batching")
+
+
+class AdaptiveBatcher:
+    """
+    Choose how many URIs go into each label query from observed responses.
+
+    The batch size moves along a doubling/halving ladder between `min_size` and
+    `max_size`. It halves when a query fails, takes longer than the target latency
+    band, or returns more rows (or bytes) than allowed, and doubles after `grow_after`
+    consecutive full batches that finished faster than the band. Staying on the
+    ladder keeps batch boundaries stable between runs, which helps the query cache.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_size: int = 100,
+        min_size: int = 25,
+        max_size: int = 400,
+        target_seconds: Tuple[float, float] = (1.0, 5.0),
+        max_rows: int = 20000,
+        max_bytes: Optional[int] = None,
+        grow_after: int = 3,
+    ):
+        self.name = name
+        self.initial_size = initial_size
+        self.min_size = max(min_size, 1)
+        self.max_size = max(max_size, self.min_size)
+        self.target_seconds = target_seconds
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.grow_after = grow_after
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all observations and return to the initial batch size."""
+        with self._lock:
+            self.size = self._clamp(self.initial_size)
+            self.rows_per_uri: Optional[float] = None
+            self.bytes_per_uri: Optional[float] = None
+            self._fast_batches = 0
+
+    def batches(self, uris: List[str]) -> Iterator[List[str]]:
+        """Yield consecutive batches of URIs, using the current size for each batch."""
+        start = 0
+        while start < len(uris):
+            size = self.size
+            yield uris[start : start + size]
+            start += size
+
+    def record(
+        self,
+        batch_size: int,
+        rows: Optional[int],
+        seconds: float,
+        num_bytes: Optional[int] = None,
+    ) -> None:
+        """
+        Record the outcome of a label query and adjust the batch size.
+
+        Args:
+            batch_size: Number of URIs in the query.
+            rows: Number of result rows, or None if the query failed.
+            seconds: Wall time of the query.
+            num_bytes: Size of the response body, if known.
+        """
+        with self._lock:
+            if rows is None:
+                self._shrink()
+                reason = "failed"
+            else:
+                self.rows_per_uri = self._average(self.rows_per_uri, rows / batch_size)
+                if num_bytes is not None:
+                    self.bytes_per_uri = self._average(
+                        self.bytes_per_uri, num_bytes / batch_size
+                    )
+                reason = self._adjust(batch_size, seconds)
+
+            logger.debug(
+                "%s labels: %d URIs, %s rows, %s bytes in %.2fs (%.0f URIs/s, %s); "
+                "next batch size %d",
+                self.name,
+                batch_size,
+                "-" if rows is None else rows,
+                "-" if num_bytes is None else num_bytes,
+                seconds,
+                batch_size / seconds if seconds > 0 else float("inf"),
+                reason,
+                self.size,
+            )
+
+    def _adjust(self, batch_size: int, seconds: float) -> str:
+        low, high = self.target_seconds
+
+        if seconds > high:
+            self._shrink()
+            return "slow"
+        if self._too_large(self.size):
+            self._shrink()
+            return "too many rows"
+
+        # Only full batches faster than the band tell us a larger batch is safe
+        if seconds < low and batch_size >= self.size and not self._too_large(self.size * 2):
+            self._fast_batches += 1
+            if self._fast_batches >= self.grow_after:
+                self.size = self._clamp(self.size * 2)
+                self._fast_batches = 0
+                return "fast"
+            return "fast, waiting"
+
+        self._fast_batches = 0
+        return "on target"
+
+    def _too_large(self, size: int) -> bool:
+        if self.rows_per_uri is not None and size * self.rows_per_uri > self.max_rows:
+            return True
+        if (
+            self.max_bytes is not None
+            and self.bytes_per_uri is not None
+            and size * self.bytes_per_uri > self.max_bytes
+        ):
+            return True
+        return False
+
+    def _shrink(self) -> None:
+        self.size = self._clamp(self.size // 2)
+        self._fast_batches = 0
+
+    def _clamp(self, size: int) -> int:
+        return min(max(size, self.min_size), self.max_size)
+
+    @staticmethod
+    def _average(previous: Optional[float], value: float) -> float:
+        # Exponential moving average, so that recent batches weigh more
+        if previous is None:
+            return value
+        return 0.7 * previous + 0.3 * value
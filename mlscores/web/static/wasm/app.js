@@ -192,20 +192,23 @@ async function initPyodideRuntime() {
   setStatus("Initializing Pyodide runtime...");
   state.pyodide = await loadPyodide();
 
-  setStatus("Loading shared query builders...");
-  const buildersResponse = await fetch("./query_builders.py");
-  if (!buildersResponse.ok) {
-    throw new Error("Failed to load query_builders.py");
-  }
-  const buildersCode = await buildersResponse.text();
-  state.pyodide.globals.set("query_builders_code", buildersCode);
-  await state.pyodide.runPythonAsync(`
+  setStatus("Loading shared modules...");
+  for (const moduleName of ["query_builders", "adaptive_batching"]) {
+    const moduleResponse = await fetch(`./${moduleName}.py`);
+    if (!moduleResponse.ok) {
+      throw new Error(`Failed to load ${moduleName}.py`);
+    }
+    const moduleCode = await moduleResponse.text();
+    state.pyodide.globals.set("shared_module_name", moduleName);
+    state.pyodide.globals.set("shared_module_code", moduleCode);
+    await state.pyodide.runPythonAsync(`
 import sys
 import types
-_mod = types.ModuleType("query_builders")
-exec(query_builders_code, _mod.__dict__)
-sys.modules["query_builders"] = _mod
+_mod = types.ModuleType(shared_module_name)
+exec(shared_module_code, _mod.__dict__)
+sys.modules[shared_module_name] = _mod
 `);
+  }
 
   setStatus("Loading mlscores WASM module...");
   const response = await fetch("./mlscores_wasm.py");
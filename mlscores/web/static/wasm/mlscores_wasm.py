@@ -1,9 +1,13 @@
 import json
+import time
 import urllib.parse
 from typing import Dict, List, Optional, Set, Tuple
 
 from pyodide.http import pyfetch
+from adaptive_batching import AdaptiveBatcher
 from query_builders import (
+    STATEMENT_SOURCES,
+    build_statements_query,
     build_properties_and_values_query,
     build_qualifier_properties_and_values_query,
     build_reference_properties_and_values_query,
@@ -11,7 +15,9 @@ from query_builders import (
     build_value_labels_query,
 )
 
-BATCH_SIZE = 25
+# Browsers hit the endpoint directly, so start small and let responses grow batches
+property_label_batcher = AdaptiveBatcher("property", initial_size=25)
+value_label_batcher = AdaptiveBatcher("value", initial_size=25)
 
 PROPERTY_PREFIX = "http://www.wikidata.org/prop/direct/"
 ENTITY_PREFIX = "http://www.wikidata.org/entity/"
@@ -38,6 +44,18 @@ async def sparql_query(endpoint: str, query: str) -> Dict:
     return await response.json()
 
 
+async def label_batch_query(endpoint: str, query: str, batcher: AdaptiveBatcher, batch_size: int) -> Dict:
+    start = time.perf_counter()
+    try:
+        data = await sparql_query(endpoint, query)
+    except Exception:
+        batcher.record(batch_size, None, time.perf_counter() - start)
+        raise
+    rows = len(data.get("results", {}).get("bindings", []))
+    batcher.record(batch_size, rows, time.perf_counter() - start)
+    return data
+
+
 async def get_properties_and_values(item_id: str, endpoint: str) -> Dict:
     query = build_properties_and_values_query(item_id)
     return await sparql_query(endpoint, query)
@@ -53,14 +71,27 @@ async def get_reference_properties_and_values(item_id: str, endpoint: str) -> Di
     return await sparql_query(endpoint, query)
 
 
-async def get_property_labels(property_uris: List[str], endpoint: str) -> List[PropertyTuple]:
+async def get_statements(item_id: str, endpoint: str) -> Dict[str, List[Tuple[str, str]]]:
+    query = build_statements_query(item_id)
+    data = await sparql_query(endpoint, query)
+
+    pairs: Dict[str, List[Tuple[str, str]]] = {source: [] for source in STATEMENT_SOURCES}
+    for row in data.get("results", {}).get("bindings", []):
+        pairs[row["source"]["value"]].append((row["property"]["value"], row["value"]["value"]))
+    return pairs
+
+
+async def get_property_labels(
+    property_uris: List[str],
+    endpoint: str,
+    languages: Optional[List[str]] = None,
+) -> List[PropertyTuple]:
     filtered = sorted({uri for uri in property_uris if uri.startswith(PROPERTY_PREFIX)})
     rows = []
 
-    for i in range(0, len(filtered), BATCH_SIZE):
-        batch = filtered[i : i + BATCH_SIZE]
-        query = build_property_labels_query(batch)
-        data = await sparql_query(endpoint, query)
+    for batch in property_label_batcher.batches(filtered):
+        query = build_property_labels_query(batch, languages)
+        data = await label_batch_query(endpoint, query, property_label_batcher, len(batch))
         rows.extend(data.get("results", {}).get("bindings", []))
 
     return [
@@ -73,14 +104,17 @@ async def get_property_labels(property_uris: List[str], endpoint: str) -> List[P
     ]
 
 
-async def get_value_labels(value_uris: List[str], endpoint: str) -> List[PropertyTuple]:
+async def get_value_labels(
+    value_uris: List[str],
+    endpoint: str,
+    languages: Optional[List[str]] = None,
+) -> List[PropertyTuple]:
     filtered = sorted({uri for uri in value_uris if uri.startswith(ITEM_PREFIX)})
     rows = []
 
-    for i in range(0, len(filtered), BATCH_SIZE):
-        batch = filtered[i : i + BATCH_SIZE]
-        query = build_value_labels_query(batch)
-        data = await sparql_query(endpoint, query)
+    for batch in value_label_batcher.batches(filtered):
+        query = build_value_labels_query(batch, languages)
+        data = await label_batch_query(endpoint, query, value_label_batcher, len(batch))
         rows.extend(data.get("results", {}).get("bindings", []))
 
     return [
@@ -162,22 +196,16 @@ async def calculate_item_scores(
     languages: Optional[List[str]],
     include_missing: bool,
 ) -> Dict:
-    properties_values = await get_properties_and_values(item_id, endpoint)
-    bindings = properties_values.get("results", {}).get("bindings", [])
-    if not bindings:
+    statements = await get_statements(item_id, endpoint)
+    if not statements["direct"]:
         raise ValueError(f"No properties found for item {item_id}")
 
-    qualifiers = await get_qualifier_properties_and_values(item_id, endpoint)
-    references = await get_reference_properties_and_values(item_id, endpoint)
-    bindings.extend(qualifiers.get("results", {}).get("bindings", []))
-    bindings.extend(references.get("results", {}).get("bindings", []))
-
-    pairs = [(row["property"]["value"], row["value"]["value"]) for row in bindings]
+    pairs = [pair for source in STATEMENT_SOURCES for pair in statements[source]]
     property_uris = sorted({prop for prop, _ in pairs})
     value_uris = sorted({value for _, value in pairs if value.startswith("http")})
 
-    property_labels = await get_property_labels(property_uris, endpoint)
-    value_labels = await get_value_labels(value_uris, endpoint)
+    property_labels = await get_property_labels(property_uris, endpoint, languages)
+    value_labels = await get_value_labels(value_uris, endpoint, languages)
 
     if languages:
         property_percentages = calculate_language_percentage_for_languages(property_labels, languages)
@@ -1,24 +1,43 @@
 """Shared SPARQL query builders used by FastAPI and Pyodide runtimes."""
 
-from typing import List
+from typing import List, Optional
+
+# Source tags of the combined statements query, in the order they are reported
+STATEMENT_SOURCES = ("direct", "qualifier", "reference")
+
+# Entity URI prefix of Wikidata, the default of the item queries
+WIKIDATA_ENTITY_PREFIX = "http://www.wikidata.org/entity/"
 
 
 def build_values_clause(uris: List[str]) -> str:
     return " ".join([f"(<{uri}>)" for uri in uris])
 
 
-def build_properties_and_values_query(item_id: str) -> str:
+def build_language_filter(label_variable: str, languages: Optional[List[str]]) -> str:
+    """Restrict a label variable to the given languages (no filter if none are given)."""
+    if not languages:
+        return ""
+    escaped = [lang.replace("\\", "\\\\").replace('"', '\\"') for lang in languages]
+    language_list = ", ".join(f'"{lang}"' for lang in escaped)
+    return f"FILTER(LANG(?{label_variable}) IN ({language_list}))"
+
+
+def build_properties_and_values_query(
+    item_id: str, entity_prefix: str = WIKIDATA_ENTITY_PREFIX
+) -> str:
     return f"""
-    PREFIX wd: <http://www.wikidata.org/entity/>
+    PREFIX wd: <{entity_prefix}>
     SELECT ?property ?value WHERE {{
       wd:{item_id} ?property ?value .
     }}
     """
 
 
-def build_qualifier_properties_and_values_query(item_id: str) -> str:
+def build_qualifier_properties_and_values_query(
+    item_id: str, entity_prefix: str = WIKIDATA_ENTITY_PREFIX
+) -> str:
     return f"""
-    PREFIX wd: <http://www.wikidata.org/entity/>
+    PREFIX wd: <{entity_prefix}>
     PREFIX wikibase: <http://wikiba.se/ontology#>
     SELECT DISTINCT ?property ?value WHERE {{
       wd:{item_id} ?p ?statement .
@@ -30,9 +49,11 @@ def build_qualifier_properties_and_values_query(item_id: str) -> str:
     """
 
 
-def build_reference_properties_and_values_query(item_id: str) -> str:
+def build_reference_properties_and_values_query(
+    item_id: str, entity_prefix: str = WIKIDATA_ENTITY_PREFIX
+) -> str:
     return f"""
-    PREFIX wd: <http://www.wikidata.org/entity/>
+    PREFIX wd: <{entity_prefix}>
     PREFIX wikibase: <http://wikiba.se/ontology#>
     PREFIX prov: <http://www.w3.org/ns/prov#>
     SELECT DISTINCT ?property ?value WHERE {{
@@ -46,8 +67,89 @@ def build_reference_properties_and_values_query(item_id: str) -> str:
     """
 
 
-def build_property_labels_query(property_uris: List[str]) -> str:
+def build_statements_query(
+    item_id: str, entity_prefix: str = WIKIDATA_ENTITY_PREFIX
+) -> str:
+    return f"""
+    PREFIX wd: <{entity_prefix}>
+    PREFIX wikibase: <http://wikiba.se/ontology#>
+    PREFIX prov: <http://www.w3.org/ns/prov#>
+    SELECT ?source ?property ?value WHERE {{
+      {{
+        wd:{item_id} ?property ?value .
+        BIND("direct" AS ?source)
+      }}
+      UNION
+      {{
+        SELECT DISTINCT ("qualifier" AS ?source) ?property ?value WHERE {{
+          wd:{item_id} ?p ?statement .
+          ?statement ?pq ?qualifierValue .
+          ?qualifierProperty wikibase:qualifier ?pq .
+          BIND(?qualifierProperty AS ?property)
+          BIND(?qualifierValue AS ?value)
+        }}
+      }}
+      UNION
+      {{
+        SELECT DISTINCT ("reference" AS ?source) ?property ?value WHERE {{
+          wd:{item_id} ?p ?statement .
+          ?statement prov:wasDerivedFrom ?referenceNode .
+          ?referenceNode ?pr ?referenceValue .
+          ?referenceProperty wikibase:reference ?pr .
+          BIND(?referenceProperty AS ?property)
+          BIND(?referenceValue AS ?value)
+        }}
+      }}
+    }}
+    """
+
+
+def build_items_statements_query(
+    item_ids: List[str], entity_prefix: str = WIKIDATA_ENTITY_PREFIX
+) -> str:
+    items_clause = " ".join(f"wd:{item_id}" for item_id in item_ids)
+    return f"""
+    PREFIX wd: <{entity_prefix}>
+    PREFIX wikibase: <http://wikiba.se/ontology#>
+    PREFIX prov: <http://www.w3.org/ns/prov#>
+    SELECT ?item ?source ?property ?value WHERE {{
+      {{
+        VALUES ?item {{ {items_clause} }}
+        ?item ?property ?value .
+        BIND("direct" AS ?source)
+      }}
+      UNION
+      {{
+        SELECT DISTINCT ?item ("qualifier" AS ?source) ?property ?value WHERE {{
+          VALUES ?item {{ {items_clause} }}
+          ?item ?p ?statement .
+          ?statement ?pq ?qualifierValue .
+          ?qualifierProperty wikibase:qualifier ?pq .
+          BIND(?qualifierProperty AS ?property)
+          BIND(?qualifierValue AS ?value)
+        }}
+      }}
+      UNION
+      {{
+        SELECT DISTINCT ?item ("reference" AS ?source) ?property ?value WHERE {{
+          VALUES ?item {{ {items_clause} }}
+          ?item ?p ?statement .
+          ?statement prov:wasDerivedFrom ?referenceNode .
+          ?referenceNode ?pr ?referenceValue .
+          ?referenceProperty wikibase:reference ?pr .
+          BIND(?referenceProperty AS ?property)
+          BIND(?referenceValue AS ?value)
+        }}
+      }}
+    }}
+    """
+
+
+def build_property_labels_query(
+    property_uris: List[str], languages: Optional[List[str]] = None
+) -> str:
     values_clause = build_values_clause(property_uris)
+    language_filter = build_language_filter("propertyLabel", languages)
     return f"""
     PREFIX wikibase: <http://wikiba.se/ontology#>
     PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
@@ -56,14 +158,35 @@ def build_property_labels_query(property_uris: List[str]) -> str:
       OPTIONAL {{
         ?property wikibase:directClaim ?p ;
                   rdfs:label ?propertyLabel .
+        {language_filter}
         BIND(LANG(?propertyLabel) AS ?propertyLabelLang)
       }}
     }}
     """
 
 
-def build_value_labels_query(value_uris: List[str]) -> str:
+def build_property_label_languages_query(limit: int, offset: int = 0) -> str:
+    return f"""
+    PREFIX wikibase: <http://wikiba.se/ontology#>
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    SELECT ?p ?lang WHERE {{
+      ?property wikibase:directClaim ?p .
+      OPTIONAL {{
+        ?property rdfs:label ?propertyLabel .
+        BIND(LANG(?propertyLabel) AS ?lang)
+      }}
+    }}
+    ORDER BY ?p ?lang
+    LIMIT {limit}
+    OFFSET {offset}
+    """
+
+
+def build_value_labels_query(
+    value_uris: List[str], languages: Optional[List[str]] = None
+) -> str:
     values_clause = build_values_clause(value_uris)
+    language_filter = build_language_filter("valueLabel", languages)
     return f"""
     PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
     SELECT ?v ?valueLabel ?valueLabelLang WHERE {{
@@ -71,7 +194,49 @@ def build_value_labels_query(value_uris: List[str]) -> str:
       OPTIONAL {{
         FILTER(isIRI(?v))
         ?v rdfs:label ?valueLabel .
+        {language_filter}
         BIND(LANG(?valueLabel) AS ?valueLabelLang)
       }}
     }}
     """
+
+
+def build_property_label_counts_query(
+    property_uris: List[str], languages: Optional[List[str]] = None
+) -> str:
+    values_clause = build_values_clause(property_uris)
+    language_filter = build_language_filter("propertyLabel", languages)
+    return f"""
+    PREFIX wikibase: <http://wikiba.se/ontology#>
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    SELECT ?lang (COUNT(DISTINCT ?p) AS ?count) WHERE {{
+      VALUES (?p) {{ {values_clause} }}
+      OPTIONAL {{
+        ?property wikibase:directClaim ?p ;
+                  rdfs:label ?propertyLabel .
+        {language_filter}
+        BIND(LANG(?propertyLabel) AS ?lang)
+      }}
+    }}
+    GROUP BY ?lang
+    """
+
+
+def build_value_label_counts_query(
+    value_uris: List[str], languages: Optional[List[str]] = None
+) -> str:
+    values_clause = build_values_clause(value_uris)
+    language_filter = build_language_filter("valueLabel", languages)
+    return f"""
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    SELECT ?lang (COUNT(DISTINCT ?v) AS ?count) WHERE {{
+      VALUES (?v) {{ {values_clause} }}
+      OPTIONAL {{
+        FILTER(isIRI(?v))
+        ?v rdfs:label ?valueLabel .
+        {language_filter}
+        BIND(LANG(?valueLabel) AS ?lang)
+      }}
+    }}
+    GROUP BY ?lang
+    """
@@ -0,0 +1,160 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+"""Label resolution through the Wikibase Action API (`wbgetentities`)."""
+
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+from .bindings import Row
+from .transport import HttpSession, SessionResult
+
+
+def entity_id(uri: str) -> str:
+    """
+    Return the entity ID at the end of an entity or property URI.
+
+    Args:
+        uri: A URI such as http://www.wikidata.org/entity/Q5 or
+            http://www.wikidata.org/prop/direct/P31.
+
+    Returns:
+        The entity ID (e.g. "Q5" or "P31").
+    """
+    return uri.rstrip("/").rsplit("/", 1)[-1]
+
+
+def build_wbgetentities_params(
+    ids: Sequence[str], languages: Optional[List[str]] = None
+) -> Dict[str, str]:
+    """
+    Build the query parameters of a `wbgetentities` request for entity labels.
+
+    Args:
+        ids: The entity IDs, at most `WBGETENTITIES_MAX_IDS` of them.
+        languages: Only fetch labels in these languages (default: all languages).
+
+    Returns:
+        The request parameters.
+    """
+    params = {
+        "action": "wbgetentities",
+        "ids": "|".join(ids),
+        "props": "labels",
+        "format": "json",
+        "formatversion": "2",
+        # Labels of the redirect target are not labels of the requested URI
+        "redirects": "no",
+    }
+    # The API limits multi-valued parameters to 50 values; longer language lists
+    # are filtered after the response instead
+    if languages and len(languages) <= 50:
+        params["languages"] = "|".join(languages)
+    return params
+
+
+def entity_label_rows(
+    uris: Sequence[str],
+    document: Dict[str, Any],
+    languages: Optional[List[str]] = None,
+) -> List[Row]:
+    """
+    Turn a `wbgetentities` response into the rows of a SPARQL labels query.
+
+    Like the SPARQL label queries, every URI gets one row per label, or a single
+    row with no label and no language if it has none in the requested languages
+    (including entities that do not exist).
+
+    Args:
+        uris: The URIs whose entity IDs were requested.
+        document: The decoded JSON response.
+        languages: Only keep labels in these languages (default: all languages).
+
+    Returns:
+        (URI, label, language) rows, with None for a missing label or language.
+
+    Raises:
+        ValueError: If the API answered with an error.
+    """
+    if "error" in document:
+        error = document["error"]
+        raise ValueError(f"Wikibase API error: {error.get('code')}: {error.get('info')}")
+
+    entities = document.get("entities", {})
+    rows: List[Row] = []
+    for uri in uris:
+        labels = entities.get(entity_id(uri), {}).get("labels") or {}
+        entity_rows = [
+            (uri, label["value"], label.get("language", lang))
+            for lang, label in labels.items()
+            if not languages or lang in languages
+        ]
+        rows.extend(entity_rows or [(uri, None, None)])
+    return rows
+
+
+class WikibaseApiSession(HttpSession):
+    """
+    Keep-alive session sending `wbgetentities` requests to a Wikibase API.
+
+    Like `SparqlSession`, the request is set first and sent by `query`, so the
+    rate-limited retry loop of `mlscores.query` runs either kind of session.
+    """
+
+    def __init__(self, url: str, agent: str, timeout: float, gzip: bool = True):
+        """
+        Initialize the session.
+
+        Args:
+            url: URL of the API (api.php).
+            agent: User-Agent header sent with each request.
+            timeout: Timeout of a single request in seconds.
+            gzip: Whether to request gzip-compressed responses.
+        """
+        super().__init__(url, agent, timeout, gzip)
+        self._params: Dict[str, str] = {}
+
+    def setEntities(
+        self, ids: Sequence[str], languages: Optional[List[str]] = None
+    ) -> None:
+        """Set the entities whose labels are fetched by the next call to `query`."""
+        self._params = build_wbgetentities_params(ids, languages)
+
+    def query(self) -> SessionResult:
+        """
+        Send the current request.
+
+        Returns:
+            The successful response.
+
+        Raises:
+            urllib.error.HTTPError: For an HTTP error status.
+            OSError: If the API cannot be reached.
+        """
+        return self.get(self._params, accept="application/json")
+
+    def __str__(self) -> str:
+        return f"{self.endpoint}?{'&'.join(f'{k}={v}' for k, v in self._params.items())}"
+
+
+def read_entity_labels(
+    result: SessionResult, uris: Sequence[str], languages: Optional[List[str]] = None
+) -> List[Row]:
+    """
+    Read the labels of a `wbgetentities` response.
+
+    Args:
+        result: The response of a `WikibaseApiSession` query.
+        uris: The URIs whose entity IDs were requested.
+        languages: Only keep labels in these languages (default: all languages).
+
+    Returns:
+        (URI, label, language) rows, with None for a missing label or language.
+
+    Raises:
+        ValueError: If the response is not valid JSON or reports an API error.
+    """
+    return entity_label_rows(uris, json.load(result.response), languages)
@@ -29,6 +29,7 @@ setup(
             "fastapi>=0.100.0",
             "uvicorn>=0.23.0",
             "pydantic>=2.0.0",
+            "httpx>=0.24.0",
         ],
     },
     python_requires=">=3.8",
@@ -12,6 +12,45 @@ import pytest
 # Add the parent directory (project root) to sys.path so that pytest can find my_package
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from mlscores.cache import configure_cache
+from mlscores.properties import configure_property_tables
+from mlscores.query import property_label_batcher, value_label_batcher
+from mlscores.ratelimit import configure_rate_limit
+
+
+@pytest.fixture(autouse=True)
+def disable_query_cache():
+    """Keep tests independent of each other and of the user's query cache."""
+    configure_cache(enabled=False)
+    yield
+    configure_cache(enabled=False)
+
+
+@pytest.fixture(autouse=True)
+def disable_property_tables():
+    """Do not answer property labels from the user's property label tables."""
+    configure_property_tables(enabled=False)
+    yield
+    configure_property_tables(enabled=False)
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiters():
+    """Do not let a simulated rate limit slow down later tests."""
+    configure_rate_limit()
+    yield
+    configure_rate_limit()
+
+
+@pytest.fixture(autouse=True)
+def reset_label_batchers():
+    """Start every test from the initial label batch sizes."""
+    property_label_batcher.reset()
+    value_label_batcher.reset()
+    yield
+    property_label_batcher.reset()
+    value_label_batcher.reset()
+
 
 @pytest.fixture
 def sample_properties():
@@ -43,6 +82,25 @@ def sample_sparql_response():
     }
 
 
+@pytest.fixture
+def sample_statements():
+    """Sample (property, value) pairs grouped by source, as returned by get_statements."""
+    return {
+        "direct": [
+            (
+                "http://www.wikidata.org/prop/direct/P31",
+                "http://www.wikidata.org/entity/Q5",
+            ),
+            (
+                "http://www.wikidata.org/prop/direct/P21",
+                "http://www.wikidata.org/entity/Q6581097",
+            ),
+        ],
+        "qualifier": [],
+        "reference": [],
+    }
+
+
 @pytest.fixture
 def sample_property_labels_response():
     """Sample property labels SPARQL response."""
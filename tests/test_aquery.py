@@ -0,0 +1,423 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+import asyncio
+import re
+import time
+import urllib.parse
+from unittest.mock import patch
+
+import httpx
+
+from mlscores.aquery import (
+    AsyncSparqlClient,
+    EndpointClient,
+    configure_client,
+    get_client,
+    get_endpoint_client,
+    get_properties_and_values,
+    get_property_labels,
+    get_value_labels,
+)
+from mlscores.constants import (
+    WIKIDATA_PROPERTY_PREFIX,
+    WIKIDATA_ITEM_PREFIX,
+    DEFAULT_NO_LABEL,
+    MAX_ENDPOINT_CLIENTS,
+)
+from mlscores.endpoint import KNOWN_ENDPOINTS, EndpointConfig, create_endpoint_config
+
+
+def _query_text(request: httpx.Request) -> str:
+    """Extract the SPARQL query from a form-encoded request."""
+    form = urllib.parse.parse_qs(request.content.decode())
+    return form["query"][0]
+
+
+def _run_with_client(handler, coroutine_factory, **client_options):
+    """Run a coroutine against a client backed by a mock transport."""
+
+    async def run():
+        transport = httpx.MockTransport(handler)
+        async with AsyncSparqlClient(transport=transport, **client_options) as client:
+            return await coroutine_factory(client)
+
+    return asyncio.run(run())
+
+
+class TestAsyncSparqlClient:
+    """Tests for the AsyncSparqlClient query method."""
+
+    def test_query_success(self, sample_sparql_response):
+        """Test that a successful response is decoded as JSON."""
+
+        def handler(request):
+            return httpx.Response(200, json=sample_sparql_response)
+
+        result = _run_with_client(
+            handler, lambda client: get_properties_and_values("Q42", client)
+        )
+        assert result == sample_sparql_response
+
+    def test_query_sends_item_in_query(self):
+        """Test that the item identifier is sent in the query body."""
+        queries = []
+
+        def handler(request):
+            queries.append(_query_text(request))
+            return httpx.Response(200, json={"results": {"bindings": []}})
+
+        _run_with_client(handler, lambda client: get_properties_and_values("Q42", client))
+        assert "wd:Q42" in queries[0]
+
+    @patch("mlscores.aquery.asyncio.sleep")
+    def test_query_retries_on_429(self, mock_sleep):
+        """Test retry behavior on rate limit (429) error."""
+        responses = [
+            httpx.Response(429),
+            httpx.Response(200, json={"results": {"bindings": []}}),
+        ]
+
+        result = _run_with_client(
+            lambda request: responses.pop(0), lambda client: client.query("SELECT")
+        )
+        assert result == {"results": {"bindings": []}}
+        assert mock_sleep.called
+
+    @patch("mlscores.aquery.asyncio.sleep")
+    def test_query_honors_retry_after(self, mock_sleep):
+        """Test that the Retry-After delay of a 429 response is waited for."""
+        responses = [
+            httpx.Response(429, headers={"Retry-After": "7"}),
+            httpx.Response(200, json={"results": {"bindings": []}}),
+        ]
+
+        _run_with_client(
+            lambda request: responses.pop(0), lambda client: client.query("SELECT")
+        )
+        assert mock_sleep.call_args.args[0] >= 7
+
+    def test_query_returns_none_on_other_http_error(self):
+        """Test that other HTTP errors return None."""
+        result = _run_with_client(
+            lambda request: httpx.Response(500), lambda client: client.query("SELECT")
+        )
+        assert result is None
+
+    def test_concurrency_limit(self):
+        """Test that no more than max_concurrency queries run at once."""
+        in_flight = 0
+        peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json={"results": {"bindings": []}})
+
+        async def run_many(client):
+            await asyncio.gather(*(client.query(f"SELECT {i}") for i in range(10)))
+
+        _run_with_client(handler, run_many, max_concurrency=3)
+        assert peak == 3
+
+
+class TestAsyncLabels:
+    """Tests for async label retrieval."""
+
+    def test_property_labels_batched(self):
+        """Test that large URI lists are split into batches."""
+        calls = []
+
+        def handler(request):
+            calls.append(_query_text(request))
+            return httpx.Response(200, json={"results": {"bindings": []}})
+
+        uris = [f"{WIKIDATA_PROPERTY_PREFIX}P{i}" for i in range(250)]
+        _run_with_client(handler, lambda client: get_property_labels(uris, client))
+        assert len(calls) == 3
+
+    def test_property_labels_tuples(self, sample_property_labels_response):
+        """Test that property labels are returned as tuples."""
+
+        def handler(request):
+            return httpx.Response(200, json=sample_property_labels_response)
+
+        result = _run_with_client(
+            handler,
+            lambda client: get_property_labels(
+                [f"{WIKIDATA_PROPERTY_PREFIX}P31", "http://example.org/P1"], client
+            ),
+        )
+        assert result == [
+            (f"{WIKIDATA_PROPERTY_PREFIX}P31", "instance of", "en"),
+            (f"{WIKIDATA_PROPERTY_PREFIX}P31", "nature de l'élément", "fr"),
+        ]
+
+    def test_value_labels_missing_label(self):
+        """Test handling of values without labels."""
+
+        def handler(request):
+            return httpx.Response(
+                200,
+                json={"results": {"bindings": [{"v": {"value": f"{WIKIDATA_ITEM_PREFIX}42"}}]}},
+            )
+
+        result = _run_with_client(
+            handler,
+            lambda client: get_value_labels([f"{WIKIDATA_ITEM_PREFIX}42"], client),
+        )
+        assert len(result) == 1
+        assert result[0][1] == DEFAULT_NO_LABEL
+
+    def test_empty_uri_list(self):
+        """Test that an empty URI list makes no requests."""
+
+        def handler(request):
+            raise AssertionError("No request expected")
+
+        result = _run_with_client(handler, lambda client: get_value_labels([], client))
+        assert result == []
+
+
+class TestAsyncResultFormats:
+    """Tests for tabular result negotiation in the async client."""
+
+    def test_select_requests_tsv(self):
+        """Test that select asks for TSV and decodes the TSV response."""
+        accept = []
+
+        def handler(request):
+            accept.append(request.headers["Accept"])
+            return httpx.Response(
+                200,
+                content=(
+                    b"?p\t?propertyLabel\t?propertyLabelLang\n"
+                    b'<http://x/P31>\t"instance of"@en\t"en"\n'
+                ),
+                headers={"Content-Type": "text/tab-separated-values"},
+            )
+
+        rows = _run_with_client(
+            handler,
+            lambda client: client.select(
+                "SELECT", ("p", "propertyLabel", "propertyLabelLang")
+            ),
+        )
+        assert rows == [("http://x/P31", "instance of", "en")]
+        assert accept[0].startswith("text/tab-separated-values")
+
+    def test_select_json_fallback(self, sample_property_labels_response):
+        """Test that a JSON answer to a TSV request is still decoded."""
+        rows = _run_with_client(
+            lambda request: httpx.Response(200, json=sample_property_labels_response),
+            lambda client: client.select("SELECT", ("p",)),
+        )
+        assert rows == [(f"{WIKIDATA_PROPERTY_PREFIX}P31",)] * 2
+
+    def test_csv_result_format(self):
+        """Test that the client can be configured to request CSV."""
+        accept = []
+
+        def handler(request):
+            accept.append(request.headers["Accept"])
+            return httpx.Response(200, content=b"p\r\nhttp://x/P31\r\n")
+
+        rows = _run_with_client(
+            handler, lambda client: client.select("SELECT", ("p",)), result_format="csv"
+        )
+        assert rows == [("http://x/P31",)]
+        assert accept[0].startswith("text/csv")
+
+
+class TestEndpointClients:
+    """Tests for clients built from endpoint configurations."""
+
+    def test_credentials_and_prefixes(self):
+        """Test that a client sends its credentials and uses its URI prefixes."""
+        config = create_endpoint_config(
+            url="https://wikibase.example/sparql",
+            entity_prefix="https://wikibase.example/entity/",
+            username="user",
+            password="secret",
+        )
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, content=b"?v\t?valueLabel\t?valueLabelLang\n")
+
+        async def run():
+            transport = httpx.MockTransport(handler)
+            async with EndpointClient(config, transport=transport) as client:
+                return await get_value_labels(
+                    [f"{WIKIDATA_ITEM_PREFIX}5", "https://wikibase.example/entity/Q5"],
+                    client,
+                )
+
+        asyncio.run(run())
+
+        assert len(requests) == 1
+        assert requests[0].headers["Authorization"] == config.auth_header
+        query = _query_text(requests[0])
+        assert "<https://wikibase.example/entity/Q5>" in query
+        assert WIKIDATA_ITEM_PREFIX not in query
+
+    def test_cache_namespace(self):
+        """Test that clients of other endpoints or users do not share cache entries."""
+        wikidata = EndpointClient(EndpointConfig())
+        user = EndpointClient(EndpointConfig(username="user", password="secret"))
+        commons = EndpointClient(KNOWN_ENDPOINTS["commons"])
+
+        namespaces = {c.cache_namespace for c in (wikidata, user, commons)}
+
+        assert len(namespaces) == 3
+
+    def test_clients_per_endpoint(self):
+        """Test that each endpoint gets one long-lived client of its own."""
+        configure_client()
+
+        async def run():
+            default = get_client()
+            commons = get_endpoint_client(KNOWN_ENDPOINTS["commons"])
+            return (
+                default,
+                commons,
+                get_endpoint_client(EndpointConfig()),
+                get_endpoint_client(KNOWN_ENDPOINTS["commons"]),
+            )
+
+        try:
+            default, commons, wikidata, commons_again = asyncio.run(run())
+        finally:
+            configure_client()
+
+        assert wikidata is default
+        assert commons is commons_again
+        assert commons is not default
+        assert commons.endpoint == KNOWN_ENDPOINTS["commons"].url
+
+    def test_least_recently_used_client_closed(self):
+        """Test that the number of endpoint clients is bounded."""
+        configure_client()
+
+        async def run():
+            first = get_endpoint_client(create_endpoint_config(url="http://e0/sparql"))
+            for i in range(1, MAX_ENDPOINT_CLIENTS + 1):
+                get_endpoint_client(create_endpoint_config(url=f"http://e{i}/sparql"))
+            await asyncio.sleep(0)
+            return first
+
+        try:
+            first = asyncio.run(run())
+        finally:
+            configure_client()
+
+        assert first._client.is_closed
+
+    def test_evicted_client_in_use_kept_open(self):
+        """Test that an evicted client is only closed once its callers are done."""
+        configure_client()
+
+        async def run():
+            first = get_endpoint_client(create_endpoint_config(url="http://e0/sparql"))
+            async with first.in_use():
+                for i in range(1, MAX_ENDPOINT_CLIENTS + 1):
+                    get_endpoint_client(create_endpoint_config(url=f"http://e{i}/sparql"))
+                await asyncio.sleep(0)
+                closed_in_use = first._client.is_closed
+            return first, closed_in_use
+
+        try:
+            first, closed_in_use = asyncio.run(run())
+        finally:
+            configure_client()
+
+        assert not closed_in_use
+        assert first._client.is_closed
+
+
+def _label_handler(queries):
+    """Answer value label queries with an English label for every URI."""
+
+    def handler(request):
+        query = _query_text(request)
+        queries.append(query)
+        rows = "".join(
+            f'<{uri}>\t"label"@en\t"en"\n'
+            for uri in re.findall(r"<(http://www.wikidata.org/entity/Q\d+)>", query)
+        )
+        return httpx.Response(
+            200,
+            content=("?v\t?valueLabel\t?valueLabelLang\n" + rows).encode(),
+            headers={"Content-Type": "text/tab-separated-values"},
+        )
+
+    return handler
+
+
+class TestLabelWindow:
+    """Tests for merging label lookups of concurrent callers."""
+
+    def test_concurrent_lookups_merged(self):
+        """Test that overlapping lookups in one window share one query."""
+        queries = []
+        first = [f"{WIKIDATA_ITEM_PREFIX}1", f"{WIKIDATA_ITEM_PREFIX}2"]
+        second = [f"{WIKIDATA_ITEM_PREFIX}2", f"{WIKIDATA_ITEM_PREFIX}3"]
+
+        async def lookups(client):
+            results = await asyncio.gather(
+                get_value_labels(first, client, ["en"]),
+                get_value_labels(second, client, ["en"]),
+            )
+            return results, client.label_resolver.stats()
+
+        (first_rows, second_rows), stats = _run_with_client(
+            _label_handler(queries), lookups, label_window_seconds=0.01
+        )
+
+        assert len(queries) == 1
+        assert [row[0] for row in first_rows] == first
+        assert [row[0] for row in second_rows] == second
+        assert stats == {
+            "lookups": 2,
+            "windows": 1,
+            "uris_requested": 4,
+            "uris_queried": 3,
+        }
+
+    def test_languages_not_merged(self):
+        """Test that lookups with different language filters are queried apart."""
+        queries = []
+        uris = [f"{WIKIDATA_ITEM_PREFIX}1"]
+
+        _run_with_client(
+            _label_handler(queries),
+            lambda client: asyncio.gather(
+                get_value_labels(uris, client, ["en"]),
+                get_value_labels(uris, client, ["fr"]),
+            ),
+            label_window_seconds=0.01,
+        )
+
+        assert len(queries) == 2
+
+    def test_full_batch_not_delayed(self):
+        """Test that a window holding a full batch is queried at once."""
+        queries = []
+        uris = [f"{WIKIDATA_ITEM_PREFIX}{i}" for i in range(1, 201)]
+
+        start = time.perf_counter()
+        rows = _run_with_client(
+            _label_handler(queries),
+            lambda client: get_value_labels(uris, client),
+            label_window_seconds=10,
+        )
+
+        assert time.perf_counter() - start < 5
+        assert len(rows) == 200
@@ -0,0 +1,124 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+from mlscores.query import AdaptiveBatcher
+
+
+def _batcher(**options):
+    defaults = dict(
+        initial_size=100,
+        min_size=25,
+        max_size=400,
+        target_seconds=(1.0, 5.0),
+        max_rows=20000,
+        grow_after=3,
+    )
+    defaults.update(options)
+    return AdaptiveBatcher("test", **defaults)
+
+
+class TestAdaptiveBatcher:
+    """Tests for adaptive label batch sizing."""
+
+    def test_batches_cover_all_uris(self):
+        """Test that batches are consecutive slices of the current size."""
+        batcher = _batcher()
+        uris = [str(i) for i in range(250)]
+
+        batches = list(batcher.batches(uris))
+
+        assert [len(batch) for batch in batches] == [100, 100, 50]
+        assert sum(batches, []) == uris
+
+    def test_grows_after_consecutive_fast_batches(self):
+        """Test that the size doubles only after enough fast full batches."""
+        batcher = _batcher()
+
+        batcher.record(100, 500, 0.2)
+        batcher.record(100, 500, 0.2)
+        assert batcher.size == 100
+
+        batcher.record(100, 500, 0.2)
+        assert batcher.size == 200
+
+    def test_partial_batches_do_not_grow(self):
+        """Test that a fast but partial batch does not count towards growth."""
+        batcher = _batcher(grow_after=1)
+
+        batcher.record(10, 50, 0.1)
+
+        assert batcher.size == 100
+
+    def test_on_target_batch_resets_growth(self):
+        """Test that a batch inside the latency band interrupts a fast streak."""
+        batcher = _batcher(grow_after=2)
+
+        batcher.record(100, 500, 0.2)
+        batcher.record(100, 500, 2.0)
+        batcher.record(100, 500, 0.2)
+
+        assert batcher.size == 100
+
+    def test_shrinks_on_slow_batch(self):
+        """Test that a slow batch halves the size."""
+        batcher = _batcher()
+
+        batcher.record(100, 500, 10.0)
+
+        assert batcher.size == 50
+
+    def test_shrinks_on_failure(self):
+        """Test that a failed query halves the size."""
+        batcher = _batcher()
+
+        batcher.record(100, None, 60.0)
+
+        assert batcher.size == 50
+
+    def test_shrinks_when_rows_exceed_cap(self):
+        """Test that the size shrinks when batches return too many rows."""
+        batcher = _batcher(max_rows=1000)
+
+        batcher.record(100, 5000, 0.5)
+
+        assert batcher.size == 50
+
+    def test_does_not_grow_past_row_cap(self):
+        """Test that growth stops when a doubled batch would exceed the row cap."""
+        batcher = _batcher(max_rows=1500, grow_after=1)
+
+        batcher.record(100, 1000, 0.2)
+
+        assert batcher.size == 100
+
+    def test_shrinks_when_bytes_exceed_cap(self):
+        """Test that the byte cap is honoured when response sizes are known."""
+        batcher = _batcher(max_bytes=10000)
+
+        batcher.record(100, 100, 0.5, num_bytes=50000)
+
+        assert batcher.size == 50
+
+    def test_size_is_clamped(self):
+        """Test that the size stays within the configured bounds."""
+        batcher = _batcher(initial_size=25, max_size=50, grow_after=1)
+
+        batcher.record(25, None, 1.0)
+        assert batcher.size == 25
+
+        batcher.record(25, 25, 0.1)
+        batcher.record(50, 50, 0.1)
+        assert batcher.size == 50
+
+    def test_reset(self):
+        """Test that reset returns to the initial size."""
+        batcher = _batcher()
+        batcher.record(100, None, 1.0)
+
+        batcher.reset()
+
+        assert batcher.size == 100
+        assert batcher.rows_per_uri is None
@@ -0,0 +1,169 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+import io
+import json
+
+import pytest
+
+from mlscores.bindings import (
+    BindingsDecoder,
+    ResultsDecoder,
+    parse_tsv_term,
+    read_rows,
+)
+
+
+def _rows(document, variables, chunk_size=64):
+    rows, _ = read_rows(io.BytesIO(document), variables, chunk_size)
+    return rows
+
+
+def _document(bindings):
+    return json.dumps(
+        {"head": {"vars": ["p", "label", "lang"]}, "results": {"bindings": bindings}},
+        ensure_ascii=False,
+    ).encode()
+
+
+BINDINGS = [
+    {
+        "p": {"type": "uri", "value": "http://www.wikidata.org/prop/direct/P31"},
+        "label": {"type": "literal", "value": "instance of", "xml:lang": "en"},
+        "lang": {"type": "literal", "value": "en"},
+    },
+    {
+        "p": {"type": "uri", "value": "http://www.wikidata.org/prop/direct/P31"},
+        "label": {"type": "literal", "value": "nature de l'élément", "xml:lang": "fr"},
+        "lang": {"type": "literal", "value": "fr"},
+    },
+    {"p": {"type": "uri", "value": "http://www.wikidata.org/prop/direct/P279"}},
+]
+
+ROWS = [
+    ("http://www.wikidata.org/prop/direct/P31", "instance of", "en"),
+    ("http://www.wikidata.org/prop/direct/P31", "nature de l'élément", "fr"),
+    ("http://www.wikidata.org/prop/direct/P279", None, None),
+]
+
+
+class TestBindingsDecoder:
+    """Tests for incremental decoding of SPARQL JSON results."""
+
+    def test_whole_document(self):
+        """Test decoding a document fed at once."""
+        assert _rows(_document(BINDINGS), ("p", "label", "lang")) == ROWS
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 7, 64])
+    def test_any_chunk_boundary(self, chunk_size):
+        """Test that rows, strings and multi-byte characters may span chunks."""
+        assert _rows(_document(BINDINGS), ("p", "label", "lang"), chunk_size) == ROWS
+
+    def test_variable_order_and_subset(self):
+        """Test that only requested variables are kept, in the requested order."""
+        rows = _rows(_document(BINDINGS), ("lang", "p"))
+        assert rows[0] == ("en", "http://www.wikidata.org/prop/direct/P31")
+
+    def test_empty_bindings(self):
+        """Test a result without rows."""
+        assert _rows(_document([]), ("p",)) == []
+
+    def test_rows_yielded_before_end_of_stream(self):
+        """Test that rows are available as soon as they are complete."""
+        document = _document(BINDINGS)
+        decoder = BindingsDecoder(("p", "label", "lang"))
+        end_of_first_row = document.index(b"}},") + 2
+
+        assert decoder.feed(document[:end_of_first_row]) == ROWS[:1]
+        assert decoder.feed(document[end_of_first_row:]) == ROWS[1:]
+        assert decoder.done
+
+    def test_truncated_response(self):
+        """Test that a response ending inside the bindings is rejected."""
+        document = _document(BINDINGS)
+        with pytest.raises(ValueError):
+            _rows(document[:-20], ("p",))
+
+    def test_error_appended_to_response(self):
+        """Test that an error message interrupting the bindings is rejected."""
+        document = _document(BINDINGS)
+        broken = document[: document.index(b"}},") + 3] + b"\njava.lang.TimeoutException"
+        with pytest.raises(ValueError):
+            _rows(broken, ("p",))
+
+
+TSV = (
+    "?p\t?label\t?lang\n"
+    '<http://www.wikidata.org/prop/direct/P31>\t"instance of"@en\t"en"\n'
+    '<http://www.wikidata.org/prop/direct/P31>\t"nature de l\'élément"@fr\t"fr"\n'
+    "<http://www.wikidata.org/prop/direct/P279>\t\t\n"
+).encode()
+
+CSV = (
+    "p,label,lang\r\n"
+    "http://www.wikidata.org/prop/direct/P31,instance of,en\r\n"
+    "http://www.wikidata.org/prop/direct/P31,nature de l'élément,fr\r\n"
+    "http://www.wikidata.org/prop/direct/P279,,\r\n"
+).encode()
+
+
+class TestTabularResults:
+    """Tests for decoding TSV and CSV results."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 64])
+    def test_tsv(self, chunk_size):
+        """Test that TSV terms are reduced to their values."""
+        assert _rows(TSV, ("p", "label", "lang"), chunk_size) == ROWS
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 64])
+    def test_csv(self, chunk_size):
+        """Test that CSV rows are decoded, with empty fields as unbound."""
+        assert _rows(CSV, ("p", "label", "lang"), chunk_size) == ROWS
+
+    def test_csv_quoted_fields(self):
+        """Test CSV fields containing delimiters, quotes and line breaks."""
+        document = b'v,label\r\nhttp://x/Q1,"a, ""b""\r\nc"\r\n'
+        # Line breaks inside fields are normalised to "\n"
+        assert _rows(document, ("v", "label"), 3) == [("http://x/Q1", 'a, "b"\nc')]
+
+    def test_columns_matched_by_name(self):
+        """Test that variables are looked up by header name."""
+        assert _rows(TSV, ("lang", "missing"))[0] == ("en", None)
+
+    def test_format_detection_and_stats(self):
+        """Test that the response format and size are recorded."""
+        for document, result_format in [(TSV, "tsv"), (CSV, "csv"), (_document([]), "json")]:
+            _, stats = read_rows(io.BytesIO(document), ("p",))
+            assert stats.format == result_format
+            assert stats.num_bytes == len(document)
+            assert stats.decode_seconds >= 0
+
+    def test_empty_response(self):
+        """Test that an empty response is rejected."""
+        with pytest.raises(ValueError):
+            _rows(b"", ("p",))
+
+    def test_xml_rejected(self):
+        """Test that XML results are not mistaken for CSV."""
+        decoder = ResultsDecoder(("p",))
+        with pytest.raises(ValueError):
+            decoder.feed(b'<?xml version="1.0"?><sparql/>')
+
+
+class TestParseTsvTerm:
+    """Tests for RDF terms in TSV results."""
+
+    def test_terms(self):
+        """Test IRIs, literals, typed literals, numbers and unbound values."""
+        assert parse_tsv_term("<http://x/Q1>") == "http://x/Q1"
+        assert parse_tsv_term('"chat"@fr') == "chat"
+        assert parse_tsv_term('"90"^^<http://www.w3.org/2001/XMLSchema#integer>') == "90"
+        assert parse_tsv_term("90") == "90"
+        assert parse_tsv_term("") is None
+
+    def test_escapes(self):
+        """Test that escaped characters in literals are decoded."""
+        assert parse_tsv_term('"a\\tb\\"c\\\\d\\u00e9"@en') == 'a\tb"c\\dé'
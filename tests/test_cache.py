@@ -0,0 +1,456 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+import os
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from mlscores.cache import QueryCache, SQLiteStore, configure_cache, get_cache
+from mlscores.constants import CACHE_DATABASE_NAME
+
+ENDPOINT = "https://query.wikidata.org/sparql"
+
+
+class TestQueryCache:
+    """Tests for the file-based QueryCache."""
+
+    def test_set_and_get(self, tmp_path):
+        """Test that stored data is returned for the same query."""
+        cache = QueryCache(cache_dir=str(tmp_path))
+        cache.set("SELECT 1", ENDPOINT, {"results": {"bindings": []}})
+
+        assert cache.get("SELECT 1", ENDPOINT) == {"results": {"bindings": []}}
+
+    def test_miss_for_other_endpoint(self, tmp_path):
+        """Test that entries are keyed by endpoint."""
+        cache = QueryCache(cache_dir=str(tmp_path))
+        cache.set("SELECT 1", ENDPOINT, {"a": 1})
+
+        assert cache.get("SELECT 1", "http://localhost/sparql") is None
+
+    def test_whitespace_insensitive_keys(self, tmp_path):
+        """Test that formatting differences map to the same entry."""
+        cache = QueryCache(cache_dir=str(tmp_path))
+        cache.set("SELECT ?s\n  WHERE { ?s ?p ?o }", ENDPOINT, {"a": 1})
+
+        assert cache.get("SELECT ?s WHERE {  ?s ?p ?o  }", ENDPOINT) == {"a": 1}
+
+    def test_literal_whitespace_in_keys(self, tmp_path):
+        """Test that queries differing in the whitespace of literals have other keys."""
+        cache = QueryCache(cache_dir=str(tmp_path))
+        cache.set('SELECT ?s WHERE { ?s ?p "a  b" }', ENDPOINT, {"a": 1})
+
+        assert cache.get('SELECT ?s WHERE { ?s ?p "a b" }', ENDPOINT) is None
+        assert cache.get('SELECT ?s\nWHERE { ?s ?p "a  b" }', ENDPOINT) == {"a": 1}
+
+    def test_expired_entry(self, tmp_path):
+        """Test that entries older than the TTL are not returned."""
+        cache = QueryCache(cache_dir=str(tmp_path), ttl_seconds=10)
+        with patch("mlscores.cache.time.time", return_value=1000.0):
+            cache.set("SELECT 1", ENDPOINT, {"a": 1})
+        with patch("mlscores.cache.time.time", return_value=1011.0):
+            assert cache.get("SELECT 1", ENDPOINT) is None
+
+    def test_zero_ttl(self, tmp_path):
+        """Test that a TTL of zero is kept rather than replaced by the default."""
+        configure_cache(cache_dir=str(tmp_path), ttl_seconds=0)
+        cache = get_cache()
+        with patch("mlscores.cache.time.time", return_value=1000.0):
+            cache.set("SELECT 1", ENDPOINT, {"a": 1})
+        with patch("mlscores.cache.time.time", return_value=1000.5):
+            assert cache.get("SELECT 1", ENDPOINT) is None
+
+        assert cache.stats()["ttl_seconds"] == 0
+
+    def test_no_temporary_files_left(self, tmp_path):
+        """Test that writes leave only the final entry file behind."""
+        cache = QueryCache(cache_dir=str(tmp_path))
+        cache.set("SELECT 1", ENDPOINT, {"a": 1})
+
+        assert [p.suffix for p in tmp_path.iterdir()] == [".json"]
+
+    def test_failed_write_leaves_no_files(self, tmp_path):
+        """Test that the temporary file of a failed write is removed."""
+        cache = QueryCache(cache_dir=str(tmp_path), memory_max_entries=0)
+        with patch("mlscores.cache.os.replace", side_effect=OSError("disk full")):
+            cache.set("SELECT 1", ENDPOINT, {"a": 1})
+
+        assert list(tmp_path.iterdir()) == []
+        assert cache.get("SELECT 1", ENDPOINT) is None
+
+    def test_interrupted_write_leaves_no_files(self, tmp_path):
+        """Test that the temporary file of an interrupted write is removed."""
+        cache = QueryCache(cache_dir=str(tmp_path))
+        with patch("mlscores.cache.os.replace", side_effect=KeyboardInterrupt):
+            with pytest.raises(KeyboardInterrupt):
+                cache.set("SELECT 1", ENDPOINT, {"a": 1})
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_disabled_cache(self, tmp_path):
+        """Test that a disabled cache never stores data."""
+        cache = QueryCache(cache_dir=str(tmp_path / "cache"), enabled=False)
+        cache.set("SELECT 1", ENDPOINT, {"a": 1})
+
+        assert cache.get("SELECT 1", ENDPOINT) is None
+        assert not (tmp_path / "cache").exists()
+
+
+class TestMemoryTier:
+    """Tests for the in-process tier in front of the cache files."""
+
+    def test_memory_hit_skips_disk(self, tmp_path):
+        """Test that stored entries are answered from memory."""
+        cache = QueryCache(cache_dir=str(tmp_path))
+        cache.set("SELECT 1", ENDPOINT, {"a": 1})
+
+        with patch("builtins.open", side_effect=AssertionError("disk read")):
+            assert cache.get("SELECT 1", ENDPOINT) == {"a": 1}
+
+        stats = cache.stats()
+        assert (stats["memory_hits"], stats["disk_hits"]) == (1, 0)
+
+    def test_promotion_on_disk_hit(self, tmp_path):
+        """Test that entries written by another process are promoted to memory."""
+        QueryCache(cache_dir=str(tmp_path)).set("SELECT 1", ENDPOINT, {"a": 1})
+        cache = QueryCache(cache_dir=str(tmp_path))
+
+        assert cache.get("SELECT 1", ENDPOINT) == {"a": 1}
+        assert cache.get("SELECT 1", ENDPOINT) == {"a": 1}
+
+        stats = cache.stats()
+        assert stats["memory_entries"] == 1
+        assert (stats["memory_misses"], stats["memory_hits"]) == (1, 1)
+        assert (stats["disk_hits"], stats["disk_misses"]) == (1, 0)
+
+    def test_entry_limit_evicts_least_recently_used(self, tmp_path):
+        """Test that the memory tier keeps the most recently used entries."""
+        cache = QueryCache(cache_dir=str(tmp_path), memory_max_entries=2)
+        cache.set("SELECT 1", ENDPOINT, 1)
+        cache.set("SELECT 2", ENDPOINT, 2)
+        cache.get("SELECT 1", ENDPOINT)
+        cache.set("SELECT 3", ENDPOINT, 3)
+
+        assert cache.stats()["memory_evictions"] == 1
+        # Evicted entries are still read from disk
+        assert cache.get("SELECT 2", ENDPOINT) == 2
+        assert cache.stats()["disk_hits"] == 1
+        assert len(cache.memory) == 2
+
+    def test_byte_limit(self, tmp_path):
+        """Test that the memory tier stays within its size and skips large entries."""
+        cache = QueryCache(cache_dir=str(tmp_path), memory_max_bytes=150)
+        cache.set("SELECT 1", ENDPOINT, "x" * 90)
+        cache.set("SELECT 2", ENDPOINT, "x" * 90)
+        cache.set("SELECT 3", ENDPOINT, "x" * 500)
+
+        assert cache.memory.size_bytes <= 150
+        assert len(cache.memory) == 1
+        assert cache.get("SELECT 3", ENDPOINT) == "x" * 500
+
+    def test_expired_in_memory(self, tmp_path):
+        """Test that memory entries expire with the TTL of the disk entries."""
+        cache = QueryCache(cache_dir=str(tmp_path), ttl_seconds=10)
+        with patch("mlscores.cache.time.time", return_value=1000.0):
+            cache.set("SELECT 1", ENDPOINT, {"a": 1})
+        with patch("mlscores.cache.time.time", return_value=1011.0):
+            assert cache.get("SELECT 1", ENDPOINT) is None
+
+        stats = cache.stats()
+        assert stats["memory_entries"] == 0
+        assert stats["disk_evictions"] == 1
+
+    def test_cached_data_not_shared_with_writer(self, tmp_path):
+        """Test that changing stored data afterwards does not change the entry."""
+        cache = QueryCache(cache_dir=str(tmp_path))
+        data = {"rows": [1]}
+        cache.set("SELECT 1", ENDPOINT, data)
+        data["rows"].append(2)
+
+        assert cache.get("SELECT 1", ENDPOINT) == {"rows": [1]}
+
+    def test_clear(self, tmp_path):
+        """Test that clearing the cache empties both tiers."""
+        cache = QueryCache(cache_dir=str(tmp_path))
+        cache.set("SELECT 1", ENDPOINT, {"a": 1})
+
+        assert cache.clear() == 1
+        assert cache.get("SELECT 1", ENDPOINT) is None
+        assert len(cache.memory) == 0
+
+
+class TestSQLiteBackend:
+    """Tests for keeping cache entries in one SQLite database."""
+
+    def test_set_and_get(self, tmp_path):
+        """Test that entries are stored in the database and read back."""
+        QueryCache(cache_dir=str(tmp_path), backend="sqlite").set(
+            "SELECT 1", ENDPOINT, {"a": [1, "b"]}
+        )
+        cache = QueryCache(cache_dir=str(tmp_path), backend="sqlite")
+
+        assert cache.get("SELECT 1", ENDPOINT) == {"a": [1, "b"]}
+        assert cache.stats()["disk_hits"] == 1
+        assert [p.name for p in tmp_path.glob("*.json")] == []
+        connection = sqlite3.connect(tmp_path / CACHE_DATABASE_NAME)
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_expiry_and_stats(self, tmp_path):
+        """Test that statistics and expiry use the entry timestamps."""
+        cache = QueryCache(cache_dir=str(tmp_path), ttl_seconds=10, backend="sqlite")
+        with patch("mlscores.cache.time.time", return_value=1000.0):
+            cache.set("SELECT 1", ENDPOINT, "old")
+            cache.set("SELECT 2", ENDPOINT, "old")
+        with patch("mlscores.cache.time.time", return_value=1008.0):
+            cache.set("SELECT 2", ENDPOINT, "new")
+            cache.set("SELECT 3", ENDPOINT, "newer")
+
+        with patch("mlscores.cache.time.time", return_value=1011.0):
+            stats = cache.stats()
+            assert (stats["total_entries"], stats["valid_entries"]) == (3, 2)
+            assert stats["expired_entries"] == 1
+            assert stats["total_size_bytes"] == len('"old""new""newer"')
+            assert cache.clear_expired() == 1
+            assert cache.stats()["total_entries"] == 2
+
+        assert cache.clear() == 2
+        assert cache.stats()["total_size_bytes"] == 0
+
+    def test_invalid_entry(self, tmp_path):
+        """Test that undecodable entries are removed."""
+        cache = QueryCache(
+            cache_dir=str(tmp_path), backend="sqlite", memory_max_entries=0
+        )
+        cache.set("SELECT 1", ENDPOINT, {"a": 1})
+        connection = sqlite3.connect(tmp_path / CACHE_DATABASE_NAME)
+        with connection:
+            connection.execute("UPDATE entries SET data = x'7b'")
+
+        assert cache.get("SELECT 1", ENDPOINT) is None
+        assert cache.stats()["total_entries"] == 0
+
+    def test_concurrent_writers(self, tmp_path):
+        """Test that threads and other instances can share the database."""
+
+        def write(worker):
+            cache = QueryCache(cache_dir=str(tmp_path), backend="sqlite")
+            for i in range(20):
+                cache.set(f"SELECT {worker} {i}", ENDPOINT, i)
+
+        threads = [threading.Thread(target=write, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        cache = QueryCache(cache_dir=str(tmp_path), backend="sqlite")
+        assert cache.stats()["total_entries"] == 80
+        assert cache.get("SELECT 3 19", ENDPOINT) == 19
+
+    def test_unknown_backend(self, tmp_path):
+        """Test that unknown backends are rejected."""
+        with pytest.raises(ValueError):
+            QueryCache(cache_dir=str(tmp_path), backend="redis")
+
+
+# Label rows as the label queries cache them
+LABEL_ROWS = [
+    [f"http://www.wikidata.org/entity/Q{i}", "", language]
+    for i in range(200)
+    for language in ("en", "fr", "de")
+]
+
+
+class TestBatchEntries:
+    """Tests for writing and reading many small entries at once."""
+
+    def test_one_transaction_in_database(self, tmp_path):
+        """Test that batches go to the database in one transaction, not to memory."""
+        cache = QueryCache(cache_dir=str(tmp_path), backend="sqlite")
+        entries = {f"uri{i}": {"labels": [["label", "en"]]} for i in range(100)}
+
+        with patch.object(
+            SQLiteStore, "write_many", autospec=True, side_effect=SQLiteStore.write_many
+        ) as write_many:
+            cache.set_many(entries, ENDPOINT)
+
+        assert write_many.call_count == 1
+
+        assert cache.get_many(["uri0", "uri99", "other"], ENDPOINT) == {
+            "uri0": entries["uri0"],
+            "uri99": entries["uri99"],
+        }
+        assert len(cache.memory) == 0
+        stats = cache.stats()
+        assert stats["total_entries"] == 100
+        assert (stats["disk_hits"], stats["disk_misses"]) == (2, 1)
+        assert cache.clear() == 100
+
+    def test_files_backend(self, tmp_path):
+        """Test that batches are kept by the configured backend."""
+        cache = QueryCache(cache_dir=str(tmp_path), backend="files")
+        entries = {f"uri{i}": [i] for i in range(10)}
+        cache.set_many(entries, ENDPOINT)
+
+        assert len(list(tmp_path.glob("*.json"))) == 10
+        assert not (tmp_path / CACHE_DATABASE_NAME).exists()
+        assert cache.get_many(["uri0", "uri9", "other"], ENDPOINT) == {
+            "uri0": [0],
+            "uri9": [9],
+        }
+        assert len(cache.memory) == 0
+
+    @pytest.mark.parametrize("backend", ["files", "sqlite"])
+    def test_shared_budget(self, tmp_path, backend):
+        """Test that batches and single entries share one disk budget."""
+        cache = QueryCache(cache_dir=str(tmp_path), backend=backend, max_entries=5)
+        for i in range(5):
+            cache.set(f"query{i}", ENDPOINT, [i])
+        cache.set_many({f"uri{i}": [i] for i in range(5)}, ENDPOINT)
+
+        stats = cache.stats()
+        assert stats["total_entries"] == 5
+        assert stats["disk_evictions"] == 5
+        assert cache.get_many([f"uri{i}" for i in range(5)], ENDPOINT) == {
+            f"uri{i}": [i] for i in range(5)
+        }
+
+    def test_expired_entries(self, tmp_path):
+        """Test that expired entries are left out and removed."""
+        cache = QueryCache(cache_dir=str(tmp_path), ttl_seconds=10)
+        with patch("mlscores.cache.time.time", return_value=1000.0):
+            cache.set_many({"a": 1, "b": 2}, ENDPOINT)
+        with patch("mlscores.cache.time.time", return_value=1008.0):
+            cache.set_many({"b": 3}, ENDPOINT)
+
+        with patch("mlscores.cache.time.time", return_value=1011.0):
+            assert cache.get_many(["a", "b"], ENDPOINT) == {"b": 3}
+            assert cache.stats()["total_entries"] == 1
+
+    def test_disabled_cache(self, tmp_path):
+        """Test that a disabled cache stores no batches."""
+        cache = QueryCache(cache_dir=str(tmp_path / "cache"), enabled=False)
+        cache.set_many({"a": 1}, ENDPOINT)
+
+        assert cache.get_many(["a"], ENDPOINT) == {}
+        assert not (tmp_path / "cache").exists()
+
+
+class TestCompressedEntries:
+    """Tests for compressed cache entries."""
+
+    @pytest.mark.parametrize("backend", ["files", "sqlite"])
+    def test_compressed_entries_smaller(self, tmp_path, backend):
+        """Test that compressed entries are read back and take less space."""
+        plain = QueryCache(cache_dir=str(tmp_path / "plain"), backend=backend)
+        compressed = QueryCache(
+            cache_dir=str(tmp_path / "compressed"),
+            backend=backend,
+            compress=True,
+            memory_max_entries=0,
+        )
+        plain.set("SELECT 1", ENDPOINT, LABEL_ROWS)
+        compressed.set("SELECT 1", ENDPOINT, LABEL_ROWS)
+
+        assert compressed.get("SELECT 1", ENDPOINT) == LABEL_ROWS
+        assert (
+            compressed.stats()["total_size_bytes"] * 4
+            < plain.stats()["total_size_bytes"]
+        )
+
+    @pytest.mark.parametrize("backend", ["files", "sqlite"])
+    def test_both_encodings_read(self, tmp_path, backend):
+        """Test that entries are read whichever encoding wrote them."""
+        QueryCache(cache_dir=str(tmp_path), backend=backend).set(
+            "SELECT 1", ENDPOINT, {"a": 1}
+        )
+        QueryCache(cache_dir=str(tmp_path), backend=backend, compress=True).set(
+            "SELECT 2", ENDPOINT, {"b": 2}
+        )
+
+        for compress in (False, True):
+            cache = QueryCache(
+                cache_dir=str(tmp_path), backend=backend, compress=compress
+            )
+            assert cache.get("SELECT 1", ENDPOINT) == {"a": 1}
+            assert cache.get("SELECT 2", ENDPOINT) == {"b": 2}
+            assert cache.stats()["valid_entries"] == 2
+
+    def test_expired_compressed_files(self, tmp_path):
+        """Test that expiry of compressed files uses their stored timestamp."""
+        cache = QueryCache(cache_dir=str(tmp_path), ttl_seconds=10, compress=True)
+        with patch("mlscores.cache.time.time", return_value=1000.0):
+            cache.set("SELECT 1", ENDPOINT, {"a": 1})
+        with patch("mlscores.cache.time.time", return_value=1005.0):
+            cache.set("SELECT 2", ENDPOINT, {"b": 2})
+
+        with patch("mlscores.cache.time.time", return_value=1011.0):
+            assert cache.stats()["expired_entries"] == 1
+            assert cache.clear_expired() == 1
+        assert len(list(tmp_path.glob("*.json"))) == 1
+
+
+class TestDiskBudget:
+    """Tests for removing the least recently used entries beyond a budget."""
+
+    @pytest.mark.parametrize("backend", ["files", "sqlite"])
+    def test_entry_budget(self, tmp_path, backend):
+        """Test that the least recently read or written entry is removed."""
+        cache = QueryCache(
+            cache_dir=str(tmp_path),
+            backend=backend,
+            max_entries=2,
+            memory_max_entries=0,
+        )
+        for now, action in [
+            (1000.0, lambda: cache.set("SELECT 1", ENDPOINT, 1)),
+            (1100.0, lambda: cache.set("SELECT 2", ENDPOINT, 2)),
+            (1200.0, lambda: cache.get("SELECT 1", ENDPOINT)),
+            (1300.0, lambda: cache.set("SELECT 3", ENDPOINT, 3)),
+        ]:
+            with patch("mlscores.cache.time.time", return_value=now):
+                action()
+
+        with patch("mlscores.cache.time.time", return_value=1400.0):
+            assert cache.get("SELECT 2", ENDPOINT) is None
+            assert cache.get("SELECT 1", ENDPOINT) == 1
+            assert cache.get("SELECT 3", ENDPOINT) == 3
+            stats = cache.stats()
+        assert (stats["total_entries"], stats["disk_evictions"]) == (2, 1)
+
+    @pytest.mark.parametrize("backend", ["files", "sqlite"])
+    def test_byte_budget(self, tmp_path, backend):
+        """Test that the entries on disk stay within the byte budget."""
+        cache = QueryCache(cache_dir=str(tmp_path), backend=backend, max_bytes=800)
+        for i in range(3):
+            cache.set(f"SELECT {i}", ENDPOINT, "x" * 300)
+
+        stats = cache.stats()
+        assert stats["total_entries"] == 2
+        assert stats["total_size_bytes"] <= 800
+
+    def test_existing_files_counted(self, tmp_path):
+        """Test that files already in the directory count against the budget."""
+        unbounded = QueryCache(cache_dir=str(tmp_path))
+        for i in range(3):
+            unbounded.set(f"SELECT {i}", ENDPOINT, i)
+        # Oldest access first: SELECT 2, SELECT 0, SELECT 1
+        for i, mtime in [(2, 1000), (0, 2000), (1, 3000)]:
+            path = tmp_path / f"{unbounded._hash_query(f'SELECT {i}', ENDPOINT)}.json"
+            os.utime(path, (mtime, mtime))
+
+        cache = QueryCache(cache_dir=str(tmp_path), max_entries=2, memory_max_entries=0)
+        cache.set("SELECT 3", ENDPOINT, 3)
+
+        assert [cache.get(f"SELECT {i}", ENDPOINT) for i in range(4)] == [
+            None,
+            1,
+            None,
+            3,
+        ]
@@ -0,0 +1,189 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+import bz2
+import gzip
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from mlscores.__main__ import calculate_multilinguality_scores
+from mlscores.constants import (
+    DEFAULT_NO_LABEL,
+    DEFAULT_UNKNOWN_LANGUAGE,
+    WIKIDATA_ENTITY_PREFIX,
+    WIKIDATA_PROPERTY_PREFIX,
+)
+from mlscores.dump import extract_entity, main, parse_dump_line, score_dump
+
+FIXTURE_DUMP = os.path.join(os.path.dirname(__file__), "data", "wikidata-dump.json")
+
+
+def _fixture_entities():
+    with open(FIXTURE_DUMP, encoding="utf-8") as f:
+        return [entity for entity in map(parse_dump_line, f) if entity is not None]
+
+
+@pytest.fixture(params=["json", "json.gz", "json.bz2"])
+def dump_path(request, tmp_path):
+    """The fixture dump, uncompressed and compressed."""
+    with open(FIXTURE_DUMP, "rb") as f:
+        content = f.read()
+    path = tmp_path / f"dump.{request.param}"
+    if request.param.endswith(".gz"):
+        path.write_bytes(gzip.compress(content))
+    elif request.param.endswith(".bz2"):
+        path.write_bytes(bz2.compress(content))
+    else:
+        path.write_bytes(content)
+    return str(path)
+
+
+class TestExtractEntity:
+    """Tests for extracting properties, values and labels from dump entities."""
+
+    def test_parse_dump_line(self):
+        """Test that array brackets are skipped and trailing commas removed."""
+        assert parse_dump_line("[\n") is None
+        assert parse_dump_line("]\n") is None
+        assert parse_dump_line('{"id": "Q1"},\n') == {"id": "Q1"}
+
+    def test_statement_semantics(self):
+        """Test that only truthy statements, qualifiers and references count."""
+        entity = next(e for e in _fixture_entities() if e["id"] == "Q42")
+
+        entity_id, languages, property_ids, value_ids = extract_entity(entity)
+
+        assert entity_id == "Q42"
+        assert languages == ("en", "fr")
+        # P2 only has "novalue", P3 only a deprecated statement
+        assert property_ids == ["P1", "P31", "P69"]
+        # Q2 is outranked by a preferred statement, Q6 is deprecated; Q3 is a
+        # qualifier value and Q4 a reference value
+        assert value_ids == ["Q1", "Q3", "Q4", "Q5"]
+
+    def test_label_languages_filtered(self):
+        """Test that only labels in the requested languages are kept."""
+        entity = next(e for e in _fixture_entities() if e["id"] == "Q5")
+
+        assert extract_entity(entity, ["de", "es"])[1] == ("de",)
+
+
+class TestScoreDump:
+    """Tests for offline scoring of dumps."""
+
+    def test_scores(self, dump_path):
+        """Test the scores of an item from every dump compression."""
+        results = {r.item_id: r for r in score_dump(dump_path, ["en", "fr"], processes=1)}
+
+        result = results["Q42"]
+        assert result.property_label_percentages == pytest.approx(
+            {"en": 200 / 3, "fr": 100 / 3}
+        )
+        assert result.value_label_percentages == pytest.approx({"en": 50.0, "fr": 25.0})
+        assert result.combined_percentages == pytest.approx(
+            {"en": 400 / 7, "fr": 200 / 7}
+        )
+
+    def test_same_scores_as_endpoint(self):
+        """Test that dump scores match the scores computed from endpoint queries."""
+        entities = {entity["id"]: entity for entity in _fixture_entities()}
+
+        def get_statements(item_id):
+            _, _, property_ids, value_ids = extract_entity(entities[item_id])
+            direct = [(f"{WIKIDATA_PROPERTY_PREFIX}{p}", "x") for p in property_ids]
+            direct += [
+                ("http://schema.org/name", f"{WIKIDATA_ENTITY_PREFIX}{v}")
+                for v in value_ids
+            ]
+            return {"direct": direct, "qualifier": [], "reference": []}
+
+        def get_labels(prefix):
+            def labels(uris, languages):
+                result = []
+                for uri in uris:
+                    if not uri.startswith(prefix):
+                        continue
+                    entity = entities.get(uri[len(prefix) :], {})
+                    langs = [
+                        lang
+                        for lang in entity.get("labels", {})
+                        if not languages or lang in languages
+                    ]
+                    result.extend((uri, "label", lang) for lang in langs)
+                    if not langs:
+                        result.append((uri, DEFAULT_NO_LABEL, DEFAULT_UNKNOWN_LANGUAGE))
+                return result
+
+            return labels
+
+        with patch("mlscores.__main__.get_statements", side_effect=get_statements), patch(
+            "mlscores.__main__.get_property_labels",
+            side_effect=get_labels(WIKIDATA_PROPERTY_PREFIX),
+        ), patch(
+            "mlscores.__main__.get_value_labels",
+            side_effect=get_labels(WIKIDATA_ENTITY_PREFIX),
+        ):
+            for languages in (None, ["en", "de"]):
+                expected = calculate_multilinguality_scores(
+                    list(entities), languages, missing=True
+                )
+                actual = list(
+                    score_dump(FIXTURE_DUMP, languages, missing=True, processes=1)
+                )
+                assert actual == expected
+
+    def test_process_pool(self, dump_path):
+        """Test that parsing across processes gives the same results in order."""
+        expected = list(score_dump(dump_path, ["en"], processes=1))
+
+        actual = list(score_dump(dump_path, ["en"], processes=2, chunk_lines=2))
+
+        assert actual == expected
+
+    def test_identifiers(self):
+        """Test that only the requested entities are scored."""
+        results = list(score_dump(FIXTURE_DUMP, ["en"], identifiers=["Q5"], processes=1))
+
+        assert [r.item_id for r in results] == ["Q5"]
+        # Q5's value Q1 is labelled in English
+        assert results[0].value_label_percentages == {"en": 100.0}
+
+    def test_missing_translations(self):
+        """Test that unlabelled properties and values are reported as missing."""
+        result = next(
+            score_dump(
+                FIXTURE_DUMP, ["en", "fr"], missing=True, identifiers=["Q42"], processes=1
+            )
+        )
+
+        assert sorted(result.missing_property_translations["fr"]) == [
+            f"{WIKIDATA_PROPERTY_PREFIX}P1",
+            f"{WIKIDATA_PROPERTY_PREFIX}P69",
+        ]
+
+    def test_cli(self, tmp_path):
+        """Test the dump command writing JSON results."""
+        output = tmp_path / "scores.json"
+
+        args = [FIXTURE_DUMP, "--ids", "Q42", "-l", "en", "-f", "json", "-j", "1"]
+        main(args + ["-o", str(output)])
+
+        data = json.loads(output.read_text(encoding="utf-8"))
+        assert [result["item_id"] for result in data] == ["Q42"]
+
+    def test_cli_csv(self, tmp_path):
+        """Test the dump command writing CSV results of every entity."""
+        output = tmp_path / "scores.csv"
+
+        main([FIXTURE_DUMP, "-l", "en", "fr", "-f", "csv", "-j", "1", "-o", str(output)])
+
+        rows = output.read_text(encoding="utf-8").splitlines()
+        assert rows[0] == "item_id,category,en,fr"
+        expected = list(score_dump(FIXTURE_DUMP, ["en", "fr"], processes=1))
+        assert len(rows) == 1 + 3 * len(expected)
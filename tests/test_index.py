@@ -0,0 +1,213 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+import asyncio
+import os
+
+import pytest
+
+from mlscores import aquery
+from mlscores.__main__ import calculate_multilinguality_scores
+from mlscores.constants import (
+    DEFAULT_NO_LABEL,
+    DEFAULT_UNKNOWN_LANGUAGE,
+    WIKIDATA_ENTITY_PREFIX,
+    WIKIDATA_PROPERTY_PREFIX,
+)
+from mlscores.dump import score_dump
+from mlscores.endpoint import EndpointConfig, create_endpoint_config
+from mlscores.index import LocalIndex, build_index, main
+from mlscores.query import configure_endpoint, get_statements, get_value_labels
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+FIXTURE_DUMP = os.path.join(DATA_DIR, "wikidata-dump.json")
+FIXTURE_TRIPLES = os.path.join(DATA_DIR, "wikidata-truthy.nt")
+
+ITEMS = ["Q42", "Q5", "Q1", "Q4"]
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    """An index built from the fixture dump."""
+    path = str(tmp_path / "wikidata.sqlite")
+    build_index(FIXTURE_DUMP, path, processes=1)
+    return path
+
+
+@pytest.fixture
+def local_endpoint(index_path):
+    """Query the fixture index instead of an endpoint."""
+    configure_endpoint(create_endpoint_config(url=f"local:{index_path}"))
+    yield index_path
+    configure_endpoint(EndpointConfig())
+
+
+class TestBuildIndex:
+    """Tests for building and reading indexes."""
+
+    def test_statements(self, index_path):
+        """Test that statements are stored as the statements query reports them."""
+        index = LocalIndex(index_path)
+
+        statements = index.get_statements("Q42")
+
+        assert (
+            f"{WIKIDATA_PROPERTY_PREFIX}P31",
+            f"{WIKIDATA_ENTITY_PREFIX}Q5",
+        ) in statements["direct"]
+        assert (f"{WIKIDATA_PROPERTY_PREFIX}P1", "") in statements["direct"]
+        assert statements["qualifier"] == [
+            (f"{WIKIDATA_ENTITY_PREFIX}P580", f"{WIKIDATA_ENTITY_PREFIX}Q3")
+        ]
+        assert statements["reference"] == [
+            (f"{WIKIDATA_ENTITY_PREFIX}P248", f"{WIKIDATA_ENTITY_PREFIX}Q4")
+        ]
+        assert index.get_statements("Q999") == {
+            "direct": [],
+            "qualifier": [],
+            "reference": [],
+        }
+
+    def test_labels(self, index_path):
+        """Test that label languages are read back from the bitsets."""
+        index = LocalIndex(index_path)
+        human = f"{WIKIDATA_ENTITY_PREFIX}Q5"
+        unknown = f"{WIKIDATA_ENTITY_PREFIX}Q999"
+
+        labels = index.get_labels([human, unknown], WIKIDATA_ENTITY_PREFIX, ["de", "es"])
+
+        assert labels == [
+            (human, "", "de"),
+            (unknown, DEFAULT_NO_LABEL, DEFAULT_UNKNOWN_LANGUAGE),
+        ]
+        assert index.get_label_counts([human, unknown], WIKIDATA_ENTITY_PREFIX) == (
+            2,
+            {"de": 1, "en": 1, "fr": 1, DEFAULT_UNKNOWN_LANGUAGE: 1},
+        )
+
+    def test_ntriples(self, tmp_path):
+        """Test that N-Triples labels and direct statements are indexed and merged."""
+        path = str(tmp_path / "truthy.sqlite")
+
+        # Q5 appears twice, its labels are merged
+        assert build_index(FIXTURE_TRIPLES, path) == 3
+
+        index = LocalIndex(path)
+        assert sorted(index.get_statements("Q42")["direct"]) == [
+            (f"{WIKIDATA_PROPERTY_PREFIX}P1", ""),
+            (f"{WIKIDATA_PROPERTY_PREFIX}P31", f"{WIKIDATA_ENTITY_PREFIX}Q5"),
+            (f"{WIKIDATA_PROPERTY_PREFIX}P69", f"{WIKIDATA_ENTITY_PREFIX}Q1"),
+        ]
+        labels = index.get_labels([f"{WIKIDATA_ENTITY_PREFIX}Q5"], WIKIDATA_ENTITY_PREFIX)
+        assert sorted(lang for _, _, lang in labels) == ["de", "en", "fr"]
+
+    def test_ntriples_statement_nodes(self, tmp_path):
+        """Test that triples of statement nodes are neither entities nor values."""
+        entity = WIKIDATA_ENTITY_PREFIX
+        statement = f"{entity}statement/Q42-8F9A3B2C"
+        label = "http://www.w3.org/2000/01/rdf-schema#label"
+        ps = "http://www.wikidata.org/prop/statement/"
+        triples = tmp_path / "full.nt"
+        triples.write_text(
+            f'<{entity}Q42> <{WIKIDATA_PROPERTY_PREFIX}P31> <{entity}Q5> .\n'
+            f"<{statement}> <http://wikiba.se/ontology#rank> "
+            "<http://wikiba.se/ontology#NormalRank> .\n"
+            f"<{statement}> <{ps}P31> <{entity}Q5> .\n"
+            f'<{entity}Q42> <{label}> "Douglas"@en .\n'
+            f"<{entity}Q42> <{WIKIDATA_PROPERTY_PREFIX}P793> <{statement}> .\n",
+            encoding="utf-8",
+        )
+        path = str(tmp_path / "full.sqlite")
+
+        assert build_index(str(triples), path) == 1
+
+        index = LocalIndex(path)
+        assert sorted(index.get_statements("Q42")["direct"]) == [
+            (f"{WIKIDATA_PROPERTY_PREFIX}P31", f"{entity}Q5"),
+            (f"{WIKIDATA_PROPERTY_PREFIX}P793", ""),
+        ]
+        labels = index.get_labels([f"{entity}Q42"], WIKIDATA_ENTITY_PREFIX)
+        assert [lang for _, _, lang in labels] == ["en"]
+
+    def test_missing_index(self, tmp_path):
+        """Test that opening a missing index fails clearly."""
+        with pytest.raises(FileNotFoundError):
+            LocalIndex(str(tmp_path / "missing.sqlite"))
+
+    def test_cli(self, tmp_path, capsys):
+        """Test the index command."""
+        path = str(tmp_path / "cli.sqlite")
+
+        main([FIXTURE_DUMP, path, "-j", "1"])
+
+        assert "Indexed 7 entities" in capsys.readouterr().out
+        assert os.path.isfile(path)
+
+
+class TestLocalEndpoint:
+    """Tests for scoring against a local endpoint."""
+
+    def test_endpoint_config(self, index_path):
+        """Test that local endpoints are recognised."""
+        assert create_endpoint_config(url=f"local:{index_path}").is_local()
+        assert not EndpointConfig().is_local()
+
+    def test_query_functions(self, local_endpoint):
+        """Test that query functions read the index without any network access."""
+        assert get_statements("Q5")["direct"] == [
+            (f"{WIKIDATA_PROPERTY_PREFIX}P31", f"{WIKIDATA_ENTITY_PREFIX}Q1")
+        ]
+        assert get_value_labels([f"{WIKIDATA_ENTITY_PREFIX}Q1"], ["en"]) == [
+            (f"{WIKIDATA_ENTITY_PREFIX}Q1", "", "en")
+        ]
+
+    @pytest.mark.parametrize(
+        "options",
+        [{}, {"share_labels": True}, {"max_workers": 2}],
+    )
+    def test_same_scores_as_dump(self, local_endpoint, options):
+        """Test that scores from the index match offline dump scores."""
+        for languages in (None, ["en", "fr"]):
+            expected = score_dump(
+                FIXTURE_DUMP, languages, missing=True, identifiers=ITEMS, processes=1
+            )
+
+            actual = calculate_multilinguality_scores(
+                ITEMS, languages, missing=True, **options
+            )
+
+            assert sorted(actual, key=lambda r: r.item_id) == sorted(
+                list(expected), key=lambda r: r.item_id
+            )
+
+    def test_aggregate_scores(self, local_endpoint):
+        """Test that label counts from the index give the same percentages."""
+        expected = calculate_multilinguality_scores(["Q42"], ["en", "fr"])
+
+        actual = calculate_multilinguality_scores(["Q42"], ["en", "fr"], aggregate=True)
+
+        assert actual[0].combined_percentages == pytest.approx(
+            expected[0].combined_percentages
+        )
+
+    def test_async_client(self, index_path):
+        """Test that async clients of a local endpoint read the index."""
+
+        async def run():
+            async with aquery.AsyncSparqlClient(endpoint=f"local:{index_path}") as client:
+                statements = await aquery.get_statements("Q42", client)
+                labels = await aquery.get_property_labels(
+                    [pair[0] for pair in statements["direct"]], client, ["fr"]
+                )
+                return labels
+
+        labels = asyncio.run(run())
+
+        assert sorted(labels) == [
+            (f"{WIKIDATA_PROPERTY_PREFIX}P1", DEFAULT_NO_LABEL, DEFAULT_UNKNOWN_LANGUAGE),
+            (f"{WIKIDATA_PROPERTY_PREFIX}P31", "", "fr"),
+            (f"{WIKIDATA_PROPERTY_PREFIX}P69", DEFAULT_NO_LABEL, DEFAULT_UNKNOWN_LANGUAGE),
+        ]
@@ -0,0 +1,156 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+import asyncio
+import re
+import urllib.parse
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from mlscores import aquery
+from mlscores.cache import configure_cache
+from mlscores.constants import (
+    DEFAULT_NO_LABEL,
+    DEFAULT_SPARQL_ENDPOINT,
+    DEFAULT_UNKNOWN_LANGUAGE,
+    WIKIDATA_ITEM_PREFIX,
+)
+from mlscores.labelcache import EntityLabelCache
+from mlscores.query import get_value_labels
+
+Q1 = f"{WIKIDATA_ITEM_PREFIX}1"
+Q2 = f"{WIKIDATA_ITEM_PREFIX}2"
+Q3 = f"{WIKIDATA_ITEM_PREFIX}3"
+
+# (label, language) pairs of the endpoint; Q3 has no label
+LABELS = {Q1: [("universe", "en"), ("univers", "fr")], Q2: [("Erde", "de")], Q3: []}
+
+
+def _label_rows(uris, languages):
+    """Answer a value labels query from LABELS."""
+    rows = []
+    for uri in uris:
+        labels = [
+            (uri, label, lang)
+            for label, lang in LABELS[uri]
+            if not languages or lang in languages
+        ]
+        rows.extend(labels or [(uri, None, None)])
+    return rows
+
+
+def _queried_uris(query):
+    """The item URIs of the VALUES clause of a label query."""
+    return re.findall(rf"<({re.escape(WIKIDATA_ITEM_PREFIX)}\d+)>", query)
+
+
+@pytest.fixture
+def query_cache(tmp_path):
+    """Use a query cache in a temporary directory."""
+    configure_cache(cache_dir=str(tmp_path))
+
+
+class TestEntityLabelCache:
+    """Tests for looking up cached labels of single URIs."""
+
+    def test_lookup_stored_rows(self, query_cache):
+        """Test that stored rows are returned per URI and the others reported."""
+        labels = EntityLabelCache(DEFAULT_SPARQL_ENDPOINT)
+        labels.store(_label_rows([Q1, Q3], None))
+
+        rows, missing = labels.lookup([Q1, Q2, Q3], ["fr", "es"])
+
+        assert rows == [(Q1, "univers", "fr"), (Q3, None, None)]
+        assert missing == [Q2]
+
+    def test_language_subsets(self, query_cache):
+        """Test that labels fetched for some languages only answer subsets of them."""
+        labels = EntityLabelCache(DEFAULT_SPARQL_ENDPOINT)
+        labels.store(_label_rows([Q1], ["en", "fr"]), ["fr", "en"])
+
+        assert labels.lookup([Q1], ["en"]) == ([(Q1, "universe", "en")], [])
+        assert labels.lookup([Q1], ["en", "de"]) == ([], [Q1])
+        assert labels.lookup([Q1]) == ([], [Q1])
+
+    def test_endpoints_separate(self, query_cache):
+        """Test that labels of one endpoint are not used for another."""
+        EntityLabelCache(DEFAULT_SPARQL_ENDPOINT).store(_label_rows([Q1], None))
+
+        assert EntityLabelCache("https://example.org/sparql").lookup([Q1]) == ([], [Q1])
+
+    def test_disabled_cache(self):
+        """Test that nothing is cached while the query cache is disabled."""
+        labels = EntityLabelCache(DEFAULT_SPARQL_ENDPOINT)
+        labels.store(_label_rows([Q1], None))
+
+        assert labels.lookup([Q1]) == ([], [Q1])
+
+
+class TestLabelFunctions:
+    """Tests for label lookups only querying uncached URIs."""
+
+    def test_overlapping_lookups(self, query_cache):
+        """Test that a lookup overlapping an earlier one only queries new URIs."""
+        queried = []
+
+        def run_select(query, variables, observer=None, use_cache=True):
+            uris = _queried_uris(query)
+            queried.append(uris)
+            return _label_rows(uris, ["en", "de"])
+
+        with patch("mlscores.query.run_select", side_effect=run_select):
+            get_value_labels([Q1, Q3], ["en", "de"])
+            result = get_value_labels([Q1, Q2, Q3], ["de", "en"])
+
+        assert queried == [[Q1, Q3], [Q2]]
+        assert sorted(result) == [
+            (Q1, "universe", "en"),
+            (Q2, "Erde", "de"),
+            (Q3, DEFAULT_NO_LABEL, DEFAULT_UNKNOWN_LANGUAGE),
+        ]
+
+    def test_failed_batch_not_cached(self, query_cache):
+        """Test that URIs of failed queries are queried again."""
+        with patch("mlscores.query.run_select", return_value=None):
+            assert get_value_labels([Q1]) == []
+
+        with patch(
+            "mlscores.query.run_select", return_value=_label_rows([Q1], None)
+        ) as run_select:
+            get_value_labels([Q1])
+            get_value_labels([Q1])
+
+        assert run_select.call_count == 1
+
+    def test_async_client(self, query_cache):
+        """Test that async lookups share the per-URI cache."""
+        queried = []
+
+        def handler(request):
+            query = urllib.parse.parse_qs(request.content.decode())["query"][0]
+            uris = _queried_uris(query)
+            queried.append(uris)
+            lines = ["?v\t?valueLabel\t?valueLabelLang"] + [
+                f'<{uri}>\t"{label}"@{lang}\t"{lang}"' if lang else f"<{uri}>\t\t"
+                for uri, label, lang in _label_rows(uris, None)
+            ]
+            return httpx.Response(200, content="\n".join(lines).encode() + b"\n")
+
+        async def run():
+            transport = httpx.MockTransport(handler)
+            async with aquery.AsyncSparqlClient(transport=transport) as client:
+                await aquery.get_value_labels([Q1, Q2], client)
+                return await aquery.get_value_labels([Q2, Q3], client, ["de"])
+
+        result = asyncio.run(run())
+
+        assert queried == [[Q1, Q2], [Q3]]
+        assert sorted(result) == [
+            (Q2, "Erde", "de"),
+            (Q3, DEFAULT_NO_LABEL, DEFAULT_UNKNOWN_LANGUAGE),
+        ]
@@ -4,47 +4,39 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 #
 
+import json
+
 import pytest
 from unittest.mock import patch, Mock
 from io import StringIO
 
-from mlscores.__main__ import calculate_multilinguality_scores, output_results
-from mlscores.formatters import MultilingualityResult
+from mlscores.__main__ import calculate_multilinguality_scores, main, output_results
+from mlscores.formatters import CSVFormatter, JSONFormatter, MultilingualityResult
 
 
 class TestCalculateMultilingualityScores:
     """Tests for the main calculation function."""
 
-    @patch("mlscores.__main__.get_properties_and_values")
-    @patch("mlscores.__main__.get_qualifier_properties_and_values")
-    @patch("mlscores.__main__.get_reference_properties_and_values")
+    @patch("mlscores.__main__.get_statements")
     @patch("mlscores.__main__.get_property_labels")
     @patch("mlscores.__main__.get_value_labels")
-    @patch("mlscores.__main__.time.sleep")
     def test_basic_calculation(
         self,
-        mock_sleep,
         mock_value_labels,
         mock_prop_labels,
-        mock_ref,
-        mock_qual,
-        mock_props,
+        mock_statements,
     ):
         """Test basic calculation flow returns results."""
-        mock_props.return_value = {
-            "results": {
-                "bindings": [
-                    {
-                        "property": {
-                            "value": "http://www.wikidata.org/prop/direct/P31"
-                        },
-                        "value": {"value": "http://www.wikidata.org/entity/Q5"},
-                    }
-                ]
-            }
+        mock_statements.return_value = {
+            "direct": [
+                (
+                    "http://www.wikidata.org/prop/direct/P31",
+                    "http://www.wikidata.org/entity/Q5",
+                )
+            ],
+            "qualifier": [],
+            "reference": [],
         }
-        mock_qual.return_value = None
-        mock_ref.return_value = None
         mock_prop_labels.return_value = [
             ("http://www.wikidata.org/prop/direct/P31", "instance of", "en")
         ]
@@ -60,10 +52,10 @@ class TestCalculateMultilingualityScores:
         assert "en" in results[0].value_label_percentages
         assert "en" in results[0].combined_percentages
 
-    @patch("mlscores.__main__.get_properties_and_values")
-    def test_no_properties_found(self, mock_props, capsys):
+    @patch("mlscores.__main__.get_statements")
+    def test_no_properties_found(self, mock_statements, capsys):
         """Test handling when no properties are found."""
-        mock_props.return_value = None
+        mock_statements.return_value = None
 
         results = calculate_multilinguality_scores(["Q999999999"])
 
@@ -72,36 +64,26 @@ class TestCalculateMultilingualityScores:
         assert len(results) == 1
         assert results[0].item_id == "Q999999999"
 
-    @patch("mlscores.__main__.get_properties_and_values")
-    @patch("mlscores.__main__.get_qualifier_properties_and_values")
-    @patch("mlscores.__main__.get_reference_properties_and_values")
+    @patch("mlscores.__main__.get_statements")
     @patch("mlscores.__main__.get_property_labels")
     @patch("mlscores.__main__.get_value_labels")
-    @patch("mlscores.__main__.time.sleep")
     def test_with_language_codes(
         self,
-        mock_sleep,
         mock_value_labels,
         mock_prop_labels,
-        mock_ref,
-        mock_qual,
-        mock_props,
+        mock_statements,
     ):
         """Test calculation with specific language codes."""
-        mock_props.return_value = {
-            "results": {
-                "bindings": [
-                    {
-                        "property": {
-                            "value": "http://www.wikidata.org/prop/direct/P31"
-                        },
-                        "value": {"value": "http://www.wikidata.org/entity/Q5"},
-                    }
-                ]
-            }
+        mock_statements.return_value = {
+            "direct": [
+                (
+                    "http://www.wikidata.org/prop/direct/P31",
+                    "http://www.wikidata.org/entity/Q5",
+                )
+            ],
+            "qualifier": [],
+            "reference": [],
         }
-        mock_qual.return_value = None
-        mock_ref.return_value = None
         mock_prop_labels.return_value = [
             ("http://www.wikidata.org/prop/direct/P31", "instance of", "en"),
             ("http://www.wikidata.org/prop/direct/P31", "instance de", "fr"),
@@ -118,36 +100,26 @@ class TestCalculateMultilingualityScores:
         assert "en" in results[0].combined_percentages
         assert "fr" in results[0].combined_percentages
 
-    @patch("mlscores.__main__.get_properties_and_values")
-    @patch("mlscores.__main__.get_qualifier_properties_and_values")
-    @patch("mlscores.__main__.get_reference_properties_and_values")
+    @patch("mlscores.__main__.get_statements")
     @patch("mlscores.__main__.get_property_labels")
     @patch("mlscores.__main__.get_value_labels")
-    @patch("mlscores.__main__.time.sleep")
     def test_with_missing_flag(
         self,
-        mock_sleep,
         mock_value_labels,
         mock_prop_labels,
-        mock_ref,
-        mock_qual,
-        mock_props,
+        mock_statements,
     ):
         """Test calculation with missing translations flag."""
-        mock_props.return_value = {
-            "results": {
-                "bindings": [
-                    {
-                        "property": {
-                            "value": "http://www.wikidata.org/prop/direct/P31"
-                        },
-                        "value": {"value": "http://www.wikidata.org/entity/Q5"},
-                    }
-                ]
-            }
+        mock_statements.return_value = {
+            "direct": [
+                (
+                    "http://www.wikidata.org/prop/direct/P31",
+                    "http://www.wikidata.org/entity/Q5",
+                )
+            ],
+            "qualifier": [],
+            "reference": [],
         }
-        mock_qual.return_value = None
-        mock_ref.return_value = None
         mock_prop_labels.return_value = [
             ("http://www.wikidata.org/prop/direct/P31", "instance of", "en")
         ]
@@ -162,36 +134,26 @@ class TestCalculateMultilingualityScores:
         assert results[0].missing_property_translations is not None
         assert results[0].missing_value_translations is not None
 
-    @patch("mlscores.__main__.get_properties_and_values")
-    @patch("mlscores.__main__.get_qualifier_properties_and_values")
-    @patch("mlscores.__main__.get_reference_properties_and_values")
+    @patch("mlscores.__main__.get_statements")
     @patch("mlscores.__main__.get_property_labels")
     @patch("mlscores.__main__.get_value_labels")
-    @patch("mlscores.__main__.time.sleep")
     def test_multiple_items(
         self,
-        mock_sleep,
         mock_value_labels,
         mock_prop_labels,
-        mock_ref,
-        mock_qual,
-        mock_props,
+        mock_statements,
     ):
         """Test calculation with multiple items."""
-        mock_props.return_value = {
-            "results": {
-                "bindings": [
-                    {
-                        "property": {
-                            "value": "http://www.wikidata.org/prop/direct/P31"
-                        },
-                        "value": {"value": "http://www.wikidata.org/entity/Q5"},
-                    }
-                ]
-            }
+        mock_statements.return_value = {
+            "direct": [
+                (
+                    "http://www.wikidata.org/prop/direct/P31",
+                    "http://www.wikidata.org/entity/Q5",
+                )
+            ],
+            "qualifier": [],
+            "reference": [],
         }
-        mock_qual.return_value = None
-        mock_ref.return_value = None
         mock_prop_labels.return_value = [
             ("http://www.wikidata.org/prop/direct/P31", "instance of", "en")
         ]
@@ -205,47 +167,26 @@ class TestCalculateMultilingualityScores:
         assert results[0].item_id == "Q42"
         assert results[1].item_id == "Q5"
 
-    @patch("mlscores.__main__.get_properties_and_values")
-    @patch("mlscores.__main__.get_qualifier_properties_and_values")
-    @patch("mlscores.__main__.get_reference_properties_and_values")
+    @patch("mlscores.__main__.get_statements")
     @patch("mlscores.__main__.get_property_labels")
     @patch("mlscores.__main__.get_value_labels")
-    @patch("mlscores.__main__.time.sleep")
     def test_includes_qualifier_results(
         self,
-        mock_sleep,
         mock_value_labels,
         mock_prop_labels,
-        mock_ref,
-        mock_qual,
-        mock_props,
+        mock_statements,
     ):
         """Test that qualifier results are included."""
-        mock_props.return_value = {
-            "results": {
-                "bindings": [
-                    {
-                        "property": {
-                            "value": "http://www.wikidata.org/prop/direct/P31"
-                        },
-                        "value": {"value": "http://www.wikidata.org/entity/Q5"},
-                    }
-                ]
-            }
-        }
-        mock_qual.return_value = {
-            "results": {
-                "bindings": [
-                    {
-                        "property": {
-                            "value": "http://www.wikidata.org/prop/direct/P580"
-                        },
-                        "value": {"value": "2020-01-01"},
-                    }
-                ]
-            }
+        mock_statements.return_value = {
+            "direct": [
+                (
+                    "http://www.wikidata.org/prop/direct/P31",
+                    "http://www.wikidata.org/entity/Q5",
+                )
+            ],
+            "qualifier": [("http://www.wikidata.org/prop/direct/P580", "2020-01-01")],
+            "reference": [],
         }
-        mock_ref.return_value = None
         mock_prop_labels.return_value = [
             ("http://www.wikidata.org/prop/direct/P31", "instance of", "en"),
             ("http://www.wikidata.org/prop/direct/P580", "start time", "en"),
@@ -260,48 +201,30 @@ class TestCalculateMultilingualityScores:
         assert mock_prop_labels.called
         assert len(results) == 1
 
-    @patch("mlscores.__main__.get_properties_and_values")
-    @patch("mlscores.__main__.get_qualifier_properties_and_values")
-    @patch("mlscores.__main__.get_reference_properties_and_values")
+    @patch("mlscores.__main__.get_statements")
     @patch("mlscores.__main__.get_property_labels")
     @patch("mlscores.__main__.get_value_labels")
-    @patch("mlscores.__main__.time.sleep")
     def test_includes_reference_results(
         self,
-        mock_sleep,
         mock_value_labels,
         mock_prop_labels,
-        mock_ref,
-        mock_qual,
-        mock_props,
+        mock_statements,
     ):
         """Test that reference results are included."""
-        mock_props.return_value = {
-            "results": {
-                "bindings": [
-                    {
-                        "property": {
-                            "value": "http://www.wikidata.org/prop/direct/P31"
-                        },
-                        "value": {"value": "http://www.wikidata.org/entity/Q5"},
-                    }
-                ]
-            }
-        }
-        mock_qual.return_value = None
-        mock_ref.return_value = {
-            "results": {
-                "bindings": [
-                    {
-                        "property": {
-                            "value": "http://www.wikidata.org/prop/direct/P248"
-                        },
-                        "value": {
-                            "value": "http://www.wikidata.org/entity/Q36578"
-                        },
-                    }
-                ]
-            }
+        mock_statements.return_value = {
+            "direct": [
+                (
+                    "http://www.wikidata.org/prop/direct/P31",
+                    "http://www.wikidata.org/entity/Q5",
+                )
+            ],
+            "qualifier": [],
+            "reference": [
+                (
+                    "http://www.wikidata.org/prop/direct/P248",
+                    "http://www.wikidata.org/entity/Q36578",
+                )
+            ],
         }
         mock_prop_labels.return_value = [
             ("http://www.wikidata.org/prop/direct/P31", "instance of", "en"),
@@ -319,6 +242,184 @@ class TestCalculateMultilingualityScores:
         assert len(results) == 1
 
 
+class TestConcurrentScoring:
+    """Tests for scoring items with a worker pool."""
+
+    @patch("mlscores.__main__._calculate_item_scores")
+    def test_results_keep_input_order(self, mock_item_scores):
+        """Test that results follow input order regardless of completion order."""
+        import time as real_time
+
+        def score(item_id, language_codes, missing):
+            # Make earlier items finish later
+            real_time.sleep(0.01 * (5 - int(item_id[1:])))
+            return MultilingualityResult(
+                item_id=item_id,
+                property_label_percentages={},
+                value_label_percentages={},
+                combined_percentages={},
+            )
+
+        mock_item_scores.side_effect = score
+        identifiers = ["Q1", "Q2", "Q3", "Q4", "Q5"]
+
+        results = calculate_multilinguality_scores(identifiers, max_workers=4)
+
+        assert [r.item_id for r in results] == identifiers
+
+    @patch("mlscores.__main__._calculate_item_scores")
+    def test_items_fail_independently(self, mock_item_scores, capsys):
+        """Test that a failing item yields an empty result without stopping others."""
+
+        def score(item_id, language_codes, missing):
+            if item_id == "Q2":
+                raise RuntimeError("boom")
+            return MultilingualityResult(
+                item_id=item_id,
+                property_label_percentages={"en": 100.0},
+                value_label_percentages={"en": 100.0},
+                combined_percentages={"en": 100.0},
+            )
+
+        mock_item_scores.side_effect = score
+
+        results = calculate_multilinguality_scores(
+            ["Q1", "Q2", "Q3"], language_codes=["en"], max_workers=2
+        )
+
+        captured = capsys.readouterr()
+        assert "Error processing Q2" in captured.out
+        assert [r.item_id for r in results] == ["Q1", "Q2", "Q3"]
+        assert results[0].combined_percentages == {"en": 100.0}
+        assert results[1].combined_percentages == {"en": 0.0}
+        assert results[2].combined_percentages == {"en": 100.0}
+
+
+class TestSharedLabels:
+    """Tests for resolving labels once across all items."""
+
+    @patch("mlscores.__main__.get_statements_for_items")
+    @patch("mlscores.__main__.get_property_labels")
+    @patch("mlscores.__main__.get_value_labels")
+    def test_labels_fetched_once_for_all_items(
+        self,
+        mock_value_labels,
+        mock_prop_labels,
+        mock_statements,
+    ):
+        """Test that each distinct URI is resolved once and fanned out per item."""
+        p31 = "http://www.wikidata.org/prop/direct/P31"
+        p21 = "http://www.wikidata.org/prop/direct/P21"
+        q5 = "http://www.wikidata.org/entity/Q5"
+
+        def statements(item_ids, items_per_batch):
+            result = {}
+            for item_id in item_ids:
+                direct = [(p31, q5)]
+                if item_id == "Q42":
+                    direct.append((p21, "x"))
+                result[item_id] = {"direct": direct, "qualifier": [], "reference": []}
+            return result
+
+        mock_statements.side_effect = statements
+        mock_prop_labels.return_value = [
+            (p31, "instance of", "en"),
+            (p31, "nature de l'élément", "fr"),
+            (p21, "sex or gender", "en"),
+        ]
+        mock_value_labels.return_value = [(q5, "human", "en")]
+
+        results = calculate_multilinguality_scores(
+            ["Q42", "Q1", "Q2"], language_codes=["en", "fr"], share_labels=True
+        )
+
+        assert mock_statements.call_count == 1
+        assert mock_prop_labels.call_count == 1
+        assert mock_value_labels.call_count == 1
+        assert sorted(mock_prop_labels.call_args.args[0]) == [p21, p31]
+        assert mock_value_labels.call_args.args[0] == [q5]
+        assert [r.item_id for r in results] == ["Q42", "Q1", "Q2"]
+        assert results[0].property_label_percentages == {"en": 100.0, "fr": 50.0}
+        assert results[1].property_label_percentages == {"en": 100.0, "fr": 100.0}
+        assert results[2].value_label_percentages == {"en": 100.0, "fr": 0.0}
+
+    @patch("mlscores.__main__.get_statements_for_items")
+    @patch("mlscores.__main__.get_property_labels")
+    @patch("mlscores.__main__.get_value_labels")
+    def test_item_without_properties(
+        self,
+        mock_value_labels,
+        mock_prop_labels,
+        mock_statements,
+        capsys,
+    ):
+        """Test that items without properties get empty results."""
+        mock_statements.return_value = {"Q999999999": None}
+        mock_prop_labels.return_value = []
+        mock_value_labels.return_value = []
+
+        results = calculate_multilinguality_scores(
+            ["Q999999999"], language_codes=["en"], share_labels=True
+        )
+
+        captured = capsys.readouterr()
+        assert "No properties and values found" in captured.out
+        assert results[0].combined_percentages == {"en": 0.0}
+
+
+class TestAggregateScoring:
+    """Tests for scoring from server-side label counts."""
+
+    @patch("mlscores.__main__.get_statements")
+    @patch("mlscores.__main__.get_property_label_counts")
+    @patch("mlscores.__main__.get_value_label_counts")
+    @patch("mlscores.__main__.get_property_labels")
+    def test_aggregate_uses_counts(
+        self,
+        mock_prop_labels,
+        mock_value_counts,
+        mock_prop_counts,
+        mock_statements,
+        sample_statements,
+    ):
+        """Test that percentages are computed from counts without label text."""
+        mock_statements.return_value = sample_statements
+        mock_prop_counts.return_value = (2, {"en": 2, "fr": 1})
+        mock_value_counts.return_value = (2, {"en": 1})
+
+        results = calculate_multilinguality_scores(
+            ["Q42"], language_codes=["en", "fr"], aggregate=True
+        )
+
+        assert not mock_prop_labels.called
+        assert results[0].property_label_percentages == {"en": 100.0, "fr": 50.0}
+        assert results[0].value_label_percentages == {"en": 50.0, "fr": 0.0}
+        assert results[0].combined_percentages == {"en": 75.0, "fr": 25.0}
+
+    @patch("mlscores.__main__.get_statements")
+    @patch("mlscores.__main__.get_property_label_counts")
+    @patch("mlscores.__main__.get_property_labels")
+    @patch("mlscores.__main__.get_value_labels")
+    def test_aggregate_falls_back_with_missing(
+        self,
+        mock_value_labels,
+        mock_prop_labels,
+        mock_prop_counts,
+        mock_statements,
+        sample_statements,
+    ):
+        """Test that missing translations use the label download path."""
+        mock_statements.return_value = sample_statements
+        mock_prop_labels.return_value = []
+        mock_value_labels.return_value = []
+
+        results = calculate_multilinguality_scores(["Q42"], missing=True, aggregate=True)
+
+        assert not mock_prop_counts.called
+        assert mock_prop_labels.called
+        assert results[0].missing_property_translations is not None
+
+
 class TestOutputResults:
     """Tests for the output_results function."""
 
@@ -356,7 +457,7 @@ class TestOutputResults:
         assert "item_id" in captured.out
         assert "Q42" in captured.out
 
-    @patch("mlscores.__main__.print_language_percentages")
+    @patch("mlscores.scoring.print_language_percentages")
     def test_output_table_format(self, mock_print):
         """Test table output format."""
         results = [
@@ -372,3 +473,46 @@ class TestOutputResults:
 
         # Table format should call print_language_percentages 3 times per item
         assert mock_print.call_count == 3
+
+    def test_results_streamed(self):
+        """Test that JSON and CSV results can be written from a generator."""
+        results = [
+            MultilingualityResult(
+                item_id=item_id,
+                property_label_percentages={"en": 100.0},
+                value_label_percentages={lang: 50.0},
+                combined_percentages={"en": 75.0, lang: 25.0},
+            )
+            for item_id, lang in (("Q42", "fr"), ("Q5", "de"))
+        ]
+        stream = StringIO()
+
+        def produce():
+            yield results[0]
+            # The first result is written before the second one is produced
+            assert '"item_id": "Q42"' in stream.getvalue()
+            yield results[1]
+
+        JSONFormatter().write(produce(), stream)
+
+        assert stream.getvalue() == JSONFormatter().format(results)
+        assert [r["item_id"] for r in json.loads(stream.getvalue())] == ["Q42", "Q5"]
+
+        stream = StringIO()
+        CSVFormatter().write(iter(results), stream)
+
+        assert stream.getvalue() == CSVFormatter().format(results)
+        assert stream.getvalue().splitlines()[0] == "item_id,category,de,en,fr"
+
+
+class TestCommandLine:
+    """Tests for validation of command line options."""
+
+    @pytest.mark.parametrize("rate", ["0", "-2", "nan", "fast"])
+    def test_rate_limit_must_be_positive(self, rate, capsys):
+        """Test that a zero, negative or invalid rate limit is rejected."""
+        with patch("sys.argv", ["mlscores", "Q42", "--rate-limit", rate]):
+            with pytest.raises(SystemExit):
+                main()
+
+        assert "--rate-limit" in capsys.readouterr().err
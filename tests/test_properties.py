@@ -0,0 +1,257 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+import asyncio
+import json
+import re
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from mlscores.aquery import AsyncSparqlClient
+from mlscores.aquery import get_property_labels as aget_property_labels
+from mlscores.constants import (
+    DEFAULT_NO_LABEL,
+    DEFAULT_SPARQL_ENDPOINT,
+    DEFAULT_UNKNOWN_LANGUAGE,
+    WIKIDATA_PROPERTY_PREFIX,
+)
+from mlscores.properties import (
+    PropertyLabelTable,
+    configure_property_tables,
+    get_property_table,
+    main,
+    property_table_path,
+    warm_property_table,
+)
+from mlscores.query import get_property_label_counts, get_property_labels
+
+P31 = f"{WIKIDATA_PROPERTY_PREFIX}P31"
+P69 = f"{WIKIDATA_PROPERTY_PREFIX}P69"
+P99 = f"{WIKIDATA_PROPERTY_PREFIX}P99"
+NEW = f"{WIKIDATA_PROPERTY_PREFIX}P9999"
+
+# (property, language) rows of the endpoint, ordered as the warm-up query asks
+PROPERTY_LANGUAGES = [
+    (P31, "de"),
+    (P31, "en"),
+    (P31, "fr"),
+    (P69, "en"),
+    (P99, None),
+]
+
+
+def _pages(query, variables, observer=None, use_cache=True):
+    """Answer warm-up queries from PROPERTY_LANGUAGES."""
+    assert use_cache is False
+    limit = int(re.search(r"LIMIT (\d+)", query).group(1))
+    offset = int(re.search(r"OFFSET (\d+)", query).group(1))
+    return PROPERTY_LANGUAGES[offset : offset + limit]
+
+
+@pytest.fixture
+def table_dir(tmp_path):
+    """Use property label tables from a temporary directory."""
+    configure_property_tables(directory=str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def warm_table(table_dir):
+    """A warm property label table of the default endpoint."""
+    with patch("mlscores.query.run_select", side_effect=_pages):
+        table, _ = warm_property_table(page_size=2)
+    return table
+
+
+class TestPropertyLabelTable:
+    """Tests for looking labels up in a property label table."""
+
+    def test_get_labels(self):
+        """Test that rows match the tuples of a label query."""
+        table = PropertyLabelTable(
+            DEFAULT_SPARQL_ENDPOINT,
+            {"P31": frozenset({"en", "fr"}), "P99": frozenset()},
+        )
+
+        rows, missing = table.get_labels([P31, P99, NEW], ["fr", "es"])
+
+        assert rows == [
+            (P31, "", "fr"),
+            (P99, DEFAULT_NO_LABEL, DEFAULT_UNKNOWN_LANGUAGE),
+        ]
+        assert missing == [NEW]
+        assert table.get_label_counts([P31, P99, NEW]) == (
+            2,
+            {"en": 1, "fr": 1, DEFAULT_UNKNOWN_LANGUAGE: 1},
+            [NEW],
+        )
+
+    def test_save_and_load(self, tmp_path):
+        """Test that a saved table is read back with shared language sets."""
+        path = tmp_path / "table.json"
+        table = PropertyLabelTable(
+            DEFAULT_SPARQL_ENDPOINT,
+            {"P31": frozenset({"en", "fr"}), "P69": frozenset({"fr", "en"})},
+            timestamp=1.0,
+        )
+
+        table.save(path)
+        loaded = PropertyLabelTable.load(path)
+
+        assert loaded.languages == table.languages
+        assert loaded.languages["P31"] is loaded.languages["P69"]
+        assert loaded.timestamp == 1.0
+        assert json.loads(path.read_text())["languages"] == ["en", "fr"]
+
+    def test_other_wikibase_prefix(self, tmp_path):
+        """Test that tables of other Wikibase instances use their property prefix."""
+        prefix = "https://wikibase.example/prop/direct/"
+        path = tmp_path / "table.json"
+        PropertyLabelTable(
+            "https://wikibase.example/sparql",
+            {"P1": frozenset({"en"})},
+            property_prefix=prefix,
+        ).save(path)
+
+        table = PropertyLabelTable.load(path)
+
+        assert table.get_labels([f"{prefix}P1", P31]) == (
+            [(f"{prefix}P1", "", "en")],
+            [P31],
+        )
+
+    def test_invalid_table(self, tmp_path):
+        """Test that other JSON files are rejected."""
+        path = tmp_path / "table.json"
+        path.write_text("{}")
+
+        with pytest.raises(ValueError):
+            PropertyLabelTable.load(path)
+
+
+class TestWarmPropertyTable:
+    """Tests for fetching and refreshing property label tables."""
+
+    def test_paged_fetch(self, table_dir):
+        """Test that all pages are fetched and unlabelled properties kept."""
+        with patch("mlscores.query.run_select", side_effect=_pages) as run_select:
+            table, fetched = warm_property_table(page_size=2)
+
+        assert fetched
+        assert run_select.call_count == 3
+        assert table.languages == {
+            "P31": {"de", "en", "fr"},
+            "P69": {"en"},
+            "P99": set(),
+        }
+        assert property_table_path(DEFAULT_SPARQL_ENDPOINT).is_file()
+
+    def test_fresh_table_kept(self, warm_table):
+        """Test that a table is only fetched again once expired or forced."""
+        with patch("mlscores.query.run_select", side_effect=_pages) as run_select:
+            _, fetched = warm_property_table(page_size=2)
+            assert not fetched
+            assert run_select.call_count == 0
+
+            _, fetched = warm_property_table(page_size=2, force=True)
+            assert fetched
+
+    def test_failed_page(self, table_dir):
+        """Test that a failing page leaves no partial table behind."""
+        with patch("mlscores.query.run_select", return_value=None):
+            with pytest.raises(RuntimeError):
+                warm_property_table()
+
+        assert not property_table_path(DEFAULT_SPARQL_ENDPOINT).exists()
+
+    def test_expired_table_not_used(self, table_dir):
+        """Test that expired tables are ignored until they are refreshed."""
+        configure_property_tables(directory=str(table_dir), ttl_seconds=60)
+        path = property_table_path(DEFAULT_SPARQL_ENDPOINT)
+        languages = {"P31": frozenset({"en"})}
+        PropertyLabelTable(
+            DEFAULT_SPARQL_ENDPOINT, languages, timestamp=time.time() - 120
+        ).save(path)
+
+        assert get_property_table(DEFAULT_SPARQL_ENDPOINT) is None
+
+        PropertyLabelTable(DEFAULT_SPARQL_ENDPOINT, languages).save(path)
+        # Tables refreshed by another process are picked up once rechecked
+        with patch("mlscores.properties.PROPERTY_TABLE_RECHECK_SECONDS", 0):
+            assert get_property_table(DEFAULT_SPARQL_ENDPOINT) is not None
+
+    def test_zero_ttl(self, table_dir):
+        """Test that a TTL of zero is kept rather than replaced by the default."""
+        configure_property_tables(directory=str(table_dir), ttl_seconds=0)
+        PropertyLabelTable(
+            DEFAULT_SPARQL_ENDPOINT,
+            {"P31": frozenset({"en"})},
+            timestamp=time.time() - 1,
+        ).save(property_table_path(DEFAULT_SPARQL_ENDPOINT))
+
+        assert get_property_table(DEFAULT_SPARQL_ENDPOINT) is None
+
+    def test_cli(self, table_dir, capsys):
+        """Test the warm-properties command."""
+        with patch("mlscores.query.run_select", side_effect=_pages):
+            main(["--dir", str(table_dir), "--page-size", "2"])
+
+        assert "3 properties" in capsys.readouterr().out
+
+
+class TestPropertyLabelsFromTable:
+    """Tests for label lookups answered from a warm table."""
+
+    def test_no_query_for_known_properties(self, warm_table):
+        """Test that only properties missing from the table are queried."""
+        queried = []
+
+        def run_select(query, variables, observer=None, use_cache=True):
+            queried.append(query)
+            return [(NEW, "new property", "en")]
+
+        with patch("mlscores.query.run_select", side_effect=run_select):
+            assert get_property_labels([P31, P69], ["en", "fr"]) == [
+                (P31, "", "en"),
+                (P31, "", "fr"),
+                (P69, "", "en"),
+            ]
+            assert not queried
+
+            result = get_property_labels([P31, NEW], ["en"])
+
+        assert result == [(P31, "", "en"), (NEW, "new property", "en")]
+        assert len(queried) == 1
+        assert "P9999" in queried[0] and "P31>" not in queried[0]
+
+    def test_label_counts(self, warm_table):
+        """Test that label counts of known properties need no query."""
+        with patch("mlscores.query.run_select") as run_select:
+            assert get_property_label_counts([P31, P69, P99], ["en", "fr"]) == (
+                3,
+                {"en": 2, "fr": 1, DEFAULT_UNKNOWN_LANGUAGE: 1},
+            )
+
+        run_select.assert_not_called()
+
+    def test_async_client(self, warm_table):
+        """Test that async label lookups use the table too."""
+
+        def handler(request):
+            raise AssertionError("no query expected")
+
+        async def run():
+            transport = httpx.MockTransport(handler)
+            async with AsyncSparqlClient(transport=transport) as client:
+                return await aget_property_labels([P69, P99], client, ["en"])
+
+        assert asyncio.run(run()) == [
+            (P69, "", "en"),
+            (P99, DEFAULT_NO_LABEL, DEFAULT_UNKNOWN_LANGUAGE),
+        ]
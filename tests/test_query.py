@@ -4,6 +4,10 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 #
 
+import gzip
+import http.client
+import io
+import json
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 import urllib.error
@@ -15,7 +19,20 @@ from mlscores.query import (
     get_property_labels,
     get_value_labels,
     safe_query,
+    get_sparql,
+    run_query,
+    run_select,
+    get_property_label_counts,
+    get_value_label_counts,
+    get_statements,
+    get_statements_for_items,
+    set_result_format,
+    value_label_batcher,
 )
+from mlscores.bindings import DecodeStats
+from mlscores.transport import SessionResult
+from mlscores.cache import configure_cache
+from mlscores.endpoint import EndpointConfig
 from mlscores.constants import (
     WIKIDATA_PROPERTY_PREFIX,
     WIKIDATA_ITEM_PREFIX,
@@ -24,6 +41,14 @@ from mlscores.constants import (
 )
 
 
+def _streaming_sparql(response):
+    """Create a SPARQL session mock whose queries stream the given JSON response."""
+    payload = json.dumps(response).encode()
+    mock_sparql = Mock(endpoint="https://example.org/sparql")
+    mock_sparql.query.side_effect = lambda: Mock(response=io.BytesIO(payload))
+    return mock_sparql
+
+
 class TestGetPropertiesAndValues:
     """Tests for get_properties_and_values function."""
 
@@ -62,12 +87,12 @@ class TestGetPropertyLabels:
         for item in result:
             assert item[0].startswith(WIKIDATA_PROPERTY_PREFIX)
 
-    @patch("mlscores.query.safe_query")
+    @patch("mlscores.query.get_sparql")
     def test_returns_tuples_with_correct_structure(
-        self, mock_safe_query, sample_property_labels_response
+        self, mock_get_sparql, sample_property_labels_response
     ):
         """Test that results are returned as tuples of (uri, label, language)."""
-        mock_safe_query.return_value = sample_property_labels_response
+        mock_get_sparql.return_value = _streaming_sparql(sample_property_labels_response)
 
         uris = [f"{WIKIDATA_PROPERTY_PREFIX}P31"]
         result = get_property_labels(uris)
@@ -77,16 +102,18 @@ class TestGetPropertyLabels:
             assert isinstance(item, tuple)
             assert len(item) == 3  # (uri, label, language)
 
-    @patch("mlscores.query.safe_query")
-    def test_handles_missing_labels(self, mock_safe_query):
+    @patch("mlscores.query.get_sparql")
+    def test_handles_missing_labels(self, mock_get_sparql):
         """Test handling of properties without labels."""
-        mock_safe_query.return_value = {
-            "results": {
-                "bindings": [
-                    {"p": {"value": f"{WIKIDATA_PROPERTY_PREFIX}P31"}},
-                ]
+        mock_get_sparql.return_value = _streaming_sparql(
+            {
+                "results": {
+                    "bindings": [
+                        {"p": {"value": f"{WIKIDATA_PROPERTY_PREFIX}P31"}},
+                    ]
+                }
             }
-        }
+        )
 
         uris = [f"{WIKIDATA_PROPERTY_PREFIX}P31"]
         result = get_property_labels(uris)
@@ -95,16 +122,16 @@ class TestGetPropertyLabels:
         assert result[0][1] == DEFAULT_NO_LABEL
         assert result[0][2] == DEFAULT_UNKNOWN_LANGUAGE
 
-    @patch("mlscores.query.safe_query")
-    def test_batching_large_uri_list(self, mock_safe_query):
+    @patch("mlscores.query.safe_select")
+    def test_batching_large_uri_list(self, mock_safe_select):
         """Test that large URI lists are processed in batches."""
-        mock_safe_query.return_value = {"results": {"bindings": []}}
+        mock_safe_select.return_value = ([], DecodeStats("tsv", 0, 0.0))
 
         # Create 250 URIs (should result in 3 batches with batch_size=100)
         uris = [f"{WIKIDATA_PROPERTY_PREFIX}P{i}" for i in range(250)]
 
         get_property_labels(uris)
-        assert mock_safe_query.call_count == 3
+        assert mock_safe_select.call_count == 3
 
 
 class TestGetValueLabels:
@@ -125,12 +152,12 @@ class TestGetValueLabels:
         result = get_value_labels(uris)
         assert isinstance(result, list)
 
-    @patch("mlscores.query.safe_query")
+    @patch("mlscores.query.get_sparql")
     def test_returns_tuples_with_correct_structure(
-        self, mock_safe_query, sample_value_labels_response
+        self, mock_get_sparql, sample_value_labels_response
     ):
         """Test that results are returned as tuples of (uri, label, language)."""
-        mock_safe_query.return_value = sample_value_labels_response
+        mock_get_sparql.return_value = _streaming_sparql(sample_value_labels_response)
 
         uris = [f"{WIKIDATA_ITEM_PREFIX}5"]
         result = get_value_labels(uris)
@@ -140,16 +167,18 @@ class TestGetValueLabels:
             assert isinstance(item, tuple)
             assert len(item) == 3
 
-    @patch("mlscores.query.safe_query")
-    def test_handles_missing_labels(self, mock_safe_query):
+    @patch("mlscores.query.get_sparql")
+    def test_handles_missing_labels(self, mock_get_sparql):
         """Test handling of values without labels."""
-        mock_safe_query.return_value = {
-            "results": {
-                "bindings": [
-                    {"v": {"value": f"{WIKIDATA_ITEM_PREFIX}42"}},
-                ]
+        mock_get_sparql.return_value = _streaming_sparql(
+            {
+                "results": {
+                    "bindings": [
+                        {"v": {"value": f"{WIKIDATA_ITEM_PREFIX}42"}},
+                    ]
+                }
             }
-        }
+        )
 
         uris = [f"{WIKIDATA_ITEM_PREFIX}42"]
         result = get_value_labels(uris)
@@ -165,7 +194,7 @@ class TestSafeQuery:
     @patch("mlscores.query.tqdm")
     def test_safe_query_success(self, mock_tqdm):
         """Test successful query execution."""
-        mock_sparql = Mock()
+        mock_sparql = Mock(endpoint="https://example.org/sparql")
         mock_result = {"results": {"bindings": []}}
         mock_sparql.query().convert.return_value = mock_result
 
@@ -181,7 +210,7 @@ class TestSafeQuery:
     @patch("mlscores.query.time.sleep")
     def test_safe_query_retry_on_429(self, mock_sleep, mock_tqdm):
         """Test retry behavior on rate limit (429) error."""
-        mock_sparql = Mock()
+        mock_sparql = Mock(endpoint="https://example.org/sparql")
 
         # First call raises 429, second succeeds
         mock_result = {"results": {"bindings": []}}
@@ -203,7 +232,7 @@ class TestSafeQuery:
     @patch("mlscores.query.tqdm")
     def test_safe_query_returns_none_on_other_http_error(self, mock_tqdm):
         """Test that other HTTP errors return None."""
-        mock_sparql = Mock()
+        mock_sparql = Mock(endpoint="https://example.org/sparql")
 
         http_error = urllib.error.HTTPError(
             url="test", code=500, msg="Internal Server Error", hdrs={}, fp=None
@@ -217,6 +246,30 @@ class TestSafeQuery:
         result = safe_query(mock_sparql)
         assert result is None
 
+    @patch("mlscores.query.tqdm")
+    @patch("mlscores.query.time.sleep")
+    def test_truncated_responses_retried(self, mock_sleep, mock_tqdm):
+        """Test that cut-off responses reset the session and are retried."""
+        mock_result = {"results": {"bindings": []}}
+        body = gzip.compress(json.dumps(mock_result).encode())
+        truncated_gzip = Mock(headers={}, getheader=Mock(return_value="gzip"))
+        truncated_gzip.read = io.BytesIO(body[: len(body) // 2]).read
+        complete = Mock(headers={}, getheader=Mock(return_value="gzip"))
+        complete.read = io.BytesIO(body).read
+
+        mock_sparql = Mock(endpoint="https://example.org/sparql")
+        mock_sparql.query.side_effect = [
+            http.client.IncompleteRead(b"{"),
+            SessionResult(truncated_gzip),
+            SessionResult(complete),
+        ]
+        mock_tqdm.return_value.__enter__ = Mock(return_value=MagicMock())
+        mock_tqdm.return_value.__exit__ = Mock(return_value=False)
+
+        assert safe_query(mock_sparql) == mock_result
+        assert mock_sparql.close.call_count == 2
+        assert mock_sleep.call_count == 2
+
 
 class TestGetQualifierPropertiesAndValues:
     """Tests for get_qualifier_properties_and_values function."""
@@ -238,3 +291,344 @@ class TestGetReferencePropertiesAndValues:
         result = get_reference_properties_and_values("Q5")
         # Result could be None or have bindings depending on the item
         assert result is None or "results" in result
+
+
+class TestGetSparql:
+    """Tests for per-thread SPARQL sessions."""
+
+    def test_same_wrapper_within_thread(self):
+        """Test that a thread reuses its own wrapper."""
+        assert get_sparql() is get_sparql()
+
+    def test_distinct_wrapper_per_thread(self):
+        """Test that different threads get different wrappers."""
+        import threading
+
+        wrappers = []
+        thread = threading.Thread(target=lambda: wrappers.append(get_sparql()))
+        thread.start()
+        thread.join()
+
+        assert wrappers[0] is not get_sparql()
+
+    def test_configure_endpoint_replaces_sessions(self):
+        """Test that sessions are recreated for a new endpoint configuration."""
+        from mlscores.endpoint import EndpointConfig
+        from mlscores.query import configure_endpoint
+
+        before = get_sparql()
+        configure_endpoint(EndpointConfig(url="https://example.org/sparql"))
+        try:
+            assert get_sparql() is not before
+            assert get_sparql().endpoint == "https://example.org/sparql"
+        finally:
+            configure_endpoint(EndpointConfig())
+
+
+class TestRunQueryCache:
+    """Tests for the read-through query cache."""
+
+    @patch("mlscores.query.safe_query")
+    def test_second_query_served_from_cache(
+        self, mock_safe_query, tmp_path, sample_sparql_response
+    ):
+        """Test that a repeated query does not hit the endpoint again."""
+        configure_cache(cache_dir=str(tmp_path))
+        mock_safe_query.return_value = sample_sparql_response
+
+        first = run_query("SELECT ?s WHERE { ?s ?p ?o }")
+        second = run_query("SELECT ?s WHERE { ?s ?p ?o }")
+
+        assert first == second == sample_sparql_response
+        assert mock_safe_query.call_count == 1
+
+    @patch("mlscores.query.safe_query")
+    def test_failed_query_not_cached(self, mock_safe_query, tmp_path):
+        """Test that failed queries are retried on the next call."""
+        configure_cache(cache_dir=str(tmp_path))
+        mock_safe_query.return_value = None
+
+        run_query("SELECT ?s WHERE { ?s ?p ?o }")
+        run_query("SELECT ?s WHERE { ?s ?p ?o }")
+
+        assert mock_safe_query.call_count == 2
+
+    @patch("mlscores.query.safe_query")
+    def test_observer_called_for_endpoint_queries_only(
+        self, mock_safe_query, tmp_path, sample_sparql_response
+    ):
+        """Test that the observer sees endpoint queries but not cache hits."""
+        configure_cache(cache_dir=str(tmp_path))
+        mock_safe_query.return_value = sample_sparql_response
+        observer = Mock()
+
+        run_query("SELECT ?s WHERE { ?s ?p ?o }", observer=observer)
+        run_query("SELECT ?s WHERE { ?s ?p ?o }", observer=observer)
+
+        observer.assert_called_once()
+        assert observer.call_args.args[0] == sample_sparql_response
+
+    @patch("mlscores.query.get_sparql")
+    def test_select_rows_cached_as_tuples(
+        self, mock_get_sparql, tmp_path, sample_property_labels_response
+    ):
+        """Test that streamed rows are cached and returned as tuples."""
+        configure_cache(cache_dir=str(tmp_path))
+        mock_sparql = _streaming_sparql(sample_property_labels_response)
+        mock_get_sparql.return_value = mock_sparql
+        variables = ("p", "propertyLabel", "propertyLabelLang")
+
+        first = run_select("SELECT ?p WHERE { ?p ?q ?r }", variables)
+        second = run_select("SELECT ?p WHERE { ?p ?q ?r }", variables)
+
+        assert first == second
+        assert first[0] == (f"{WIKIDATA_PROPERTY_PREFIX}P31", "instance of", "en")
+        assert mock_sparql.query.call_count == 1
+
+    @patch("mlscores.query.get_sparql")
+    def test_select_requests_tabular_results(self, mock_get_sparql):
+        """Test that run_select asks for TSV and decodes a TSV response."""
+        tsv = (
+            "?p\t?propertyLabel\t?propertyLabelLang\n"
+            '<http://x/P31>\t"instance of"@en\t"en"\n'
+        )
+        mock_sparql = Mock(endpoint="https://example.org/sparql")
+        mock_sparql.query.return_value = Mock(response=io.BytesIO(tsv.encode()))
+        mock_get_sparql.return_value = mock_sparql
+
+        rows = run_select("SELECT ?p", ("p", "propertyLabel", "propertyLabelLang"))
+
+        assert rows == [("http://x/P31", "instance of", "en")]
+        accept = mock_sparql.addCustomHttpHeader.call_args.args
+        assert accept[0] == "Accept"
+        assert accept[1].startswith("text/tab-separated-values")
+
+    @patch("mlscores.query.get_sparql")
+    def test_select_result_format(self, mock_get_sparql):
+        """Test that the requested result format can be changed."""
+        mock_sparql = _streaming_sparql({"results": {"bindings": []}})
+        mock_get_sparql.return_value = mock_sparql
+
+        set_result_format("json")
+        try:
+            run_select("SELECT ?p", ("p",))
+        finally:
+            set_result_format("tsv")
+
+        assert mock_sparql.addCustomHttpHeader.call_args.args[1] == (
+            "application/sparql-results+json"
+        )
+
+    def test_unknown_result_format(self):
+        """Test that unsupported result formats are rejected."""
+        with pytest.raises(ValueError):
+            set_result_format("xml")
+
+    @patch("mlscores.query.get_sparql")
+    def test_label_batch_records_bytes(self, mock_get_sparql, sample_value_labels_response):
+        """Test that the response size of label queries reaches the batcher."""
+        mock_get_sparql.return_value = _streaming_sparql(sample_value_labels_response)
+
+        get_value_labels([f"{WIKIDATA_ITEM_PREFIX}5"])
+
+        assert value_label_batcher.bytes_per_uri == len(
+            json.dumps(sample_value_labels_response).encode()
+        )
+
+    @patch("mlscores.query.safe_select")
+    def test_failed_label_batch_shrinks_batch_size(self, mock_safe_select):
+        """Test that a failed label query halves the next batch."""
+        mock_safe_select.return_value = None
+        initial_size = value_label_batcher.size
+
+        get_value_labels([f"{WIKIDATA_ITEM_PREFIX}5"])
+
+        assert value_label_batcher.size == initial_size // 2
+
+    @patch("mlscores.query.run_select")
+    def test_label_batches_are_canonical(self, mock_run_select):
+        """Test that the same URI set always produces the same batch queries."""
+        mock_run_select.return_value = []
+        uris = [f"{WIKIDATA_ITEM_PREFIX}{i}" for i in range(150)]
+
+        get_value_labels(uris)
+        first_queries = [c.args[0] for c in mock_run_select.call_args_list]
+        mock_run_select.reset_mock()
+
+        get_value_labels(list(reversed(uris)))
+        second_queries = [c.args[0] for c in mock_run_select.call_args_list]
+
+        assert first_queries == second_queries
+
+
+class TestLanguageFilter:
+    """Tests for pushing the language filter into label queries."""
+
+    @patch("mlscores.query.run_select")
+    def test_property_labels_query_filters_languages(self, mock_run_select):
+        """Test that requested languages are part of the query."""
+        mock_run_select.return_value = []
+
+        get_property_labels([f"{WIKIDATA_PROPERTY_PREFIX}P31"], ["en", "fr"])
+
+        query = mock_run_select.call_args.args[0]
+        assert 'FILTER(LANG(?propertyLabel) IN ("en", "fr"))' in query
+
+    @patch("mlscores.query.run_select")
+    def test_value_labels_query_without_languages(self, mock_run_select):
+        """Test that no filter is added when no languages are given."""
+        mock_run_select.return_value = []
+
+        get_value_labels([f"{WIKIDATA_ITEM_PREFIX}5"])
+
+        assert "FILTER(LANG" not in mock_run_select.call_args.args[0]
+
+    def test_language_codes_are_escaped(self):
+        """Test that quotes in language codes cannot break out of the literal."""
+        from mlscores.query import build_value_labels_query
+
+        query = build_value_labels_query([f"{WIKIDATA_ITEM_PREFIX}5"], ['en") || ("'])
+        assert 'IN ("en\\") || (\\"")' in query
+
+
+class TestLabelCounts:
+    """Tests for server-side label counting."""
+
+    @patch("mlscores.query.run_select")
+    def test_counts_summed_over_batches(self, mock_run_select):
+        """Test that per-language counts are summed across batches."""
+        mock_run_select.return_value = [("en", "90"), (None, "10")]
+        uris = [f"{WIKIDATA_PROPERTY_PREFIX}P{i}" for i in range(200)]
+
+        total, counts = get_property_label_counts(uris, ["en"])
+
+        assert mock_run_select.call_count == 2
+        assert "GROUP BY ?lang" in mock_run_select.call_args.args[0]
+        assert total == 200
+        assert counts == {"en": 180, DEFAULT_UNKNOWN_LANGUAGE: 20}
+
+    @patch("mlscores.query.run_select")
+    def test_failed_batches_not_counted(self, mock_run_select):
+        """Test that URIs of failed batches are left out of the total."""
+        mock_run_select.return_value = None
+
+        total, counts = get_value_label_counts([f"{WIKIDATA_ITEM_PREFIX}5"])
+
+        assert total == 0
+        assert counts == {}
+
+
+class TestGetStatements:
+    """Tests for the combined statements query."""
+
+    @patch("mlscores.query.run_select")
+    def test_pairs_grouped_by_source(self, mock_run_select):
+        """Test that rows are split by their source tag in a single request."""
+        mock_run_select.return_value = [
+            ("direct", f"{WIKIDATA_PROPERTY_PREFIX}P31", f"{WIKIDATA_ITEM_PREFIX}5"),
+            ("reference", f"{WIKIDATA_PROPERTY_PREFIX}P248", f"{WIKIDATA_ITEM_PREFIX}36578"),
+        ]
+
+        result = get_statements("Q42")
+
+        assert mock_run_select.call_count == 1
+        assert "UNION" in mock_run_select.call_args.args[0]
+        assert result == {
+            "direct": [(f"{WIKIDATA_PROPERTY_PREFIX}P31", f"{WIKIDATA_ITEM_PREFIX}5")],
+            "qualifier": [],
+            "reference": [
+                (f"{WIKIDATA_PROPERTY_PREFIX}P248", f"{WIKIDATA_ITEM_PREFIX}36578")
+            ],
+        }
+
+    @patch("mlscores.query.run_select")
+    def test_failed_query(self, mock_run_select):
+        """Test that a failed query returns None."""
+        mock_run_select.return_value = None
+        assert get_statements("Q42") is None
+
+
+class TestGetStatementsForItems:
+    """Tests for batched multi-item statement queries."""
+
+    @patch("mlscores.query.run_select")
+    def test_rows_split_per_item(self, mock_run_select):
+        """Test that rows of a batch are assigned to their items."""
+        mock_run_select.return_value = [
+            (
+                "http://www.wikidata.org/entity/Q42",
+                "direct",
+                f"{WIKIDATA_PROPERTY_PREFIX}P31",
+                f"{WIKIDATA_ITEM_PREFIX}5",
+            ),
+            (
+                "http://www.wikidata.org/entity/Q1",
+                "qualifier",
+                f"{WIKIDATA_PROPERTY_PREFIX}P580",
+                "2020-01-01",
+            ),
+        ]
+
+        result = get_statements_for_items(["Q42", "Q1", "Q2"])
+
+        assert mock_run_select.call_count == 1
+        assert "VALUES ?item { wd:Q42 wd:Q1 wd:Q2 }" in mock_run_select.call_args.args[0]
+        assert result["Q42"]["direct"] == [
+            (f"{WIKIDATA_PROPERTY_PREFIX}P31", f"{WIKIDATA_ITEM_PREFIX}5")
+        ]
+        assert result["Q1"]["qualifier"] == [
+            (f"{WIKIDATA_PROPERTY_PREFIX}P580", "2020-01-01")
+        ]
+        assert result["Q2"] == {"direct": [], "qualifier": [], "reference": []}
+
+    @patch("mlscores.query.run_select")
+    def test_custom_wikibase_prefixes(self, mock_run_select):
+        """Test that items of other Wikibase instances are queried and mapped."""
+        from mlscores.endpoint import create_endpoint_config
+        from mlscores.query import configure_endpoint
+
+        property_uri = "https://wikibase.example/prop/direct/P1"
+        mock_run_select.return_value = [
+            ("https://wikibase.example/entity/Q7", "direct", property_uri, "x")
+        ]
+        configure_endpoint(
+            create_endpoint_config(
+                url="https://wikibase.example/sparql",
+                property_prefix="https://wikibase.example/prop/direct/",
+                entity_prefix="https://wikibase.example/entity/",
+            )
+        )
+        try:
+            result = get_statements_for_items(["Q7"])
+        finally:
+            configure_endpoint(EndpointConfig())
+
+        query = mock_run_select.call_args.args[0]
+        assert "PREFIX wd: <https://wikibase.example/entity/>" in query
+        assert result["Q7"]["direct"] == [(property_uri, "x")]
+
+    @patch("mlscores.query.run_select")
+    def test_items_per_batch(self, mock_run_select):
+        """Test that items are split into batches of the given size."""
+        mock_run_select.return_value = []
+
+        get_statements_for_items([f"Q{i}" for i in range(25)], items_per_batch=10)
+
+        assert mock_run_select.call_count == 3
+
+    @patch("mlscores.query.run_select")
+    def test_failed_batch_is_bisected(self, mock_run_select):
+        """Test that an invalid item only fails its own entry."""
+
+        def run(query, variables):
+            if "wd: invalid" in query:
+                return None
+            return []
+
+        mock_run_select.side_effect = run
+
+        result = get_statements_for_items(["Q1", " invalid", "Q2", "Q3"])
+
+        assert result[" invalid"] is None
+        assert result["Q1"] == {"direct": [], "qualifier": [], "reference": []}
+        assert result["Q3"] is not None
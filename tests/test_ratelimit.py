@@ -0,0 +1,122 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from mlscores.ratelimit import (
+    RateLimiter,
+    configure_rate_limit,
+    get_rate_limiter,
+    parse_retry_after,
+)
+
+
+class TestParseRetryAfter:
+    """Tests for Retry-After header parsing."""
+
+    def test_seconds(self):
+        """Test a delay given in seconds."""
+        assert parse_retry_after("120") == 120.0
+
+    def test_http_date(self):
+        """Test a delay given as an HTTP date."""
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        delay = parse_retry_after(format_datetime(retry_at, usegmt=True))
+        assert 28 <= delay <= 30
+
+    def test_missing_or_invalid(self):
+        """Test that missing or invalid values are ignored."""
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("") is None
+        assert parse_retry_after("soon") is None
+
+
+class TestRateLimiter:
+    """Tests for the token bucket rate limiter."""
+
+    @patch("mlscores.ratelimit.time.monotonic", return_value=100.0)
+    def test_burst_then_rate(self, mock_monotonic):
+        """Test that requests beyond the burst are spaced at the request rate."""
+        limiter = RateLimiter(requests_per_second=2)
+
+        assert limiter.reserve() == 0
+        assert limiter.reserve() == 0
+        assert limiter.reserve() == 0.5
+        assert limiter.reserve() == 1.0
+
+    @patch("mlscores.ratelimit.time.monotonic")
+    def test_tokens_refill(self, mock_monotonic):
+        """Test that tokens are refilled over time."""
+        mock_monotonic.return_value = 100.0
+        limiter = RateLimiter(requests_per_second=2)
+        limiter.reserve()
+        limiter.reserve()
+
+        mock_monotonic.return_value = 100.5
+        assert limiter.reserve() == 0
+
+    @patch("mlscores.ratelimit.time.monotonic", return_value=100.0)
+    def test_penalize_pauses_all_callers(self, mock_monotonic):
+        """Test that a 429 pauses every caller for the Retry-After delay."""
+        limiter = RateLimiter(requests_per_second=4)
+
+        assert limiter.penalize(10.0, fallback=1.0) == 10.0
+
+        assert limiter.reserve() == 10.5
+        assert limiter.rate == 2
+
+    @patch("mlscores.ratelimit.time.monotonic", return_value=100.0)
+    def test_penalize_fallback(self, mock_monotonic):
+        """Test that the fallback delay is used without Retry-After."""
+        limiter = RateLimiter(requests_per_second=4)
+        assert limiter.penalize(None, fallback=4.0) == 4.0
+
+    @pytest.mark.parametrize("rate", [0, -1.0])
+    def test_rate_must_be_positive(self, rate):
+        """Test that a zero or negative rate is rejected instead of dividing by it."""
+        with pytest.raises(ValueError):
+            RateLimiter(requests_per_second=rate)
+        with pytest.raises(ValueError):
+            configure_rate_limit(requests_per_second=rate)
+
+    def test_reward_recovers_rate(self):
+        """Test that successful requests restore the configured rate."""
+        limiter = RateLimiter(requests_per_second=10)
+        limiter.penalize(0.0, fallback=0.0)
+        assert limiter.rate == 5
+
+        for _ in range(10):
+            limiter.reward()
+
+        assert limiter.rate == 10
+
+
+class TestGlobalRateLimiters:
+    """Tests for the per-host global limiters."""
+
+    def test_one_limiter_per_host(self):
+        """Test that endpoints on the same host share a limiter."""
+        first = get_rate_limiter("https://query.wikidata.org/sparql")
+        second = get_rate_limiter("https://query.wikidata.org/bigdata/namespace/wdq/sparql")
+        other = get_rate_limiter("https://example.org/sparql")
+
+        assert first is second
+        assert first is not other
+
+    def test_configure(self):
+        """Test that configuration replaces existing limiters."""
+        before = get_rate_limiter("https://example.org/sparql")
+
+        configure_rate_limit(requests_per_second=1, max_concurrency=2)
+        after = get_rate_limiter("https://example.org/sparql")
+
+        assert after is not before
+        assert after.max_rate == 1
+        assert after.max_concurrency == 2
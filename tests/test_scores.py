@@ -9,6 +9,7 @@ from mlscores.scores import (
     calculate_language_percentage,
     calculate_language_percentages,
     calculate_language_percentage_for_languages,
+    calculate_language_percentages_from_counts,
     get_missing_translations,
     get_properties_without_translations,
     get_properties_without_translations_in_languages,
@@ -342,3 +343,26 @@ def test_get_missing_translations_for_all_languages_multiple_properties():
         "prop1": {"fr"},
         "prop2": {"en"},
     }
+
+
+def test_calc_lang_pcts_from_counts_matches_tuples():
+    properties = [
+        ("prop1", "value1", "en"),
+        ("prop1", "value1", "fr"),
+        ("prop2", "value2", "en"),
+        ("prop3", "No label", "Unknown language"),
+    ]
+    counts = {"en": 2, "fr": 1, "Unknown language": 1}
+    assert calculate_language_percentages_from_counts(3, counts) == pytest.approx(
+        calculate_language_percentages(properties)
+    )
+    assert calculate_language_percentages_from_counts(
+        3, counts, ["en", "es"]
+    ) == pytest.approx(
+        calculate_language_percentage_for_languages(properties, ["en", "es"])
+    )
+
+
+def test_calc_lang_pcts_from_counts_no_properties():
+    assert calculate_language_percentages_from_counts(0, {}) == {}
+    assert calculate_language_percentages_from_counts(0, {}, ["en"]) == {"en": 0}
@@ -0,0 +1,92 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+import asyncio
+
+import pytest
+
+from mlscores.web.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests for coalescing identical computations in flight."""
+
+    def test_concurrent_calls_share_one_computation(self):
+        """Test that concurrent calls with one key run the computation once."""
+        flight = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "scores"
+
+        async def run():
+            return await asyncio.gather(
+                *(flight.do("Q42", compute) for _ in range(5)),
+                flight.do("Q5", compute),
+            )
+
+        assert asyncio.run(run()) == ["scores"] * 6
+        assert len(calls) == 2
+        assert flight.stats() == {
+            "requests": 6,
+            "computations": 2,
+            "coalesced": 4,
+            "in_flight": 0,
+        }
+
+    def test_finished_computation_not_reused(self):
+        """Test that only computations still in flight are shared."""
+        flight = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return len(calls)
+
+        async def run():
+            return [await flight.do("Q42", compute), await flight.do("Q42", compute)]
+
+        assert asyncio.run(run()) == [1, 2]
+
+    def test_exception_shared(self):
+        """Test that every waiting caller gets the computation's exception."""
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("No properties found for item Q0")
+
+        async def run():
+            return await asyncio.gather(
+                flight.do("Q0", compute),
+                flight.do("Q0", compute),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(result, ValueError) for result in results)
+
+    def test_cancelled_caller(self):
+        """Test that cancelling one caller does not cancel the shared computation."""
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            return "scores"
+
+        async def run():
+            first = asyncio.ensure_future(flight.do("Q42", compute))
+            second = asyncio.ensure_future(flight.do("Q42", compute))
+            await asyncio.sleep(0)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert asyncio.run(run()) == "scores"
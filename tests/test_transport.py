@@ -0,0 +1,170 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+import gzip
+import json
+import threading
+import urllib.error
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from SPARQLWrapper import SPARQLExceptions
+
+from mlscores.endpoint import EndpointConfig
+from mlscores.transport import SparqlSession
+
+RESULT = {"head": {"vars": ["p"]}, "results": {"bindings": [{"p": {"value": "x"}}]}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self, query):
+        server = self.server
+        server.requests.append(
+            {
+                "method": self.command,
+                "query": query,
+                "client": self.client_address,
+                "headers": dict(self.headers),
+            }
+        )
+        status, headers, body = server.responses.pop(0) if server.responses else (
+            200,
+            {},
+            json.dumps(RESULT).encode(),
+        )
+        if "gzip" in self.headers.get("Accept-Encoding", "") and status == 200:
+            body = gzip.compress(body)
+            headers = {**headers, "Content-Encoding": "gzip"}
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        params = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        self._respond(params["query"][0])
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        params = urllib.parse.parse_qs(self.rfile.read(length).decode())
+        self._respond(params["query"][0])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """A local stand-in SPARQL endpoint recording the requests it receives."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.requests = []
+    httpd.responses = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _session(server, **options):
+    url = f"http://127.0.0.1:{server.server_address[1]}/sparql"
+    return SparqlSession(EndpointConfig(url=url, **options), "mlscores-tests")
+
+
+class TestSparqlSession:
+    """Tests for the keep-alive SPARQL transport."""
+
+    def test_short_query_sent_as_get(self, server):
+        """Test that short queries use GET and are decoded."""
+        session = _session(server)
+        session.setQuery("SELECT ?p WHERE { ?p ?q ?r }")
+
+        assert session.query().convert() == RESULT
+        assert server.requests[0]["method"] == "GET"
+        assert server.requests[0]["query"] == "SELECT ?p WHERE { ?p ?q ?r }"
+
+    def test_long_query_sent_as_post(self, server):
+        """Test that queries above the threshold use POST."""
+        session = _session(server, max_get_query_length=20)
+        session.setQuery("SELECT ?p WHERE { ?p ?q ?r }")
+
+        assert session.query().convert() == RESULT
+        assert server.requests[0]["method"] == "POST"
+
+    def test_connection_reused(self, server):
+        """Test that consecutive queries share one connection."""
+        session = _session(server)
+        for i in range(3):
+            session.setQuery(f"SELECT {i}")
+            # Only read part of the response; the rest is drained before reuse
+            session.query().response.read(1)
+
+        assert len({request["client"] for request in server.requests}) == 1
+
+    def test_gzip_negotiated(self, server):
+        """Test that responses are requested and decoded gzip-compressed."""
+        session = _session(server)
+        session.setQuery("SELECT 1")
+        session.query().convert()
+
+        assert server.requests[0]["headers"]["Accept-Encoding"] == "gzip"
+
+    def test_gzip_disabled(self, server):
+        """Test that compression can be turned off per endpoint."""
+        session = _session(server, gzip=False)
+        session.setQuery("SELECT 1")
+
+        assert session.query().convert() == RESULT
+        assert server.requests[0]["headers"].get("Accept-Encoding") != "gzip"
+
+    def test_custom_accept_and_auth_headers(self, server):
+        """Test that custom headers and basic auth are sent."""
+        session = _session(server, username="user", password="secret")
+        session.addCustomHttpHeader("Accept", "text/tab-separated-values")
+        session.setQuery("SELECT 1")
+        session.query().convert()
+
+        headers = server.requests[0]["headers"]
+        assert headers["Accept"] == "text/tab-separated-values"
+        assert headers["Authorization"].startswith("Basic ")
+
+    def test_rate_limit_raises_http_error(self, server):
+        """Test that 429 responses raise HTTPError with their headers."""
+        server.responses.append((429, {"Retry-After": "3"}, b"slow down"))
+        session = _session(server)
+        session.setQuery("SELECT 1")
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            session.query()
+        assert error.value.code == 429
+        assert error.value.headers["Retry-After"] == "3"
+
+        # The connection is still usable after an error response
+        assert session.query().convert() == RESULT
+
+    def test_bad_query_raises_query_bad_formed(self, server):
+        """Test that 400 responses raise QueryBadFormed."""
+        server.responses.append((400, {}, b"parse error"))
+        session = _session(server)
+        session.setQuery("SELECT")
+
+        with pytest.raises(SPARQLExceptions.QueryBadFormed):
+            session.query()
+
+    def test_unreachable_endpoint(self):
+        """Test that connection failures raise OSError."""
+        session = SparqlSession(
+            EndpointConfig(url="http://127.0.0.1:9/sparql", timeout=1), "mlscores-tests"
+        )
+        session.setQuery("SELECT 1")
+
+        with pytest.raises(OSError):
+            session.query()
@@ -58,3 +58,110 @@ class TestEntitySearchRoute:
         assert response.status_code == 400
         assert "supports only" in response.json()["detail"]
 
+
+
+class TestItemScoresRoute:
+    """Tests for item score endpoints."""
+
+    @patch("mlscores.web.routes.get_value_labels")
+    @patch("mlscores.web.routes.get_property_labels")
+    @patch("mlscores.web.routes.get_statements")
+    def test_get_item_scores(
+        self,
+        mock_statements,
+        mock_prop_labels,
+        mock_value_labels,
+        sample_statements,
+    ):
+        """Returns percentages computed from async query results."""
+        mock_statements.return_value = sample_statements
+        mock_prop_labels.return_value = [
+            ("http://www.wikidata.org/prop/direct/P31", "instance of", "en"),
+            ("http://www.wikidata.org/prop/direct/P21", "sex or gender", "en"),
+        ]
+        mock_value_labels.return_value = [
+            ("http://www.wikidata.org/entity/Q5", "human", "en"),
+        ]
+
+        response = client.get("/api/scores/Q42", params={"languages": ["en", "fr"]})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["property_labels"]["percentages"] == {"en": 100.0, "fr": 0.0}
+        assert data["value_labels"]["percentages"] == {"en": 100.0, "fr": 0.0}
+
+    @patch("mlscores.web.routes.get_statements")
+    def test_post_scores_not_found(self, mock_statements):
+        """Returns 404 when an item has no properties."""
+        mock_statements.return_value = None
+
+        response = client.post("/api/scores", json={"identifiers": ["Q1", "Q2"]})
+
+        assert response.status_code == 404
+        assert "Q1" in response.json()["detail"]
+
+    @patch("mlscores.web.routes.get_statements")
+    def test_post_scores_endpoint(self, mock_statements):
+        """Scores are computed with the client of the requested endpoint."""
+        mock_statements.return_value = None
+
+        client.post(
+            "/api/scores", json={"identifiers": ["Q1"], "endpoint": "commons"}
+        )
+        client.post(
+            "/api/scores",
+            json={"identifiers": ["Q1"], "endpoint_url": "https://example.org/sparql"},
+        )
+
+        endpoints = [call.args[1].endpoint for call in mock_statements.call_args_list]
+        assert endpoints == [
+            "https://wcqs-beta.wmflabs.org/sparql",
+            "https://example.org/sparql",
+        ]
+
+    def test_post_scores_invalid_endpoint(self):
+        """Returns 400 for unknown endpoints and non-HTTP endpoint URLs."""
+        for endpoint in ({"endpoint": "unknown"}, {"endpoint_url": "local:/x.sqlite"}):
+            response = client.post(
+                "/api/scores", json={"identifiers": ["Q1"], **endpoint}
+            )
+
+            assert response.status_code == 400
+
+    @patch("mlscores.web.routes.get_value_labels")
+    @patch("mlscores.web.routes.get_property_labels")
+    @patch("mlscores.web.routes.get_statements")
+    def test_identical_items_coalesced(
+        self, mock_statements, mock_prop_labels, mock_value_labels, sample_statements
+    ):
+        """Identical items of one request share one computation."""
+        mock_statements.return_value = sample_statements
+        mock_prop_labels.return_value = []
+        mock_value_labels.return_value = []
+        before = client.get("/api/coalescing").json()
+
+        response = client.post("/api/scores", json={"identifiers": ["Q42", "Q42"]})
+
+        assert response.status_code == 200
+        assert len(response.json()["results"]) == 2
+        assert mock_statements.call_count == 1
+        after = client.get("/api/coalescing").json()
+        assert after["coalesced"] - before["coalesced"] == 1
+        assert after["in_flight"] == 0
+
+
+class TestCacheRoutes:
+    """Tests for the query cache endpoints."""
+
+    def test_cache_stats(self):
+        """Returns the statistics of the query cache."""
+        response = client.get("/api/cache")
+
+        assert response.status_code == 200
+        assert response.json()["enabled"] is False
+
+    def test_cache_not_clearable(self):
+        """Does not let clients empty the query cache."""
+        response = client.delete("/api/cache")
+
+        assert response.status_code == 405
@@ -0,0 +1,276 @@
+#
+# SPDX-FileCopyrightText: 2026 John Samuel <johnsamuelwrites@gmail.com>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+
+import asyncio
+import dataclasses
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from mlscores.aquery import AsyncSparqlClient, get_value_labels as aget_value_labels
+from mlscores.cache import QueryCache, configure_cache
+from mlscores.constants import (
+    DEFAULT_NO_LABEL,
+    DEFAULT_UNKNOWN_LANGUAGE,
+    DEFAULT_WIKIBASE_API_URL,
+    WIKIDATA_ITEM_PREFIX,
+    WIKIDATA_PROPERTY_PREFIX,
+)
+from mlscores.endpoint import KNOWN_ENDPOINTS, EndpointConfig
+from mlscores.query import configure_endpoint, get_property_labels, get_value_labels
+from mlscores.wikibase_api import build_wbgetentities_params, entity_label_rows
+
+LABELS = {
+    "P31": {"en": "instance of", "fr": "nature de l'élément"},
+    "Q5": {"en": "human", "fr": "être humain", "de": "Mensch"},
+    "Q42": {"en": "Douglas Adams"},
+}
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    """Stand-in for a Wikibase api.php answering wbgetentities requests."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        params = {
+            name: values[0]
+            for name, values in urllib.parse.parse_qs(
+                urllib.parse.urlsplit(self.path).query
+            ).items()
+        }
+        server.requests.append(params)
+
+        if server.responses:
+            status, headers, body = server.responses.pop(0)
+        else:
+            languages = params["languages"].split("|") if "languages" in params else None
+            entities = {}
+            for entity in params["ids"].split("|"):
+                if entity not in LABELS:
+                    entities[entity] = {"id": entity, "missing": ""}
+                    continue
+                entities[entity] = {
+                    "id": entity,
+                    "labels": {
+                        lang: {"language": lang, "value": value}
+                        for lang, value in LABELS[entity].items()
+                        if languages is None or lang in languages
+                    },
+                }
+            status, headers = 200, {}
+            body = json.dumps({"entities": entities}).encode()
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api():
+    """A local stand-in Wikibase API recording the requests it receives."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _ApiHandler)
+    httpd.requests = []
+    httpd.responses = []
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/w/api.php"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def api_backend(api):
+    """Resolve labels through the stand-in API."""
+    configure_endpoint(EndpointConfig(label_backend="wbgetentities", api_url=api.url))
+    yield api
+    configure_endpoint(EndpointConfig())
+
+
+class TestEntityLabelRows:
+    """Tests for decoding wbgetentities responses."""
+
+    def test_rows_per_label(self):
+        """Test that every label of every requested URI becomes a row."""
+        uri = f"{WIKIDATA_PROPERTY_PREFIX}P31"
+        document = {
+            "entities": {
+                "P31": {
+                    "labels": {
+                        "en": {"language": "en", "value": "instance of"},
+                        "fr": {"language": "fr", "value": "nature de l'élément"},
+                    }
+                }
+            }
+        }
+
+        assert entity_label_rows([uri], document) == [
+            (uri, "instance of", "en"),
+            (uri, "nature de l'élément", "fr"),
+        ]
+
+    def test_unlabelled_and_missing_entities(self):
+        """Test that URIs without labels give one unlabelled row, like SPARQL."""
+        document = {
+            "entities": {
+                "Q1": {"labels": {"de": {"language": "de", "value": "Universum"}}},
+                "Q2": {"id": "Q2", "missing": ""},
+            }
+        }
+        uris = [f"{WIKIDATA_ITEM_PREFIX}1", f"{WIKIDATA_ITEM_PREFIX}2"]
+
+        assert entity_label_rows(uris, document, ["en"]) == [
+            (uris[0], None, None),
+            (uris[1], None, None),
+        ]
+
+    def test_api_error(self):
+        """Test that API errors are reported as invalid responses."""
+        with pytest.raises(ValueError, match="no-such-entity"):
+            entity_label_rows([], {"error": {"code": "no-such-entity", "info": "x"}})
+
+    def test_many_languages_not_sent(self):
+        """Test that language lists above the API limit are filtered locally."""
+        languages = [f"l{i}" for i in range(51)]
+
+        assert "languages" not in build_wbgetentities_params(["Q5"], languages)
+        assert build_wbgetentities_params(["Q5"], ["en", "fr"])["languages"] == "en|fr"
+
+
+class TestWbgetentitiesBackend:
+    """Tests for label resolution through a stand-in Wikibase API."""
+
+    def test_property_labels(self, api_backend):
+        """Test that property labels match the SPARQL backend's tuples."""
+        uri = f"{WIKIDATA_PROPERTY_PREFIX}P31"
+
+        result = get_property_labels([uri, uri], ["en", "fr"])
+
+        assert sorted(result) == [
+            (uri, "instance of", "en"),
+            (uri, "nature de l'élément", "fr"),
+        ]
+        assert api_backend.requests == [
+            {
+                "action": "wbgetentities",
+                "ids": "P31",
+                "props": "labels",
+                "format": "json",
+                "formatversion": "2",
+                "redirects": "no",
+                "languages": "en|fr",
+            }
+        ]
+
+    def test_value_labels_without_label(self, api_backend):
+        """Test that values without a label get the default label and language."""
+        human = f"{WIKIDATA_ITEM_PREFIX}5"
+        unknown = f"{WIKIDATA_ITEM_PREFIX}999"
+
+        result = get_value_labels([human, unknown, "not a URI"], ["de"])
+
+        assert result == [
+            (human, "Mensch", "de"),
+            (unknown, DEFAULT_NO_LABEL, DEFAULT_UNKNOWN_LANGUAGE),
+        ]
+
+    def test_batches_of_fifty(self, api_backend):
+        """Test that URIs are requested in batches of at most 50 IDs."""
+        uris = [f"{WIKIDATA_ITEM_PREFIX}{i}" for i in range(1000, 1120)]
+
+        result = get_value_labels(uris)
+
+        assert len(result) == 120
+        batch_sizes = sorted(
+            len(request["ids"].split("|")) for request in api_backend.requests
+        )
+        assert batch_sizes == [20, 50, 50]
+
+    def test_failed_batch_left_out(self, api_backend):
+        """Test that a failing batch does not fail the other batches."""
+        api_backend.responses.append((500, {}, b"error"))
+        uris = [f"{WIKIDATA_ITEM_PREFIX}{i}" for i in range(1000, 1060)]
+
+        result = get_value_labels(uris)
+
+        assert len(result) in (10, 50)
+
+    def test_rate_limited_request_retried(self, api_backend):
+        """Test that 429 responses are retried after Retry-After."""
+        api_backend.responses.append((429, {"Retry-After": "0"}, b""))
+
+        result = get_value_labels([f"{WIKIDATA_ITEM_PREFIX}42"], ["en"])
+
+        assert result == [(f"{WIKIDATA_ITEM_PREFIX}42", "Douglas Adams", "en")]
+        assert len(api_backend.requests) == 2
+
+    def test_labels_cached_per_uri_only(self, api_backend, tmp_path):
+        """Test that batches are not cached besides the labels of each URI."""
+        configure_cache(cache_dir=str(tmp_path))
+        uris = [f"{WIKIDATA_ITEM_PREFIX}5", f"{WIKIDATA_ITEM_PREFIX}42"]
+
+        set_many = QueryCache.set_many
+        with patch.object(QueryCache, "set") as cache_set, patch.object(
+            QueryCache, "set_many", autospec=True, side_effect=set_many
+        ) as cache_set_many:
+            get_value_labels(uris, ["en"])
+            result = get_value_labels(uris, ["en"])
+
+        assert len(result) == 2
+        assert len(api_backend.requests) == 1
+        assert not cache_set.called
+        # The labels of the batch are written together, once
+        ((_, entries, namespace),) = [
+            call.args for call in cache_set_many.call_args_list if call.args[1]
+        ]
+        assert sorted(entries) == sorted(uris)
+        assert namespace.endswith("#entity-labels")
+
+    def test_async_client(self, api):
+        """Test that async clients can use the wbgetentities backend."""
+
+        async def run():
+            async with AsyncSparqlClient(
+                label_backend="wbgetentities", api_url=api.url
+            ) as client:
+                return await aget_value_labels(
+                    [f"{WIKIDATA_ITEM_PREFIX}5"], client, ["en"]
+                )
+
+        assert asyncio.run(run()) == [(f"{WIKIDATA_ITEM_PREFIX}5", "human", "en")]
+
+    def test_requires_api_url(self):
+        """Test that the backend cannot be selected without an API URL."""
+        with pytest.raises(ValueError):
+            configure_endpoint(
+                EndpointConfig(label_backend="wbgetentities", api_url=None)
+            )
+        with pytest.raises(ValueError):
+            configure_endpoint(EndpointConfig(label_backend="unknown"))
+
+    def test_known_endpoint_api_urls(self):
+        """Test that only endpoints served by the Wikidata API default to it."""
+        assert KNOWN_ENDPOINTS["wikidata"].api_url == DEFAULT_WIKIBASE_API_URL
+        assert KNOWN_ENDPOINTS["commons"].api_url is None
+        with pytest.raises(ValueError):
+            configure_endpoint(
+                dataclasses.replace(
+                    KNOWN_ENDPOINTS["commons"], label_backend="wbgetentities"
+                )
+            )